@@ -23,6 +23,21 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_USERNAME: str = ""
     TELEGRAM_PROXY_URL: Optional[str] = None  # socks5://... (MTProxy не поддерживается)
     DEADLINE_NOTIFY_HOURS: str = "24,3"
+    # Получение апдейтов: "polling" или "webhook" (aiohttp-сервер в процессе бота)
+    TELEGRAM_MODE: str = "polling"
+    TELEGRAM_WEBHOOK_URL: Optional[str] = None  # публичный https-URL, на который Telegram шлёт апдейты
+    TELEGRAM_WEBHOOK_PATH: str = "/telegram/webhook"
+    TELEGRAM_WEBHOOK_SECRET: Optional[str] = None  # X-Telegram-Bot-Api-Secret-Token; пусто — HMAC токена бота на SECRET_KEY
+    TELEGRAM_WEBHOOK_HOST: str = "0.0.0.0"
+    TELEGRAM_WEBHOOK_PORT: int = 8081
+    TELEGRAM_WORKERS: int = 8  # обработчиков апдейтов; апдейты одного чата — строго по порядку
+    TELEGRAM_MAX_PENDING: int = 1000  # апдейтов в очереди; дальше webhook ждёт (Telegram повторит)
+    # Исходящие сообщения бота (лимиты Telegram): всего в секунду, в личный чат в секунду, в группу в минуту
+    TELEGRAM_SEND_PER_SEC: float = 30
+    TELEGRAM_SEND_PER_CHAT_PER_SEC: float = 1
+    TELEGRAM_SEND_PER_GROUP_PER_MIN: float = 20
+    # Heartbeat бота для API (mmap-файл); пусто — bot_heartbeat.mmap рядом с SQLite-базой
+    BOT_HEARTBEAT_FILE: Optional[str] = None
 
     # Telegram Mini App
     WEBAPP_URL: Optional[str] = None  # URL веб-интерфейса для кнопки Mini App в боте
@@ -52,6 +67,31 @@ class Settings(BaseSettings):
     # Performance
     DB_POOL_SIZE: int = 5
     DB_MAX_OVERFLOW: int = 10
+
+    # SQLite: "queue" — пул долгоживущих соединений, "null" — новое соединение на каждую сессию
+    SQLITE_POOL_MODE: str = "queue"
+    SQLITE_POOL_SIZE: int = 5  # сколько соединений держим открытыми
+    # Сверх пула — временные соединения (-1 = без лимита). Лимит опасен: сессия с
+    # захваченной блокировкой записи может ждать второе соединение (save_event и т.п.)
+    SQLITE_MAX_OVERFLOW: int = -1
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000
+    SQLITE_CACHE_SIZE_KB: int = 20000  # PRAGMA cache_size=-N (в KiB, на соединение)
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    # Мелкие фоновые записи (heartbeat, события, логи) — через один писатель с group commit
+    SQLITE_WRITE_QUEUE: bool = True
+    # Доставка вебхуков из webhook_outbox (пул воркеров в процессе API)
+    WEBHOOK_WORKERS: int = 4
+    WEBHOOK_PER_ENDPOINT: int = 2  # одновременных запросов на один вебхук
+    WEBHOOK_MAX_ATTEMPTS: int = 10  # дальше — status="dead"
+    # Web Push: одновременных запросов к push-сервисам и потоков на шифрование payload
+    PUSH_SENDERS: int = 32
+    PUSH_ENCRYPT_WORKERS: int = 2
+    # Окно склейки уведомлений: события за него уходят получателю одной сводкой
+    NOTIFY_COALESCE_SECONDS: int = 10
+    # FSM бота: "sqlite" — fsm_states с кэшем в памяти (диалоги переживают рестарт), "memory" — MemoryStorage
+    FSM_STORAGE: str = "sqlite"
+    FSM_TTL_HOURS: int = 24  # брошенный на середине диалог сбрасывается
+    FSM_CACHE: bool = True  # выключить, если одну БД обслуживают несколько процессов бота
     
     @property
     def web_url(self) -> str:
@@ -1,7 +1,11 @@
 """Database connection and session management."""
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, TypeVar
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy import event, text
 from app.config import settings
 from app.core.logging import get_logger
 
@@ -10,17 +14,52 @@ logger = get_logger(__name__)
 Base = declarative_base()
 
 
+def _sqlite_pragmas() -> list[str]:
+    """PRAGMA, применяемые к каждому новому SQLite-соединению."""
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    """Настроить соединение один раз при открытии (в пуле — на всё время жизни)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 def _make_engine():
     kwargs = {"echo": settings.DEBUG, "future": True}
-    if "sqlite" in settings.DATABASE_URL:
-        from sqlalchemy.pool import NullPool
-        kwargs["poolclass"] = NullPool
-        kwargs["connect_args"] = {"check_same_thread": False, "timeout": 10}
+    is_sqlite = "sqlite" in settings.DATABASE_URL
+    if is_sqlite:
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if settings.SQLITE_POOL_MODE == "null":
+            from sqlalchemy.pool import NullPool
+            kwargs["poolclass"] = NullPool
+        else:
+            from sqlalchemy.pool import AsyncAdaptedQueuePool
+            kwargs["poolclass"] = AsyncAdaptedQueuePool
+            kwargs["pool_size"] = settings.SQLITE_POOL_SIZE
+            kwargs["max_overflow"] = settings.SQLITE_MAX_OVERFLOW
     else:
         kwargs["pool_size"] = settings.DB_POOL_SIZE
         kwargs["max_overflow"] = settings.DB_MAX_OVERFLOW
         kwargs["pool_pre_ping"] = True
-    return create_async_engine(settings.DATABASE_URL, **kwargs)
+    new_engine = create_async_engine(settings.DATABASE_URL, **kwargs)
+    if is_sqlite:
+        event.listen(new_engine.sync_engine, "connect", _on_sqlite_connect)
+    return new_engine
 
 
 engine = _make_engine()
@@ -43,6 +82,148 @@ async def get_db() -> AsyncSession:
             raise
 
 
+# ============= WRITE QUEUE =============
+
+T = TypeVar("T")
+WriteFn = Callable[[AsyncSession], Awaitable[Any]]
+
+
+def _is_lock_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return "database is locked" in msg or "database is busy" in msg
+
+
+class WriteQueue:
+    """Однопоточный писатель процесса: мелкие записи собираются в group commit.
+
+    Каждая работа — корутина ``fn(session)``, выполняется в своём SAVEPOINT
+    внутри общей транзакции (ошибка одной работы не откатывает остальные).
+    Для SQLite транзакция открывается через ``BEGIN IMMEDIATE`` — блокировка
+    записи берётся сразу, без апгрейда read → write. При ``database is locked``
+    весь батч повторяется с backoff, поэтому ``fn`` не должна иметь побочных
+    эффектов вне сессии и не должна сама вызывать ``run_write``.
+    """
+
+    def __init__(self, max_batch: int = 64, max_delay: float = 0.002, retries: int = 5):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retries = retries
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.stats = {"jobs": 0, "batches": 0, "lock_retries": 0, "failed": 0}
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    def enqueue(self, fn: WriteFn) -> asyncio.Future:
+        queue = self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((fn, future))
+        return future
+
+    async def submit(self, fn: WriteFn) -> Any:
+        return await self.enqueue(fn)
+
+    async def _run(self):
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: list[tuple[WriteFn, asyncio.Future]]):
+        is_sqlite = "sqlite" in settings.DATABASE_URL
+        outcomes: list[tuple[asyncio.Future, Any, Exception | None]] = []
+        for attempt in range(self.retries + 1):
+            outcomes = []
+            try:
+                async with AsyncSessionLocal() as session:
+                    if is_sqlite:
+                        await session.execute(text("BEGIN IMMEDIATE"))
+                    for fn, future in batch:
+                        try:
+                            async with session.begin_nested():
+                                outcomes.append((future, await fn(session), None))
+                        except Exception as e:
+                            outcomes.append((future, None, e))
+                    await session.commit()
+                break
+            except OperationalError as e:
+                if not _is_lock_error(e) or attempt == self.retries:
+                    outcomes = [(future, None, e) for _, future in batch]
+                    break
+                self.stats["lock_retries"] += 1
+                await asyncio.sleep(min(0.05 * 2 ** attempt, 1.0) * (0.5 + random.random()))
+            except Exception as e:
+                outcomes = [(future, None, e) for _, future in batch]
+                break
+
+        self.stats["batches"] += 1
+        self.stats["jobs"] += len(batch)
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                self.stats["failed"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+write_queue = WriteQueue()
+
+
+async def run_write(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Выполнить запись ``fn(session)`` и закоммитить её.
+
+    При ``SQLITE_WRITE_QUEUE`` запись идёт через общий писатель процесса
+    (group commit), иначе — в отдельной сессии, как обычный ``AsyncSessionLocal``.
+    """
+    if settings.SQLITE_WRITE_QUEUE and "sqlite" in settings.DATABASE_URL:
+        return await write_queue.submit(fn)
+    async with AsyncSessionLocal() as session:
+        result = await fn(session)
+        await session.commit()
+        return result
+
+
+def _log_write_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("background_write_failed", error=str(future.exception()))
+
+
+def schedule_write(fn: Callable[[AsyncSession], Awaitable[Any]]) -> None:
+    """Поставить запись в очередь, не дожидаясь commit.
+
+    Для записей, которые делаются посреди чужой транзакции (доменные события,
+    логи): вызывающий может держать блокировку записи, и ожидание commit
+    в этом же процессе привело бы к взаимной блокировке до busy_timeout.
+    """
+    if settings.SQLITE_WRITE_QUEUE and "sqlite" in settings.DATABASE_URL:
+        future = write_queue.enqueue(fn)
+    else:
+        future = asyncio.ensure_future(run_write(fn))
+    future.add_done_callback(_log_write_error)
+
+
 async def _run_migrations():
     """Add missing columns to existing databases (safe to run multiple times)."""
     if "sqlite" not in settings.DATABASE_URL:
@@ -81,20 +262,34 @@ async def _run_migrations():
         async with db.execute("PRAGMA table_info(api_keys)") as cur:
             api_keys_cols = {row[1] async for row in cur}
 
+        async with db.execute("PRAGMA table_info(webhooks)") as cur:
+            webhooks_cols = {row[1] async for row in cur}
+
+        async with db.execute("PRAGMA table_info(bot_heartbeat)") as cur:
+            bot_heartbeat_cols = {row[1] async for row in cur}
+
         # Добавляем отсутствующие колонки
         migrations = [
             ("assignee_id", "ALTER TABLE tasks ADD COLUMN assignee_id INTEGER", cols),
             ("source_chat_id", "ALTER TABLE tasks ADD COLUMN source_chat_id BIGINT", cols),
             ("project_id", "ALTER TABLE tasks ADD COLUMN project_id INTEGER REFERENCES projects(id)", cols),
             ("timezone", "ALTER TABLE local_accounts ADD COLUMN timezone VARCHAR(64)", local_accounts_cols),
+            ("last_seen_at", "ALTER TABLE local_accounts ADD COLUMN last_seen_at DATETIME", local_accounts_cols),
             ("key_prefix", "ALTER TABLE api_keys ADD COLUMN key_prefix VARCHAR(12)", api_keys_cols),
+            ("batch_window_sec", "ALTER TABLE webhooks ADD COLUMN batch_window_sec INTEGER", webhooks_cols),
+            ("batch_max_events", "ALTER TABLE webhooks ADD COLUMN batch_max_events INTEGER", webhooks_cols),
+            ("send_queue", "ALTER TABLE bot_heartbeat ADD COLUMN send_queue TEXT", bot_heartbeat_cols),
         ]
         for col, sql, existing_cols in migrations:
             if col not in existing_cols:
                 await db.execute(sql)
                 table_map = {
                     "timezone": "local_accounts",
+                    "last_seen_at": "local_accounts",
                     "key_prefix": "api_keys",
+                    "batch_window_sec": "webhooks",
+                    "batch_max_events": "webhooks",
+                    "send_queue": "bot_heartbeat",
                 }
                 table = table_map.get(col, "tasks")
                 logger.info("migrate_added_column", table=table, column=col)
@@ -116,6 +311,60 @@ async def _run_migrations():
                     )
                 logger.info("migrate_api_keys_hashed", count=len(plain_keys))
 
+        # Полнотекстовый поиск: FTS5-индекс + триггеры синхронизации
+        from app.services.search_service import ensure_search_index
+        await ensure_search_index(db)
+
+        # Счётчики /api/stats: task_counters + триггеры, пересчёт при старте
+        from app.services.stats_service import ensure_task_counters
+        await ensure_task_counters(db)
+
+        # Версия набора вебхуков для реестра подписок (межпроцессная инвалидация)
+        from app.services.webhook_service import ensure_webhook_registry
+        await ensure_webhook_registry(db)
+
+        # Настройки push-уведомлений: notif_prefs_* из app_settings → notification_prefs
+        from app.services.push_service import ensure_notification_prefs
+        await ensure_notification_prefs(db)
+
+        # Журнал изменений дедлайнов для планировщика уведомлений в боте
+        from app.telegram.deadline_notifier import ensure_deadline_feed
+        await ensure_deadline_feed(db)
+
+        # Индексы domain_events по task_id/created_at и read-модели проекций
+        from app.services.projection_service import ensure_projections
+        await ensure_projections(db)
+
+        # Журнал изменений для SSE /api/stream (триггеры на задачах, спринтах, встречах, комментариях)
+        from app.services.change_stream import ensure_change_feed
+        await ensure_change_feed(db)
+
+        # Версии задач для инкрементальной синхронизации /api/sync/tasks
+        from app.services.sync_service import ensure_task_versions
+        await ensure_task_versions(db)
+
+        # Состояния FSM бота (незаконченные диалоги переживают рестарт)
+        from app.telegram.fsm_storage import ensure_fsm_states
+        await ensure_fsm_states(db)
+
+        # Покрывающие индексы для /api/digest: GROUP BY идёт по индексу без сортировки
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_digest ON tasks ("
+            "archived, deleted, project_id, priority, status, backlog, "
+            "parent_task_id, due_date, completed_at, created_at)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_digest_assignee ON tasks ("
+            "archived, deleted, backlog, assignee_id, status, "
+            "due_date, completed_at, updated_at, created_at)"
+        )
+
+        # check_deadlines джойнит задачи с telegram-привязкой исполнителя
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_user_identities_account "
+            "ON user_identities (local_account_id, provider)"
+        )
+
         await db.commit()
 
 
@@ -126,9 +375,5 @@ async def init_db():
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-        if "sqlite" in settings.DATABASE_URL:
-            await conn.execute(text("PRAGMA journal_mode=WAL"))
-            await conn.execute(text("PRAGMA synchronous=NORMAL"))
-            await conn.execute(text("PRAGMA busy_timeout=5000"))
 
     await _run_migrations()
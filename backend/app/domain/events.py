@@ -1,10 +1,15 @@
 """Domain events."""
+import asyncio
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, TYPE_CHECKING
 import json
 from app.domain.enums import TaskStatus
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
 
 @dataclass
 class DomainEvent:
@@ -53,44 +58,118 @@ class MeetingRecorded(DomainEvent):
     summary: str
 
 
+FLAG_CHECK_SECONDS = 5.0  # флаг из другого процесса (бот ↔ API) подхватывается с этой задержкой
+FLUSH_INTERVAL_SECONDS = 0.5
+FLUSH_BATCH = 500
+
+
+class EventStore:
+    """Запись domain_events: флаг включения в памяти, события копятся и пишутся пачкой.
+
+    ``save(..., db=session)`` кладёт событие в транзакцию вызывающего — оно
+    коммитится (или откатывается) вместе с изменением. Без сессии событие
+    попадает в буфер, который раз в FLUSH_INTERVAL_SECONDS (или по FLUSH_BATCH
+    штук) уходит одним INSERT через очередь записи.
+    """
+
+    def __init__(self):
+        self._enabled: Optional[bool] = None
+        self._checked_at = float("-inf")
+        self._buffer: list[dict[str, Any]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def invalidate(self) -> None:
+        """Перечитать флаг при следующем обращении (после смены event_store_enabled)."""
+        self._enabled = None
+
+    async def enabled(self) -> bool:
+        now = time.monotonic()
+        if self._enabled is None or now - self._checked_at >= FLAG_CHECK_SECONDS:
+            from app.core.db import AsyncSessionLocal
+            from app.services.settings_service import SettingsService
+
+            self._checked_at = now
+            try:
+                async with AsyncSessionLocal() as db:
+                    self._enabled = await SettingsService.get(db, "event_store_enabled") == "true"
+            except Exception:
+                self._enabled = False
+        return self._enabled
+
+    async def save(self, event_type: str, payload: dict[str, Any], task_id: Optional[int] = None,
+                   db: Optional["AsyncSession"] = None) -> None:
+        if not await self.enabled():
+            return
+        from app.core.clock import Clock
+        from app.domain.models import DomainEvent as DomainEventModel
+
+        row = {
+            "event_type": event_type,
+            "payload": json.dumps(payload, default=str),
+            "task_id": task_id,
+            "created_at": Clock.now(),
+        }
+        if db is not None:
+            db.add(DomainEventModel(**row))
+            return
+        self._buffer.append(row)
+        if len(self._buffer) >= FLUSH_BATCH:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(FLUSH_INTERVAL_SECONDS, self._flush)
+
+    def _flush(self) -> None:
+        from app.core.db import schedule_write
+        from app.domain.models import DomainEvent as DomainEventModel
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+
+        async def _write(db):
+            await db.execute(DomainEventModel.__table__.insert(), rows)
+
+        # Не ждём commit: вызывающий обычно держит блокировку записи своей транзакции
+        schedule_write(_write)
+
+    async def flush(self) -> None:
+        """Записать буфер и дождаться commit (при остановке процесса)."""
+        from app.core.db import run_write
+        from app.domain.models import DomainEvent as DomainEventModel
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        rows, self._buffer = self._buffer, []
+        if rows:
+            async def _write(db):
+                await db.execute(DomainEventModel.__table__.insert(), rows)
+
+            await run_write(_write)
+
+
+event_store = EventStore()
+
+
 async def is_event_store_enabled() -> bool:
-    """Check if event store is enabled in settings."""
-    from app.core.db import AsyncSessionLocal
-    from app.services.settings_service import SettingsService
-    
-    try:
-        async with AsyncSessionLocal() as db:
-            val = await SettingsService.get(db, "event_store_enabled")
-            return val == "true"
-    except Exception:
-        return False
+    """Check if event store is enabled in settings (кэш на FLAG_CHECK_SECONDS)."""
+    return await event_store.enabled()
 
 
 async def save_event(
     event_type: str,
     payload: dict[str, Any],
     task_id: Optional[int] = None,
+    db: Optional["AsyncSession"] = None,
 ) -> None:
-    """Save domain event to database if event store is enabled."""
-    if not await is_event_store_enabled():
-        return
-    
-    from app.core.db import AsyncSessionLocal
-    from app.domain.models import DomainEvent
-    from app.core.clock import Clock
-    
-    try:
-        async with AsyncSessionLocal() as db:
-            event = DomainEvent(
-                event_type=event_type,
-                payload=json.dumps(payload, default=str),
-                task_id=task_id,
-                created_at=Clock.now(),
-            )
-            db.add(event)
-            await db.commit()
-    except Exception:
-        pass
+    """Save domain event if event store is enabled.
+
+    ``db`` — записать в транзакции вызывающего; без него — в буфер пакетной записи.
+    """
+    await event_store.save(event_type, payload, task_id, db)
 
 
 async def get_events(task_id: Optional[int] = None, limit: int = 100) -> list[dict]:
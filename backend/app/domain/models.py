@@ -1,7 +1,7 @@
 """Domain models."""
 from datetime import datetime
 from app.core.clock import Clock
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, BigInteger, Boolean, Table
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Date, Float, BigInteger, Boolean, Table
 from sqlalchemy.orm import relationship, backref, Mapped, mapped_column
 from app.core.db import Base
 from app.domain.enums import TaskStatus, TaskSource, TaskPriority
@@ -121,6 +121,7 @@ class LocalAccount(Base):
     is_active = Column(Boolean, default=True)
     system_role = Column(String(20), nullable=False, default="user")  # admin / user
     timezone = Column(String(64), nullable=True)
+    last_seen_at = Column(DateTime, nullable=True)  # последнее действие в боте (пишется пачками)
     created_at = Column(DateTime, nullable=False, default=Clock.now)
     updated_at = Column(DateTime, nullable=False, default=Clock.now, onupdate=Clock.now)
 
@@ -337,10 +338,26 @@ class PushSubscription(Base):
     p256dh = Column(Text, nullable=False)
     auth = Column(Text, nullable=False)
     user_telegram_id = Column(BigInteger, nullable=True)
-    account_id = Column(Integer, nullable=True)
+    account_id = Column(Integer, nullable=True, index=True)
     created_at = Column(DateTime, nullable=False, default=Clock.now)
 
 
+class NotificationPref(Base):
+    """Настройки push-уведомлений аккаунта (раньше — JSON в app_settings.notif_prefs_{id}).
+
+    Нет строки — действуют значения по умолчанию (NOTIFICATION_DEFAULTS в push_service).
+    """
+    __tablename__ = "notification_prefs"
+
+    account_id = Column(Integer, primary_key=True)
+    assigned = Column(Boolean, nullable=False, default=True)
+    status_changed = Column(Boolean, nullable=False, default=True)
+    comments = Column(Boolean, nullable=False, default=False)
+    deadlines = Column(Boolean, nullable=False, default=True)
+    all_tasks = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, nullable=False, default=Clock.now, onupdate=Clock.now)
+
+
 class Sprint(Base):
     """Sprint/Iteration for task planning."""
     __tablename__ = "sprints"
@@ -449,6 +466,20 @@ class DeadlineNotification(Base):
     )
 
 
+class TaskReminder(Base):
+    """Отложенное напоминание /remind — хранится до отправки или отмены."""
+    __tablename__ = "task_reminders"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False, index=True)
+    chat_id = Column(BigInteger, nullable=False, index=True)  # куда слать
+    remind_at = Column(DateTime, nullable=False, index=True)  # UTC
+    created_by = Column(BigInteger, nullable=True)  # telegram_id автора
+    created_at = Column(DateTime, nullable=False, default=Clock.now)
+
+    task = relationship("Task")
+
+
 class BotHeartbeat(Base):
     """Heartbeat бота — пишется ботом, читается API. Одна запись с id=1."""
     __tablename__ = "bot_heartbeat"
@@ -457,6 +488,25 @@ class BotHeartbeat(Base):
     last_seen = Column(DateTime, nullable=False, default=Clock.now)
     username = Column(String(100), nullable=True)
     started_at = Column(DateTime, nullable=False, default=Clock.now)
+    send_queue = Column(Text, nullable=True)  # JSON: метрики очереди исходящих сообщений
+
+
+class TaskSnapshot(Base):
+    """Дневной срез задач по проекту и исполнителю — для трендов и дайджеста.
+
+    Пишется фоновым джобом бота (snapshot_service), строки дня перезаписываются целиком.
+    """
+    __tablename__ = "task_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)  # UTC
+    project_id = Column(Integer, nullable=True)
+    assignee_id = Column(Integer, nullable=True)
+    open_count = Column(Integer, nullable=False, default=0)  # не закрыты на конец дня
+    overdue_count = Column(Integer, nullable=False, default=0)  # из них с прошедшим дедлайном
+    created_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    cycle_secs = Column(Float, nullable=False, default=0.0)  # сумма created→completed по закрытым за день
 
 
 class AppSetting(Base):
@@ -480,6 +530,10 @@ class Webhook(Base):
     events = Column(Text, nullable=False)  # JSON array: ["task.created", "task.status_changed"]
     secret = Column(String(64), nullable=True)  # For HMAC signature
     is_active = Column(Boolean, default=True)
+    # Пакетный режим: события копятся до batch_window_sec секунд или batch_max_events
+    # штук и уходят одним JSON-массивом. NULL/0 — каждое событие отдельным запросом.
+    batch_window_sec = Column(Integer, nullable=True)
+    batch_max_events = Column(Integer, nullable=True)
     created_at = Column(DateTime, nullable=False, default=Clock.now)
     last_triggered_at = Column(DateTime, nullable=True)
 
@@ -505,6 +559,25 @@ class WebhookLog(Base):
         return f"<WebhookLog(id={self.id}, webhook_id={self.webhook_id}, event='{self.event}', status={self.status_code})>"
 
 
+class WebhookOutbox(Base):
+    """Очередь доставки вебхуков: строка на (вебхук, событие), пишется в транзакции изменения.
+
+    Доставленные строки удаляются (история — в webhook_logs), после
+    WEBHOOK_MAX_ATTEMPTS неудач строка остаётся со status="dead".
+    """
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    webhook_id = Column(Integer, ForeignKey("webhooks.id", ondelete="CASCADE"), nullable=False, index=True)
+    event = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON-тело ровно в том виде, в каком подписывается
+    status = Column(String(10), nullable=False, default="pending")  # pending | dead
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=Clock.now, index=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=Clock.now)
+
+
 class DomainEvent(Base):
     """Domain events log for audit trail."""
     __tablename__ = "domain_events"
@@ -519,6 +592,57 @@ class DomainEvent(Base):
         return f"<DomainEvent(id={self.id}, type='{self.event_type}', task_id={self.task_id})>"
 
 
+# --- Проекции domain_events (projection_service): read-модели, пересобираются реплеем ---
+
+class ProjectionCheckpoint(Base):
+    """Курсор проекции: id последнего применённого события."""
+    __tablename__ = "projection_checkpoints"
+
+    name = Column(String(50), primary_key=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=Clock.now, onupdate=Clock.now)
+
+
+class TaskActivity(Base):
+    """Лента активности задачи — готовые к показу строки из событий."""
+    __tablename__ = "task_activity"
+
+    event_id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    event_type = Column(String(50), nullable=False)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+
+class TaskStatusState(Base):
+    """Текущий статус задачи и момент входа в него (состояние проекции длительностей)."""
+    __tablename__ = "task_status_state"
+
+    task_id = Column(Integer, primary_key=True)
+    status = Column(String(20), nullable=False)
+    entered_at = Column(DateTime, nullable=False)
+
+
+class StatusDurationBucket(Base):
+    """Гистограмма времени в статусе: сколько раз задача провела в ``status`` время из корзины."""
+    __tablename__ = "status_duration_buckets"
+
+    status = Column(String(20), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # индекс в STATUS_DURATION_BUCKETS
+    count = Column(Integer, nullable=False, default=0)
+    total_secs = Column(Float, nullable=False, default=0.0)
+
+
+class UserThroughput(Base):
+    """Создано/закрыто задач за день по исполнителю (0 — без исполнителя)."""
+    __tablename__ = "user_throughput"
+
+    day = Column(Date, primary_key=True)  # UTC
+    assignee_id = Column(Integer, primary_key=True)
+    created_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+
+
 # ============= KNOWLEDGE BASE =============
 
 
@@ -4,7 +4,7 @@ import uvicorn
 from multiprocessing import Process
 from app.config import settings
 from app.core.logging import configure_logging, get_logger
-from app.core.db import init_db
+from app.core.db import init_db, engine
 from app.core.bootstrap import bootstrap_secret_key, bootstrap_vapid_keys, bootstrap_default_settings, backup_database
 from app.telegram.bot import run_bot
 
@@ -30,6 +30,9 @@ async def startup():
     # Set default settings in DB if not exist (for first-time setup)
     await bootstrap_default_settings()
 
+    # Закрываем соединения пула до fork: API и бот открывают свои
+    await engine.dispose()
+
 
 def run_api():
     """Run FastAPI server."""
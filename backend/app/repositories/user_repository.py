@@ -58,3 +58,29 @@ class UserRepository:
         self.session.add(identity)
         await self.session.flush()
         return account
+
+    async def create_or_update(
+        self,
+        telegram_id: int,
+        first_name: str,
+        username: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> LocalAccount:
+        """Аккаунт по Telegram: создать, если нет, иначе обновить имя и username, если они сменились.
+
+        display_name не трогаем — его могли задать в веб-интерфейсе.
+        """
+        account = await self.get_local_account_by_telegram_id(telegram_id)
+        if account is None:
+            return await self.create_local_account_from_telegram(
+                telegram_id=telegram_id,
+                first_name=first_name or "",
+                username=username,
+                last_name=last_name,
+            )
+        profile = {"first_name": first_name or "", "username": username, "last_name": last_name}
+        if any(getattr(account, field) != value for field, value in profile.items()):
+            for field, value in profile.items():
+                setattr(account, field, value)
+            await self.session.flush()
+        return account
@@ -0,0 +1,228 @@
+"""Живые обновления для веб-клиентов: журнал change_feed (триггеры) → SSE /api/stream."""
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.db import AsyncSessionLocal, schedule_write
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+STREAM_POLL_SECONDS = 0.5
+STREAM_BATCH = 500
+STREAM_QUEUE_SIZE = 1000  # событий в очереди клиента; переполнение → event: reset
+STREAM_RETENTION_MINUTES = 60  # столько можно переподключаться с Last-Event-ID
+STREAM_PRUNE_SECONDS = 600
+
+
+def _feed_triggers(table: str, entity: str, entity_id: str, project: str,
+                   task: str = "NULL", ops: tuple[str, ...] = ("insert", "update", "delete"),
+                   op: Optional[str] = None) -> list[str]:
+    """AFTER-триггеры ``table`` → строка change_feed; ``REF`` в выражениях — NEW или OLD."""
+    ddl = []
+    for kind in ops:
+        ref = "OLD" if kind == "delete" else "NEW"
+        row_id, row_project, row_task = (expr.replace("REF", ref) for expr in (entity_id, project, task))
+        ddl.append(f"""CREATE TRIGGER IF NOT EXISTS {table}_change_feed_a{kind[0]}
+            AFTER {kind.upper()} ON {table} BEGIN
+            INSERT INTO change_feed (entity, entity_id, op, project_id, task_id)
+            VALUES ('{entity}', {row_id}, '{op or kind}', {row_project}, {row_task});
+        END""")
+    return ddl
+
+
+# Журнал изменений задач, спринтов, встреч и комментариев из обоих процессов.
+# project_id NULL — событие видят все клиенты (встреча без проекта и т.п.).
+CHANGE_FEED_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS change_feed (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL,
+        entity_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        project_id INTEGER,
+        task_id INTEGER,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )""",
+    *_feed_triggers("tasks", "task", "REF.id", "REF.project_id", "REF.id"),
+    # Задача ушла в другой проект — клиенты старого проекта тоже должны её убрать
+    """CREATE TRIGGER IF NOT EXISTS tasks_change_feed_move
+        AFTER UPDATE OF project_id ON tasks WHEN OLD.project_id IS NOT NEW.project_id BEGIN
+        INSERT INTO change_feed (entity, entity_id, op, project_id, task_id)
+        VALUES ('task', NEW.id, 'update', OLD.project_id, NEW.id);
+    END""",
+    *_feed_triggers("sprints", "sprint", "REF.id", "REF.project_id"),
+    *_feed_triggers("sprint_tasks", "sprint", "REF.sprint_id",
+                    "(SELECT project_id FROM sprints WHERE id = REF.sprint_id)", "REF.task_id",
+                    ops=("insert", "delete"), op="update"),
+    *_feed_triggers("meetings", "meeting", "REF.id", "NULL"),
+    *_feed_triggers("meeting_projects", "meeting", "REF.meeting_id", "REF.project_id",
+                    ops=("insert", "delete"), op="update"),
+    *_feed_triggers("comments", "comment", "REF.id",
+                    "(SELECT project_id FROM tasks WHERE id = REF.task_id)", "REF.task_id"),
+    f"DELETE FROM change_feed WHERE created_at < datetime('now', '-{STREAM_RETENTION_MINUTES} minutes')",
+]
+
+
+async def ensure_change_feed(db) -> None:
+    """Создать change_feed + триггеры, удалить устаревшие строки (aiosqlite-соединение из миграций)."""
+    for ddl in CHANGE_FEED_SCHEMA:
+        await db.execute(ddl)
+
+
+@dataclass
+class Change:
+    id: int
+    entity: str
+    entity_id: int
+    op: str
+    project_id: Optional[int]
+    task_id: Optional[int]
+
+    def to_sse(self) -> str:
+        data = json.dumps({"op": self.op, "id": self.entity_id,
+                           "project_id": self.project_id, "task_id": self.task_id})
+        return f"id: {self.id}\nevent: {self.entity}\ndata: {data}\n\n"
+
+
+@dataclass(eq=False)
+class Subscriber:
+    projects: Optional[frozenset[int]]  # None — все проекты
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(STREAM_QUEUE_SIZE))
+    overflow: bool = False
+
+    def wants(self, change: Change) -> bool:
+        return self.projects is None or change.project_id is None or change.project_id in self.projects
+
+    def offer(self, change: Change) -> None:
+        if self.overflow or not self.wants(change):
+            return
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Клиент не успевает — дальше ему проще перечитать списки целиком
+            self.overflow = True
+
+
+class ChangeStream:
+    """Один поллер change_feed на процесс API, события раздаются подписчикам в памяти.
+
+    Пока подписчиков нет, журнал не читается. Чтение — по PK после курсора раз
+    в STREAM_POLL_SECONDS, один запрос на всех клиентов вместо опроса тяжёлых
+    списков каждым. Переподключение с Last-Event-ID досылает пропущенное из
+    журнала (он хранится STREAM_RETENTION_MINUTES).
+    """
+
+    def __init__(self):
+        self._subscribers: set[Subscriber] = set()
+        self._cursor: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # курсор двигает либо поллер, либо регистрация клиента
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._subscribers.clear()
+
+    async def _head(self) -> int:
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(text("SELECT coalesce(max(id), 0) FROM change_feed"))).scalar()
+
+    async def _read(self, after: int, until: Optional[int] = None) -> list[Change]:
+        query = ("SELECT id, entity, entity_id, op, project_id, task_id FROM change_feed "
+                 "WHERE id > :after" + (" AND id <= :until" if until is not None else "")
+                 + " ORDER BY id LIMIT :limit")
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(text(query), {"after": after, "until": until, "limit": STREAM_BATCH})).all()
+        return [Change(*row) for row in rows]
+
+    async def subscribe(self, projects: Optional[set[int]] = None,
+                        last_event_id: Optional[int] = None) -> tuple[Subscriber, list[Change], bool]:
+        """Зарегистрировать клиента: (подписчик, пропущенные события, нужен ли полный reset)."""
+        await self.start()
+        sub = Subscriber(frozenset(projects) if projects else None)
+        async with self._lock:
+            if self._cursor is None:
+                self._cursor = await self._head()
+            # Всё после until раздаст поллер, до него (после Last-Event-ID) — читаем здесь
+            until = self._cursor
+            self._subscribers.add(sub)
+        if last_event_id is None or last_event_id >= until:
+            return sub, [], False
+        try:
+            backlog, reset = await self._backlog(sub, last_event_id, until)
+        except BaseException:
+            self.unsubscribe(sub)  # отмена (клиент отключился) или ошибка БД — подписчик не нужен
+            raise
+        return sub, backlog, reset
+
+    async def _backlog(self, sub: Subscriber, last_event_id: int, until: int) -> tuple[list[Change], bool]:
+        """События после ``last_event_id`` до ``until`` для подписчика; True — нужен reset."""
+        async with AsyncSessionLocal() as db:
+            oldest = (await db.execute(text("SELECT min(id) FROM change_feed"))).scalar()
+        if oldest is None or oldest > last_event_id + 1:
+            # Last-Event-ID старше журнала — пропущенное не восстановить
+            return [], True
+        backlog: list[Change] = []
+        after = last_event_id
+        while after < until:
+            batch = await self._read(after, until)
+            if not batch:
+                break
+            backlog.extend(change for change in batch if sub.wants(change))
+            after = batch[-1].id
+            if len(backlog) > STREAM_QUEUE_SIZE:
+                return [], True
+        return backlog, False
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        pruned_at = loop.time()
+        while True:
+            try:
+                async with self._lock:
+                    if self._subscribers:
+                        await self._poll()
+                    else:
+                        self._cursor = None  # без клиентов журнал не читаем; курсор возьмём заново
+                if loop.time() - pruned_at >= STREAM_PRUNE_SECONDS:
+                    pruned_at = loop.time()
+                    schedule_write(_prune)
+            except Exception as e:
+                logger.error("change_stream_error", error=str(e))
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    async def _poll(self) -> int:
+        """Прочитать новые строки журнала и раздать подписчикам (под self._lock)."""
+        if self._cursor is None:
+            self._cursor = await self._head()
+        total = 0
+        while True:
+            changes = await self._read(self._cursor)
+            for change in changes:
+                for sub in self._subscribers:
+                    sub.offer(change)
+            if changes:
+                self._cursor = changes[-1].id
+            total += len(changes)
+            if len(changes) < STREAM_BATCH:
+                return total
+
+
+async def _prune(db):
+    await db.execute(text(
+        f"DELETE FROM change_feed WHERE created_at < datetime('now', '-{STREAM_RETENTION_MINUTES} minutes')"
+    ))
+
+
+change_stream = ChangeStream()
@@ -1,8 +1,11 @@
 """Digest service."""
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
+from sqlalchemy import select, func, case, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.domain.models import Task, Meeting
+from sqlalchemy.orm import aliased
+from app.core.clock import Clock
+from app.domain.models import Task, Meeting, Project, LocalAccount, Comment, Sprint, SprintTask
 from app.domain.enums import TaskStatus, TaskPriority
 from app.repositories.task_repository import TaskRepository
 from app.repositories.meeting_repository import MeetingRepository
@@ -17,6 +20,31 @@ PRIORITY_EMOJI = {
     TaskPriority.LOW.value:    "⚪",
 }
 
+TERMINAL = (TaskStatus.DONE.value, TaskStatus.ON_HOLD.value)
+ACTIVE = (TaskStatus.TODO.value, TaskStatus.DOING.value, TaskStatus.BLOCKED.value)
+STATUSES = {
+    "todo": TaskStatus.TODO.value,
+    "doing": TaskStatus.DOING.value,
+    "done": TaskStatus.DONE.value,
+    "blocked": TaskStatus.BLOCKED.value,
+    "on_hold": TaskStatus.ON_HOLD.value,
+}
+PRIORITIES = {
+    "urgent": TaskPriority.URGENT.value,
+    "high": TaskPriority.HIGH.value,
+    "normal": TaskPriority.NORMAL.value,
+    "low": TaskPriority.LOW.value,
+}
+
+
+def _count(cond):
+    return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+
+def _days(secs: float, n: int) -> Optional[float]:
+    return round(secs / n / 86400, 1) if n else None
+
+
 class DigestService:
     """Service for generating digests."""
 
@@ -177,3 +205,283 @@ class DigestService:
             message += f"    📅 Просрочено на {days_overdue} дн.\n"
         
         return message
+
+    # ============= /api/digest: агрегаты в SQL =============
+
+    async def get_digest_data(self) -> dict:
+        """Данные для страницы дайджеста по всем задачам (не архив, не удалённые)."""
+        today = datetime.combine(Clock.now().date(), datetime.min.time())
+        # Границы по дате: due_date.date() < today / today <= due_date.date() <= today + 7
+        ctx = {"today": today, "soon_end": today + timedelta(days=8)}
+        buckets = await self._buckets(ctx)
+        stats = self._fold(buckets)
+        stats["priority"] = {name: 0 for name in PRIORITIES}
+        for b in buckets:
+            if not b["backlog"] and b["status"] in ACTIVE:
+                for name, value in PRIORITIES.items():
+                    if b["priority"] == value:
+                        stats["priority"][name] += b["n"]
+
+        return {
+            "stats": stats,
+            "projects": await self._projects(buckets),
+            "top_performers": await self._performers(),
+            "overdue_tasks": await self._deadline_list(self._overdue(ctx), 10),
+            "due_soon_tasks": await self._deadline_list(self._due_soon(ctx), 10),
+            "subtask_progress": await self._subtask_progress(),
+            "comment_activity": await self._comment_activity(),
+            "sprint_progress": await self._sprint_progress(),
+        }
+
+    # --- фильтры ---
+
+    @staticmethod
+    def _base(t=Task):
+        return and_(t.archived == False, t.deleted == False)  # noqa: E712
+
+    @staticmethod
+    def _live(t=Task):
+        # Как /api/tasks: не архив, не удалённые, не бэклог
+        return and_(DigestService._base(t), t.backlog == False)  # noqa: E712
+
+    @staticmethod
+    def _overdue(ctx: dict):
+        return and_(
+            Task.backlog == False,  # noqa: E712
+            Task.due_date < ctx["today"],
+            Task.status.notin_(TERMINAL),
+        )
+
+    @staticmethod
+    def _due_soon(ctx: dict):
+        return and_(
+            Task.backlog == False,  # noqa: E712
+            Task.due_date >= ctx["today"],
+            Task.due_date < ctx["soon_end"],
+            Task.status.notin_(TERMINAL),
+        )
+
+    # --- запросы ---
+
+    async def _buckets(self, ctx: dict) -> list[dict]:
+        """Один GROUP BY (проект, приоритет, статус, бэклог) по ix_tasks_digest — без
+        сортировки; верхний уровень и дедлайны считаются условными суммами.
+        Из этих нескольких сотен строк складываются все разбивки."""
+        top = Task.parent_task_id.is_(None)
+        overdue = Task.due_date < ctx["today"]
+        due_soon = and_(Task.due_date >= ctx["today"], Task.due_date < ctx["soon_end"])
+        done_secs = case(
+            (and_(Task.status == TaskStatus.DONE.value, Task.completed_at.isnot(None)),
+             (func.julianday(Task.completed_at) - func.julianday(Task.created_at)) * 86400),
+        )
+        top_done_secs = case((top, done_secs))
+
+        def total(expr):
+            return func.coalesce(func.sum(expr), 0)
+
+        result = await self.session.execute(
+            select(
+                Task.project_id, Task.priority, Task.status, Task.backlog,
+                func.count().label("n"),
+                _count(overdue).label("overdue"),
+                _count(due_soon).label("due_soon"),
+                total(done_secs).label("done_secs"),
+                func.count(done_secs).label("done_n"),
+                _count(top).label("top_n"),
+                _count(and_(top, overdue)).label("top_overdue"),
+                _count(and_(top, due_soon)).label("top_due_soon"),
+                total(top_done_secs).label("top_done_secs"),
+                func.count(top_done_secs).label("top_done_n"),
+            )
+            .where(self._base())
+            .group_by(Task.project_id, Task.priority, Task.status, Task.backlog)
+        )
+        return [dict(row._mapping) for row in result]
+
+    @staticmethod
+    def _fold(buckets: list[dict], prefix: str = "") -> dict:
+        """Сложить строки _buckets; ``prefix="top_"`` — только задачи верхнего уровня."""
+        out = {k: 0 for k in ["total", "active", *STATUSES, "overdue", "due_soon", "backlog"]}
+        done_secs, done_n = 0.0, 0
+        for b in buckets:
+            n = b[prefix + "n"]
+            if b["backlog"]:
+                out["backlog"] += n
+                continue
+            out["total"] += n
+            for key, value in STATUSES.items():
+                if b["status"] == value:
+                    out[key] += n
+            if b["status"] in ACTIVE:
+                out["active"] += n
+            if b["status"] not in TERMINAL:
+                out["overdue"] += b[prefix + "overdue"]
+                out["due_soon"] += b[prefix + "due_soon"]
+            done_secs += b[prefix + "done_secs"]
+            done_n += b[prefix + "done_n"]
+        out["avg_completion_days"] = _days(done_secs, done_n)
+        return out
+
+    async def _projects(self, buckets: list[dict]) -> list[dict]:
+        """Статистика по проектам — только задачи верхнего уровня."""
+        by_project: dict = {}
+        for b in buckets:
+            if b["top_n"]:
+                by_project.setdefault(b["project_id"], []).append(b)
+
+        result = await self.session.execute(
+            select(Project.id, Project.name, Project.emoji)
+            .where(Project.is_active == True, Project.deleted == False)  # noqa: E712
+        )
+        project_stats = []
+        for proj_id, name, emoji in result:
+            if proj_id in by_project:
+                project_stats.append(
+                    {"id": proj_id, "name": name, "emoji": emoji or "📁", **self._fold(by_project[proj_id], "top_")}
+                )
+        if None in by_project:
+            project_stats.append(
+                {"id": None, "name": "Без проекта", "emoji": "📋", **self._fold(by_project[None], "top_")}
+            )
+
+        # Топ активных проектов (#88) — по числу активных задач
+        project_stats.sort(key=lambda p: (-p["active"], -p["total"]))
+        return project_stats
+
+    async def _deadline_list(self, cond, limit: int) -> list[dict]:
+        result = await self.session.execute(
+            select(Task.id, Task.title, Task.due_date, Task.priority, Task.status, Task.project_id)
+            .where(self._base(), cond)
+            .order_by(Task.due_date, Task.id)
+            .limit(limit)
+        )
+        return [
+            {
+                "id": r.id,
+                "title": r.title,
+                "due_date": r.due_date.isoformat() if r.due_date else None,
+                "priority": r.priority,
+                "status": r.status,
+                "project_id": r.project_id,
+            }
+            for r in result
+        ]
+
+    async def _subtask_progress(self) -> list[dict]:
+        """Прогресс подзадач (#89) у незакрытых родителей."""
+        parent = aliased(Task)
+        total = func.count(Task.id)
+        done = _count(Task.status == TaskStatus.DONE.value)
+        result = await self.session.execute(
+            select(parent.id, parent.title, parent.project_id, total.label("total"), done.label("done"))
+            .join(parent, parent.id == Task.parent_task_id)
+            .where(self._live(), self._live(parent), parent.status != TaskStatus.DONE.value)
+            .group_by(parent.id)
+            .order_by(total.desc(), (done * 1.0 / total).desc(), parent.id)
+            .limit(15)
+        )
+        return [
+            {
+                "id": r.id,
+                "title": r.title,
+                "project_id": r.project_id,
+                "done": r.done,
+                "total": r.total,
+                "pct": round(r.done / r.total * 100) if r.total else 0,
+            }
+            for r in result
+        ]
+
+    async def _performers(self) -> list[dict]:
+        """Топ исполнителей по числу выполненных задач."""
+        is_done = Task.status == TaskStatus.DONE.value
+        done_secs = case(
+            (and_(is_done, Task.completed_at.isnot(None)),
+             (func.julianday(Task.completed_at) - func.julianday(Task.created_at)) * 86400),
+        )
+        completed = _count(is_done)
+        result = await self.session.execute(
+            select(
+                Task.assignee_id,
+                completed.label("completed"),
+                func.count(Task.id).label("total"),
+                _count(and_(is_done, Task.due_date.isnot(None))).label("with_deadline"),
+                _count(and_(
+                    is_done,
+                    Task.due_date.isnot(None),
+                    func.coalesce(Task.completed_at, Task.updated_at) <= Task.due_date,
+                )).label("on_time"),
+                func.coalesce(func.sum(done_secs), 0).label("done_secs"),
+                func.count(done_secs).label("done_n"),
+            )
+            .where(self._live(), Task.assignee_id.isnot(None))
+            .group_by(Task.assignee_id)
+            .order_by(completed.desc(), Task.assignee_id)
+            .limit(10)
+        )
+        rows = result.all()
+        if not rows:
+            return []
+        accounts = await self.session.execute(
+            select(LocalAccount).where(LocalAccount.id.in_([r.assignee_id for r in rows]))
+        )
+        names = {a.id: a.display for a in accounts.scalars()}
+        return [
+            {
+                "name": names.get(r.assignee_id, f"User #{r.assignee_id}"),
+                "completed": r.completed,
+                "total": r.total,
+                "on_time": r.on_time,
+                "with_deadline": r.with_deadline,
+                "avg_days": _days(r.done_secs, r.done_n),
+            }
+            for r in rows
+        ]
+
+    async def _comment_activity(self) -> dict:
+        """Активность комментариев за неделю (#90)."""
+        name = func.coalesce(Comment.author_name, "Аноним")
+        n = func.count(Comment.id)
+        result = await self.session.execute(
+            select(name.label("name"), n.label("count"))
+            .where(Comment.created_at >= Clock.now() - timedelta(days=7))
+            .group_by(name)
+            .order_by(n.desc(), name)
+        )
+        by_author = [{"name": r.name, "count": r.count} for r in result]
+        return {"total": sum(a["count"] for a in by_author), "by_author": by_author}
+
+    async def _sprint_progress(self) -> list[dict]:
+        """Прогресс активных спринтов (#91): один GROUP BY по sprint_tasks."""
+        sprints = (await self.session.execute(
+            select(Sprint.id, Sprint.name)
+            .where(Sprint.status == "active", Sprint.is_deleted == False)  # noqa: E712
+            .order_by(Sprint.position)
+        )).all()
+        if not sprints:
+            return []
+        keys = ["done", "doing", "todo", "blocked"]
+        result = await self.session.execute(
+            select(
+                SprintTask.sprint_id,
+                func.count(Task.id).label("total"),
+                *[_count(Task.status == STATUSES[k]).label(k) for k in keys],
+            )
+            .join(Task, Task.id == SprintTask.task_id)
+            .where(SprintTask.sprint_id.in_([s.id for s in sprints]), self._live())
+            .group_by(SprintTask.sprint_id)
+        )
+        counts = {r.sprint_id: r for r in result}
+        progress = []
+        for sp in sprints:
+            r = counts.get(sp.id)
+            total = r.total if r else 0
+            done = r.done if r else 0
+            progress.append({
+                "id": sp.id,
+                "name": sp.name,
+                "total": total,
+                **{k: (getattr(r, k) if r else 0) for k in keys},
+                "pct": round(done / total * 100) if total else 0,
+            })
+        return progress
@@ -0,0 +1,69 @@
+"""Склейка уведомлений: события за окно копятся по получателю и уходят одним сообщением."""
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+MAX_LISTED = 5  # строк в сводке «N задач обновлено»; остальное — «и ещё K»
+
+
+@dataclass
+class Notification:
+    title: str
+    body: str
+    url: str = "/"
+    summary: Optional[str] = None  # строка для сводки; по умолчанию — title
+
+
+def summarize(items: list[Notification], title: str = "Обновлено задач: {n}") -> Notification:
+    """Одно уведомление — как есть, несколько — сводка со списком первых MAX_LISTED."""
+    if len(items) == 1:
+        return items[0]
+    lines = [item.summary or item.title for item in items[:MAX_LISTED]]
+    if len(items) > MAX_LISTED:
+        lines.append(f"и ещё {len(items) - MAX_LISTED}")
+    return Notification(title=title.format(n=len(items)), body="\n".join(lines), url="/")
+
+
+class NotificationAggregator:
+    """Буфер получатель → [Notification] с одним окном на весь буфер.
+
+    Первое событие после сброса запускает таймер на ``window`` секунд; всё, что
+    пришло за окно, отдаётся в ``send(batches)`` одним вызовом — так отправитель
+    может разослать одинаковые сводки разным получателям одним запросом.
+    """
+
+    def __init__(self, window: float,
+                 send: Callable[[dict[Hashable, list[Notification]]], Awaitable[None]]):
+        self.window = window
+        self._send = send
+        self._buffer: dict[Hashable, list[Notification]] = defaultdict(list)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set[asyncio.Task] = set()
+
+    def add(self, recipient: Hashable, item: Notification) -> None:
+        self._buffer[recipient].append(item)
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._on_timer)
+
+    def _on_timer(self) -> None:
+        task = asyncio.create_task(self.flush())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def flush(self) -> None:
+        """Отправить накопленное сейчас (по таймеру или при остановке процесса)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batches, self._buffer = dict(self._buffer), defaultdict(list)
+        if not batches:
+            return
+        try:
+            await self._send(batches)
+        except Exception as e:
+            logger.error("notification_flush_error", recipients=len(batches), error=str(e))
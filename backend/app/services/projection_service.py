@@ -0,0 +1,388 @@
+"""Проекции domain_events: read-модели, которые ведутся по курсору журнала и пересобираются реплеем."""
+import asyncio
+import bisect
+import json
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.clock import Clock
+from app.core.db import run_write
+from app.core.logging import get_logger
+from app.domain.enums import TaskStatus
+from app.domain.models import (
+    DomainEvent,
+    ProjectionCheckpoint,
+    StatusDurationBucket,
+    Task,
+    TaskActivity,
+    TaskStatusState,
+    UserThroughput,
+)
+
+logger = get_logger(__name__)
+
+PROJECTION_BATCH = 500  # событий за одну транзакцию записи
+PROJECTION_POLL_SECONDS = 5
+# Верхние границы корзин гистограммы длительностей, в часах; последняя — «больше месяца»
+STATUS_DURATION_BUCKETS = [1, 4, 24, 72, 168, 720]
+
+PROJECTION_SCHEMA = [
+    "CREATE INDEX IF NOT EXISTS ix_domain_events_task_id ON domain_events (task_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_domain_events_created_at ON domain_events (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_task_activity_task_id ON task_activity (task_id, event_id)",
+]
+
+
+async def ensure_projections(db) -> None:
+    """Индексы журнала и read-моделей (aiosqlite-соединение из миграций)."""
+    for ddl in PROJECTION_SCHEMA:
+        await db.execute(ddl)
+
+
+@dataclass
+class Event:
+    id: int
+    event_type: str
+    payload: dict[str, Any]
+    task_id: Optional[int]
+    created_at: datetime
+
+
+def duration_bucket(seconds: float) -> int:
+    """Индекс корзины STATUS_DURATION_BUCKETS для длительности в секундах."""
+    return bisect.bisect_left(STATUS_DURATION_BUCKETS, seconds / 3600)
+
+
+def bucket_label(bucket: int) -> str:
+    if bucket >= len(STATUS_DURATION_BUCKETS):
+        return f">{STATUS_DURATION_BUCKETS[-1]}h"
+    low = STATUS_DURATION_BUCKETS[bucket - 1] if bucket else 0
+    return f"{low}-{STATUS_DURATION_BUCKETS[bucket]}h"
+
+
+class Projection:
+    """Проекция: ``apply`` получает события по возрастанию id в транзакции записи.
+
+    Изменения read-модели и сдвиг курсора коммитятся вместе, поэтому событие
+    применяется ровно один раз. ``tables`` очищаются при пересборке.
+    """
+
+    name: str = ""
+    tables: tuple = ()
+
+    async def apply(self, db: AsyncSession, events: list[Event]) -> None:
+        raise NotImplementedError
+
+    async def reset(self, db: AsyncSession) -> None:
+        for model in self.tables:
+            await db.execute(delete(model))
+
+
+class TaskActivityProjection(Projection):
+    """Лента активности задачи: строка на событие с task_id."""
+
+    name = "task_activity"
+    tables = (TaskActivity,)
+
+    @staticmethod
+    def describe(event: Event) -> str:
+        payload = event.payload
+        if event.event_type == "task.created":
+            return f"Создана: {payload.get('title', '')}".strip()
+        if event.event_type == "task.status_changed":
+            return f"{payload.get('old_status')} → {payload.get('new_status')}"
+        return event.event_type
+
+    async def apply(self, db, events):
+        rows = [
+            {"event_id": e.id, "task_id": e.task_id, "event_type": e.event_type,
+             "text": self.describe(e), "created_at": e.created_at}
+            for e in events if e.task_id is not None
+        ]
+        if rows:
+            await db.execute(insert(TaskActivity).on_conflict_do_nothing(), rows)
+
+
+class StatusDurationProjection(Projection):
+    """Гистограмма времени, проведённого задачами в каждом статусе.
+
+    Состояние — task_status_state (текущий статус и момент входа); при смене
+    статуса отрезок «вход → смена» попадает в корзину старого статуса.
+    """
+
+    name = "status_durations"
+    tables = (TaskStatusState, StatusDurationBucket)
+
+    async def apply(self, db, events):
+        events = [e for e in events if e.task_id is not None
+                  and e.event_type in ("task.created", "task.status_changed")]
+        if not events:
+            return
+        task_ids = {e.task_id for e in events}
+        state = {
+            row.task_id: (row.status, row.entered_at)
+            for row in await db.execute(
+                select(TaskStatusState.task_id, TaskStatusState.status, TaskStatusState.entered_at)
+                .where(TaskStatusState.task_id.in_(task_ids))
+            )
+        }
+        hist: dict[tuple[str, int], list] = defaultdict(lambda: [0, 0.0])
+        for e in events:
+            if e.event_type == "task.created":
+                state[e.task_id] = (TaskStatus.TODO.value, e.created_at)
+                continue
+            current = state.get(e.task_id)
+            if current:
+                secs = max((e.created_at - current[1]).total_seconds(), 0.0)
+                cell = hist[(current[0], duration_bucket(secs))]
+                cell[0] += 1
+                cell[1] += secs
+            state[e.task_id] = (e.payload.get("new_status"), e.created_at)
+
+        stmt = insert(TaskStatusState)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["task_id"],
+                set_={"status": stmt.excluded.status, "entered_at": stmt.excluded.entered_at},
+            ),
+            [{"task_id": task_id, "status": s, "entered_at": at}
+             for task_id, (s, at) in state.items() if task_id in task_ids],
+        )
+        if hist:
+            stmt = insert(StatusDurationBucket)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["status", "bucket"],
+                    set_={"count": StatusDurationBucket.count + stmt.excluded.count,
+                          "total_secs": StatusDurationBucket.total_secs + stmt.excluded.total_secs},
+                ),
+                [{"status": s, "bucket": b, "count": n, "total_secs": secs}
+                 for (s, b), (n, secs) in hist.items()],
+            )
+
+
+class UserThroughputProjection(Projection):
+    """Создано и закрыто задач за день по исполнителю.
+
+    Исполнитель берётся из payload события; в старых событиях его нет —
+    тогда текущий исполнитель задачи.
+    """
+
+    name = "user_throughput"
+    tables = (UserThroughput,)
+
+    async def apply(self, db, events):
+        counted = []
+        for e in events:
+            if e.event_type == "task.created":
+                counted.append((e, "created_count"))
+            elif e.event_type == "task.status_changed" and e.payload.get("new_status") == TaskStatus.DONE.value:
+                counted.append((e, "completed_count"))
+        if not counted:
+            return
+        missing = {e.task_id for e, _ in counted if "assignee_id" not in e.payload and e.task_id}
+        assignees = {}
+        if missing:
+            assignees = dict((await db.execute(
+                select(Task.id, Task.assignee_id).where(Task.id.in_(missing))
+            )).all())
+
+        totals: dict[tuple, dict[str, int]] = defaultdict(lambda: {"created_count": 0, "completed_count": 0})
+        for e, column in counted:
+            assignee = e.payload["assignee_id"] if "assignee_id" in e.payload else assignees.get(e.task_id)
+            totals[(e.created_at.date(), assignee or 0)][column] += 1
+
+        stmt = insert(UserThroughput)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["day", "assignee_id"],
+                set_={"created_count": UserThroughput.created_count + stmt.excluded.created_count,
+                      "completed_count": UserThroughput.completed_count + stmt.excluded.completed_count},
+            ),
+            [{"day": day, "assignee_id": assignee, **counts} for (day, assignee), counts in totals.items()],
+        )
+
+
+class ProjectionRunner:
+    """Догоняет журнал domain_events для набора проекций.
+
+    Шаг — одна транзакция через очередь записи: читаются курсоры, одна пачка
+    событий после минимального из них, каждая проекция применяет свою часть, и
+    курсоры сдвигаются в том же commit. Под BEGIN IMMEDIATE шаги из разных
+    процессов (бот и пересборка из API) не пересекаются. В SQLite id событий
+    растут в порядке commit (писатель один), поэтому курсор по id ничего не пропускает.
+    """
+
+    def __init__(self, projections: list[Projection], batch: int = PROJECTION_BATCH):
+        self.projections = {p.name: p for p in projections}
+        self.batch = batch
+
+    async def step(self) -> int:
+        """Применить одну пачку; возвращает число прочитанных событий (0 — журнал догнан)."""
+        names = list(self.projections)
+
+        async def _write(db):
+            await db.execute(
+                insert(ProjectionCheckpoint).on_conflict_do_nothing(),
+                [{"name": name, "last_event_id": 0, "updated_at": Clock.now()} for name in names],
+            )
+            cursors = dict((await db.execute(
+                select(ProjectionCheckpoint.name, ProjectionCheckpoint.last_event_id)
+                .where(ProjectionCheckpoint.name.in_(names))
+            )).all())
+            rows = (await db.execute(
+                select(DomainEvent.id, DomainEvent.event_type, DomainEvent.payload,
+                       DomainEvent.task_id, DomainEvent.created_at)
+                .where(DomainEvent.id > min(cursors.values()))
+                .order_by(DomainEvent.id)
+                .limit(self.batch)
+            )).all()
+            if not rows:
+                return 0
+            events = [
+                Event(row.id, row.event_type, json.loads(row.payload) if row.payload else {},
+                      row.task_id, row.created_at)
+                for row in rows
+            ]
+            head = events[-1].id
+            for name, projection in self.projections.items():
+                pending = [e for e in events if e.id > cursors[name]]
+                if not pending:
+                    continue
+                await projection.apply(db, pending)
+                await db.execute(
+                    update(ProjectionCheckpoint)
+                    .where(ProjectionCheckpoint.name == name)
+                    .values(last_event_id=head, updated_at=Clock.now())
+                )
+            return len(events)
+
+        return await run_write(_write)
+
+    async def catch_up(self) -> int:
+        """Применить всё, что накопилось в журнале."""
+        total = 0
+        while True:
+            applied = await self.step()
+            total += applied
+            if applied < self.batch:
+                return total
+
+    async def rebuild(self, names: Optional[list[str]] = None) -> None:
+        """Очистить read-модели и обнулить курсоры; следующий catch_up проиграет журнал заново."""
+        names = names or list(self.projections)
+        unknown = set(names) - set(self.projections)
+        if unknown:
+            raise ValueError(f"Unknown projections: {sorted(unknown)}")
+
+        async def _write(db):
+            for name in names:
+                await self.projections[name].reset(db)
+            await db.execute(
+                update(ProjectionCheckpoint)
+                .where(ProjectionCheckpoint.name.in_(names))
+                .values(last_event_id=0, updated_at=Clock.now())
+            )
+
+        await run_write(_write)
+        logger.info("projections_reset", projections=names)
+
+    async def status(self, db: AsyncSession) -> list[dict]:
+        """Курсор и отставание каждой проекции от головы журнала."""
+        head = (await db.execute(select(func.max(DomainEvent.id)))).scalar() or 0
+        cursors = {
+            row.name: row for row in (await db.execute(
+                select(ProjectionCheckpoint).where(ProjectionCheckpoint.name.in_(self.projections))
+            )).scalars()
+        }
+        result = []
+        for name in self.projections:
+            row = cursors.get(name)
+            last = row.last_event_id if row else 0
+            result.append({
+                "name": name,
+                "last_event_id": last,
+                "lag": head - last,
+                "updated_at": row.updated_at.isoformat() if row and row.updated_at else None,
+            })
+        return result
+
+
+projection_runner = ProjectionRunner([
+    TaskActivityProjection(),
+    StatusDurationProjection(),
+    UserThroughputProjection(),
+])
+
+
+class ProjectionQueries:
+    """Чтение read-моделей для API."""
+
+    @staticmethod
+    async def task_activity(db: AsyncSession, task_id: int, limit: int = 50) -> list[dict]:
+        result = await db.execute(
+            select(TaskActivity)
+            .where(TaskActivity.task_id == task_id)
+            .order_by(TaskActivity.event_id.desc())
+            .limit(limit)
+        )
+        return [
+            {"event_id": row.event_id, "event_type": row.event_type, "text": row.text,
+             "created_at": row.created_at.isoformat()}
+            for row in result.scalars()
+        ]
+
+    @staticmethod
+    async def status_durations(db: AsyncSession) -> list[dict]:
+        """По статусу: корзины гистограммы, число отрезков и среднее время в часах."""
+        rows = (await db.execute(
+            select(StatusDurationBucket).order_by(StatusDurationBucket.status, StatusDurationBucket.bucket)
+        )).scalars().all()
+        by_status: dict[str, dict] = {}
+        for row in rows:
+            entry = by_status.setdefault(row.status, {"status": row.status, "count": 0,
+                                                      "total_secs": 0.0, "buckets": []})
+            entry["count"] += row.count
+            entry["total_secs"] += row.total_secs
+            entry["buckets"].append({"bucket": bucket_label(row.bucket), "count": row.count})
+        return [
+            {"status": e["status"], "count": e["count"],
+             "avg_hours": round(e["total_secs"] / e["count"] / 3600, 2) if e["count"] else 0.0,
+             "buckets": e["buckets"]}
+            for e in by_status.values()
+        ]
+
+    @staticmethod
+    async def throughput(db: AsyncSession, days: int = 30, assignee_id: Optional[int] = None) -> list[dict]:
+        """Создано/закрыто по дням и исполнителям за последние ``days`` дней."""
+        since = Clock.now().date() - timedelta(days=max(1, days) - 1)
+        query = (
+            select(UserThroughput)
+            .where(UserThroughput.day >= since)
+            .order_by(UserThroughput.day, UserThroughput.assignee_id)
+        )
+        if assignee_id is not None:
+            query = query.where(UserThroughput.assignee_id == assignee_id)
+        return [
+            {"day": row.day.isoformat(), "assignee_id": row.assignee_id or None,
+             "created": row.created_count, "completed": row.completed_count}
+            for row in (await db.execute(query)).scalars()
+        ]
+
+
+async def run_projection_job():
+    """Фоновый цикл в процессе бота: догонять журнал раз в PROJECTION_POLL_SECONDS."""
+    while True:
+        try:
+            applied = await projection_runner.catch_up()
+            if applied:
+                logger.info("projections_applied", events=applied)
+        except Exception as e:
+            logger.error("projections_error", error=str(e))
+        await asyncio.sleep(PROJECTION_POLL_SECONDS)
@@ -0,0 +1,266 @@
+"""Web Push: кэш VAPID, настройки уведомлений (notification_prefs), отправка через свой пул."""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from py_vapid import Vapid
+from pywebpush import WebPusher
+from sqlalchemy import select, delete, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.db import AsyncSessionLocal, run_write
+from app.core.logging import get_logger
+from app.domain.models import NotificationPref, PushSubscription
+from app.services.vapid_service import (
+    get_vapid_private_key,
+    get_vapid_claims_email,
+    set_vapid_keys,
+    generate_vapid_keys,
+)
+
+logger = get_logger(__name__)
+
+NOTIFICATION_DEFAULTS = {
+    "assigned": True,
+    "status_changed": True,
+    "comments": False,
+    "deadlines": True,
+    "all_tasks": False,
+}
+PUSH_TTL_SECONDS = 3600
+PUSH_REQUEST_TIMEOUT_SECONDS = 10
+VAPID_JWT_TTL_SECONDS = 12 * 3600  # push-сервисы принимают exp не дальше 24ч
+VAPID_JWT_REFRESH_SECONDS = 3600
+
+# Перенос старых JSON-настроек из app_settings (повторный запуск ничего не меняет)
+NOTIFICATION_PREFS_SCHEMA = [
+    "CREATE INDEX IF NOT EXISTS ix_push_subscriptions_account_id ON push_subscriptions (account_id)",
+    f"""INSERT OR IGNORE INTO notification_prefs
+        (account_id, {", ".join(NOTIFICATION_DEFAULTS)}, updated_at)
+    SELECT CAST(substr(key, 13) AS INTEGER),
+        {", ".join(
+            f"coalesce(json_extract(value, '$.{name}'), {int(default)})"
+            for name, default in NOTIFICATION_DEFAULTS.items()
+        )},
+        datetime('now')
+    FROM app_settings
+    WHERE key LIKE 'notif\\_prefs\\_%' ESCAPE '\\' AND json_valid(value)""",
+]
+
+
+def pref_enabled(pref: str):
+    """Условие «настройка включена» для запросов с LEFT JOIN notification_prefs."""
+    enabled = getattr(NotificationPref, pref).is_(True)
+    if NOTIFICATION_DEFAULTS[pref]:
+        enabled = or_(NotificationPref.account_id.is_(None), enabled)
+    return enabled
+
+
+async def ensure_notification_prefs(db) -> None:
+    """Индекс подписок по аккаунту + перенос notif_prefs_* (aiosqlite-соединение из миграций)."""
+    for ddl in NOTIFICATION_PREFS_SCHEMA:
+        await db.execute(ddl)
+
+
+class NotificationPrefsService:
+
+    @staticmethod
+    async def get(db: AsyncSession, account_id: int) -> dict[str, bool]:
+        prefs = await db.get(NotificationPref, account_id)
+        if not prefs:
+            return dict(NOTIFICATION_DEFAULTS)
+        return {name: bool(getattr(prefs, name)) for name in NOTIFICATION_DEFAULTS}
+
+    @staticmethod
+    async def set(db: AsyncSession, account_id: int, values: dict[str, Any]) -> dict[str, bool]:
+        """Сохранить настройки (commit делает вызывающий); отсутствующие ключи — по умолчанию."""
+        prefs = {name: bool(values.get(name, default)) for name, default in NOTIFICATION_DEFAULTS.items()}
+        row = await db.get(NotificationPref, account_id)
+        if row:
+            for name, value in prefs.items():
+                setattr(row, name, value)
+        else:
+            db.add(NotificationPref(account_id=account_id, **prefs))
+        await db.flush()
+        return prefs
+
+
+class PushDispatcher:
+    """Асинхронная отправка Web Push с ключами VAPID в памяти процесса.
+
+    Получатели выбираются одним запросом: подписки LEFT JOIN notification_prefs
+    с фильтром по нужной настройке. Запросы идут через одну aiohttp-сессию с
+    keep-alive — соединения с push-сервисом (FCM, Mozilla, Apple) живут между
+    рассылками. VAPID JWT подписывается раз на origin и
+    живёт до истечения; шифрование aes128gcm — в своём пуле из
+    PUSH_ENCRYPT_WORKERS потоков, одновременных отправок не больше PUSH_SENDERS.
+    """
+
+    def __init__(self, senders: int, encrypt_workers: int):
+        self.senders = senders
+        self.encrypt_workers = encrypt_workers
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._vapid: Optional[tuple[Vapid, str]] = None
+        self._vapid_lock = asyncio.Lock()
+        self._jwt: dict[str, tuple[dict[str, str], float]] = {}  # origin → (заголовок, exp)
+
+    def invalidate(self) -> None:
+        """Сбросить кэш ключей и JWT (после смены ключей или email в настройках)."""
+        self._vapid = None
+        self._jwt.clear()
+
+    async def close(self) -> None:
+        if self._session:
+            await self._session.close()
+            self._session = None
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+    def _ensure_transport(self) -> None:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.senders),
+                timeout=aiohttp.ClientTimeout(total=PUSH_REQUEST_TIMEOUT_SECONDS),
+            )
+            self._executor = ThreadPoolExecutor(max_workers=self.encrypt_workers,
+                                                thread_name_prefix="webpush")
+            self._slots = asyncio.Semaphore(self.senders)
+
+    async def _keys(self) -> tuple[Vapid, str]:
+        """(ключ VAPID, claims email); ключи создаются при первом обращении, если их нет."""
+        if self._vapid is None:
+            async with self._vapid_lock:
+                if self._vapid is None:
+                    async with AsyncSessionLocal() as db:
+                        private_key = await get_vapid_private_key(db)
+                        if not private_key:
+                            logger.info("push_vapid_keys_generated")
+                            private_key, public_key = generate_vapid_keys()
+                            await set_vapid_keys(db, private_key, public_key)
+                        email = await get_vapid_claims_email(db)
+                    self._vapid = (Vapid.from_string(private_key=private_key), email)
+        return self._vapid
+
+    def _authorization(self, endpoint: str, key: Vapid, email: str) -> dict[str, str]:
+        """VAPID-заголовок для origin push-сервиса; переподписывается за час до exp."""
+        url = urlparse(endpoint)
+        aud = f"{url.scheme}://{url.netloc}"
+        now = time.time()
+        cached = self._jwt.get(aud)
+        if cached and cached[1] - VAPID_JWT_REFRESH_SECONDS > now:
+            return cached[0]
+        exp = int(now) + VAPID_JWT_TTL_SECONDS
+        headers = key.sign({"sub": f"mailto:{email}", "aud": aud, "exp": exp})
+        self._jwt[aud] = (headers, exp)
+        return headers
+
+    @staticmethod
+    def _filter(query, pref: Optional[str], account_ids: Optional[list[int]] = None):
+        query = (
+            query.outerjoin(NotificationPref, NotificationPref.account_id == PushSubscription.account_id)
+            .where(PushSubscription.account_id.is_not(None))
+        )
+        if pref is not None:
+            query = query.where(pref_enabled(pref))
+        if account_ids is not None:
+            query = query.where(PushSubscription.account_id.in_(account_ids))
+        return query
+
+    @staticmethod
+    async def recipients(db: AsyncSession, pref: Optional[str] = "status_changed",
+                         account_ids: Optional[list[int]] = None) -> list:
+        """Подписки аккаунтов, у которых включена настройка ``pref`` (None — все)."""
+        return (await db.execute(PushDispatcher._filter(
+            select(PushSubscription.endpoint, PushSubscription.p256dh,
+                   PushSubscription.auth, PushSubscription.account_id),
+            pref, account_ids,
+        ))).all()
+
+    @staticmethod
+    async def recipient_accounts(db: AsyncSession, pref: Optional[str] = "status_changed") -> list[int]:
+        """Аккаунты с push-подпиской и включённой настройкой ``pref``."""
+        return list((await db.execute(PushDispatcher._filter(
+            select(PushSubscription.account_id).distinct(), pref,
+        ))).scalars())
+
+    async def send(self, title: str, body: str, url: str = "/",
+                   pref: Optional[str] = "status_changed",
+                   account_ids: Optional[list[int]] = None) -> dict[str, int]:
+        async with AsyncSessionLocal() as db:
+            subs = await self.recipients(db, pref, account_ids)
+        if not subs:
+            return {"sent": 0, "failed": 0, "expired": 0}
+
+        payload = json.dumps({"title": title, "body": body, "url": url})
+        results = await self.deliver(subs, payload)
+
+        expired = [sub.endpoint for sub, status in zip(subs, results) if status == "expired"]
+        if expired:
+            async def _write(db):
+                await db.execute(delete(PushSubscription).where(PushSubscription.endpoint.in_(expired)))
+
+            await run_write(_write)
+        stats = {
+            "sent": results.count("sent"),
+            "failed": results.count("failed"),
+            "expired": len(expired),
+        }
+        logger.info("push_sent", title=title, recipients=len(subs), **stats)
+        return stats
+
+    async def deliver(self, subs: list, payload: str) -> list[str]:
+        """Отправить payload подпискам: по каждой sent | expired (404/410) | failed."""
+        key, email = await self._keys()
+        self._ensure_transport()
+        data = payload.encode()
+        loop = asyncio.get_running_loop()
+
+        async def _one(sub) -> str:
+            async with self._slots:
+                try:
+                    body = await loop.run_in_executor(self._executor, _encrypt, sub, data)
+                    headers = {
+                        **self._authorization(sub.endpoint, key, email),
+                        "Content-Encoding": "aes128gcm",
+                        "TTL": str(PUSH_TTL_SECONDS),
+                        "Urgency": "high",
+                    }
+                    try:
+                        status, error = await self._post(sub.endpoint, body, headers)
+                    except aiohttp.ServerDisconnectedError:
+                        # Push-сервис закрыл keep-alive соединение между рассылками — один повтор
+                        status, error = await self._post(sub.endpoint, body, headers)
+                except Exception as exc:
+                    logger.error("push_delivery_error", endpoint=sub.endpoint[:40], error=str(exc) or repr(exc))
+                    return "failed"
+            if status in (404, 410):
+                return "expired"
+            if status > 202:
+                logger.error("push_delivery_failed", endpoint=sub.endpoint[:40], status=status, error=error[:200])
+                return "failed"
+            return "sent"
+
+        return list(await asyncio.gather(*(_one(sub) for sub in subs)))
+
+    async def _post(self, endpoint: str, body: bytes, headers: dict[str, str]) -> tuple[int, Optional[str]]:
+        async with self._session.post(endpoint, data=body, headers=headers) as response:
+            return response.status, (await response.text() if response.status > 202 else None)
+
+
+def _encrypt(sub, payload: bytes) -> bytes:
+    """aes128gcm под ключи подписки (эфемерный ECDH на каждое сообщение)."""
+    pusher = WebPusher({"endpoint": sub.endpoint, "keys": {"p256dh": sub.p256dh, "auth": sub.auth}})
+    return pusher.encode(payload, "aes128gcm")["body"]
+
+
+push_dispatcher = PushDispatcher(senders=settings.PUSH_SENDERS,
+                                 encrypt_workers=settings.PUSH_ENCRYPT_WORKERS)
@@ -0,0 +1,137 @@
+"""Напоминания /remind: хранение в task_reminders и один планировщик в процессе бота."""
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal, run_write
+from app.core.logging import get_logger
+from app.domain.models import Task, TaskReminder
+from app.telegram.send_queue import bulk_sends
+
+logger = get_logger(__name__)
+
+# Страховочный интервал: напоминания из другого процесса подхватываются не позже
+MAX_SLEEP_SECONDS = 300
+FIRE_BATCH = 100
+
+_wakeup = asyncio.Event()
+
+
+def wake_scheduler() -> None:
+    """Разбудить планировщик — новое напоминание может оказаться ближайшим."""
+    _wakeup.set()
+
+
+class ReminderService:
+
+    @staticmethod
+    async def create(db: AsyncSession, task_id: int, chat_id: int, remind_at: datetime,
+                     created_by: Optional[int] = None) -> TaskReminder:
+        reminder = TaskReminder(task_id=task_id, chat_id=chat_id, remind_at=remind_at,
+                                created_by=created_by)
+        db.add(reminder)
+        await db.flush()
+        return reminder
+
+    @staticmethod
+    async def list_pending(db: AsyncSession, chat_id: Optional[int] = None,
+                           task_id: Optional[int] = None) -> list[dict]:
+        query = (
+            select(TaskReminder.id, TaskReminder.task_id, TaskReminder.chat_id,
+                   TaskReminder.remind_at, TaskReminder.created_at, Task.title)
+            .join(Task, Task.id == TaskReminder.task_id)
+            .order_by(TaskReminder.remind_at, TaskReminder.id)
+        )
+        if chat_id is not None:
+            query = query.where(TaskReminder.chat_id == chat_id)
+        if task_id is not None:
+            query = query.where(TaskReminder.task_id == task_id)
+        result = await db.execute(query)
+        return [
+            {
+                "id": row.id,
+                "task_id": row.task_id,
+                "task_title": row.title,
+                "chat_id": row.chat_id,
+                "remind_at": row.remind_at.isoformat(),
+                "created_at": row.created_at.isoformat(),
+            }
+            for row in result
+        ]
+
+    @staticmethod
+    async def cancel(db: AsyncSession, reminder_id: int, chat_id: Optional[int] = None) -> bool:
+        """Удалить напоминание; ``chat_id`` — отменить можно только своё (для бота)."""
+        query = delete(TaskReminder).where(TaskReminder.id == reminder_id)
+        if chat_id is not None:
+            query = query.where(TaskReminder.chat_id == chat_id)
+        result = await db.execute(query)
+        return result.rowcount > 0
+
+
+async def _fire_due(bot) -> Optional[datetime]:
+    """Отправить наступившие напоминания; вернуть время ближайшего следующего."""
+    now = Clock.now()
+    async with AsyncSessionLocal() as db:
+        due = (await db.execute(
+            select(TaskReminder.id, TaskReminder.task_id, TaskReminder.chat_id,
+                   Task.title, Task.deleted)
+            .join(Task, Task.id == TaskReminder.task_id, isouter=True)
+            .where(TaskReminder.remind_at <= now)
+            .order_by(TaskReminder.remind_at)
+            .limit(FIRE_BATCH)
+        )).all()
+
+    with bulk_sends():
+        for row in due:
+            if row.title is None or row.deleted:
+                continue  # задачу удалили — напоминать не о чем
+            try:
+                await bot.send_message(
+                    chat_id=row.chat_id,
+                    text=(
+                        f"⏰ *Напоминание!*\n\n"
+                        f"📋 *#{row.task_id} {row.title}*\n"
+                        f"[Открыть задачу]({settings.web_url}/?task={row.task_id})"
+                    ),
+                    parse_mode="Markdown",
+                )
+                logger.info("reminder_sent", reminder_id=row.id, task_id=row.task_id)
+            except Exception as e:
+                # Не повторяем: чат мог заблокировать бота, иначе напоминание слалось бы вечно
+                logger.warning("remind_send_failed", task_id=row.task_id, error=str(e))
+
+    if due:
+        ids = [row.id for row in due]
+
+        async def _write(db):
+            await db.execute(delete(TaskReminder).where(TaskReminder.id.in_(ids)))
+
+        await run_write(_write)
+        if len(due) == FIRE_BATCH:
+            return now  # есть ещё наступившие — сразу следующий батч
+
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.min(TaskReminder.remind_at)))).scalar()
+
+
+async def run_reminder_scheduler(bot):
+    """Один цикл на все напоминания: спит до ближайшего, после рестарта досылает просроченные."""
+    logger.info("reminder_scheduler_started")
+    while True:
+        _wakeup.clear()
+        next_at = None
+        try:
+            next_at = await _fire_due(bot)
+        except Exception as e:
+            logger.error("reminder_scheduler_error", error=str(e))
+        timeout = MAX_SLEEP_SECONDS
+        if next_at is not None:
+            timeout = min(timeout, max(0.0, (next_at - Clock.now()).total_seconds()))
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,429 @@
+"""Full-text search — единый FTS5-индекс по задачам, встречам, базе знаний и комментариям."""
+import re
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# unicode61 сворачивает регистр для всех алфавитов (включая кириллицу)
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+
+# Веса bm25 по колонкам: kind, ref_id (не индексируются), title, body, tags, extra
+BM25_RANK = "bm25(0.0, 0.0, 10.0, 3.0, 5.0, 1.0)"
+
+# Короче — только точное слово: префикс из 1-2 букв совпадает почти со всем корпусом
+MIN_PREFIX_LEN = 3
+
+# rowid в индексе = id * 8 + код типа — один индекс на все сущности
+KIND_CODES = {"task": 1, "meeting": 2, "page": 3, "comment": 4}
+
+
+def _task_sql(ids: str) -> str:
+    """Пересобрать строки задач. ``ids`` — SELECT с одной колонкой ``v``.
+
+    В индекс попадают только активные задачи (не архив и не удалённые) —
+    фильтр на стороне индекса сохраняет корректную пагинацию. Унарный ``+``
+    у флагов не даёт планировщику взять индекс по archived/deleted вместо id.
+    """
+    return f"""
+        DELETE FROM search_fts WHERE rowid IN (SELECT v * 8 + 1 FROM ({ids}));
+        INSERT INTO search_fts(rowid, kind, ref_id, title, body, tags, extra)
+        SELECT t.id * 8 + 1, 'task', t.id, t.title, coalesce(t.description, ''),
+               coalesce((SELECT group_concat(g.name, ' ') FROM task_tags tt
+                         JOIN tags g ON g.id = tt.tag_id WHERE tt.task_id = t.id), ''),
+               coalesce((SELECT group_concat(c.text, ' ') FROM comments c WHERE c.task_id = t.id), '')
+        FROM tasks t
+        WHERE t.id IN (SELECT v FROM ({ids})) AND +t.deleted = 0 AND +t.archived = 0;
+    """
+
+
+def _comment_sql(ids: str) -> str:
+    """Пересобрать строки комментариев (только у активных задач)."""
+    return f"""
+        DELETE FROM search_fts WHERE rowid IN (SELECT v * 8 + 4 FROM ({ids}));
+        INSERT INTO search_fts(rowid, kind, ref_id, title, body, tags, extra)
+        SELECT c.id * 8 + 4, 'comment', c.id, '', c.text, '', coalesce(c.author_name, '')
+        FROM comments c JOIN tasks t ON t.id = c.task_id
+        WHERE c.id IN (SELECT v FROM ({ids})) AND +t.deleted = 0 AND +t.archived = 0;
+    """
+
+
+def _meeting_sql(ids: str) -> str:
+    return f"""
+        DELETE FROM search_fts WHERE rowid IN (SELECT v * 8 + 2 FROM ({ids}));
+        INSERT INTO search_fts(rowid, kind, ref_id, title, body, tags, extra)
+        SELECT m.id * 8 + 2, 'meeting', m.id, coalesce(m.title, ''), m.summary,
+               coalesce(m.meeting_type, ''), coalesce(m.agenda, '')
+        FROM meetings m WHERE m.id IN (SELECT v FROM ({ids}));
+    """
+
+
+def _page_sql(ids: str) -> str:
+    return f"""
+        DELETE FROM search_fts WHERE rowid IN (SELECT v * 8 + 3 FROM ({ids}));
+        INSERT INTO search_fts(rowid, kind, ref_id, title, body, tags, extra)
+        SELECT p.id * 8 + 3, 'page', p.id, p.title, coalesce(p.content, ''), '', ''
+        FROM knowledge_pages p WHERE p.id IN (SELECT v FROM ({ids}));
+    """
+
+
+def _task_comments(task_ids: str) -> str:
+    return f"SELECT id AS v FROM comments WHERE task_id IN (SELECT v FROM ({task_ids}))"
+
+
+FTS_SCHEMA = [
+    # Триггеры агрегируют комментарии задачи — без индекса каждый пересчёт сканирует comments
+    "CREATE INDEX IF NOT EXISTS ix_comments_task_id ON comments (task_id)",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+    f"kind UNINDEXED, ref_id UNINDEXED, title, body, tags, extra, tokenize='{FTS_TOKENIZER}')",
+    # tasks
+    f"""CREATE TRIGGER IF NOT EXISTS search_tasks_ai AFTER INSERT ON tasks BEGIN
+        {_task_sql("SELECT NEW.id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_tasks_au
+        AFTER UPDATE OF title, description, archived, deleted ON tasks BEGIN
+        {_task_sql("SELECT NEW.id AS v")}
+        {_comment_sql(_task_comments("SELECT NEW.id AS v"))}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_tasks_ad AFTER DELETE ON tasks BEGIN
+        DELETE FROM search_fts WHERE rowid = OLD.id * 8 + 1;
+        DELETE FROM search_fts WHERE rowid IN (SELECT id * 8 + 4 FROM comments WHERE task_id = OLD.id);
+    END""",
+    # comments
+    f"""CREATE TRIGGER IF NOT EXISTS search_comments_ai AFTER INSERT ON comments BEGIN
+        {_comment_sql("SELECT NEW.id AS v")}
+        {_task_sql("SELECT NEW.task_id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_comments_au AFTER UPDATE OF text ON comments BEGIN
+        {_comment_sql("SELECT NEW.id AS v")}
+        {_task_sql("SELECT NEW.task_id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_comments_ad AFTER DELETE ON comments BEGIN
+        DELETE FROM search_fts WHERE rowid = OLD.id * 8 + 4;
+        {_task_sql("SELECT OLD.task_id AS v")}
+    END""",
+    # tags
+    f"""CREATE TRIGGER IF NOT EXISTS search_task_tags_ai AFTER INSERT ON task_tags BEGIN
+        {_task_sql("SELECT NEW.task_id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_task_tags_ad AFTER DELETE ON task_tags BEGIN
+        {_task_sql("SELECT OLD.task_id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_tags_au AFTER UPDATE OF name ON tags BEGIN
+        {_task_sql("SELECT task_id AS v FROM task_tags WHERE tag_id = NEW.id")}
+    END""",
+    # meetings
+    f"""CREATE TRIGGER IF NOT EXISTS search_meetings_ai AFTER INSERT ON meetings BEGIN
+        {_meeting_sql("SELECT NEW.id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_meetings_au
+        AFTER UPDATE OF title, summary, agenda, meeting_type ON meetings BEGIN
+        {_meeting_sql("SELECT NEW.id AS v")}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_meetings_ad AFTER DELETE ON meetings BEGIN
+        DELETE FROM search_fts WHERE rowid = OLD.id * 8 + 2;
+    END""",
+    # knowledge base
+    f"""CREATE TRIGGER IF NOT EXISTS search_pages_ai AFTER INSERT ON knowledge_pages BEGIN
+        {_page_sql("SELECT NEW.id AS v")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS search_pages_au AFTER UPDATE OF title, content ON knowledge_pages BEGIN
+        {_page_sql("SELECT NEW.id AS v")}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS search_pages_ad AFTER DELETE ON knowledge_pages BEGIN
+        DELETE FROM search_fts WHERE rowid = OLD.id * 8 + 3;
+    END""",
+]
+
+# Триггеры пересоздаются при каждом старте — CREATE IF NOT EXISTS не обновил бы их тело
+_DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS {name}"
+    for name in re.findall(r"CREATE TRIGGER IF NOT EXISTS (\w+)", " ".join(FTS_SCHEMA))
+]
+
+# Индекс только по задачам из первой версии поиска
+_LEGACY_SCHEMA = [
+    "DROP TRIGGER IF EXISTS tasks_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_fts_ad",
+    "DROP TRIGGER IF EXISTS comments_fts_ai",
+    "DROP TRIGGER IF EXISTS comments_fts_au",
+    "DROP TRIGGER IF EXISTS comments_fts_ad",
+    "DROP TRIGGER IF EXISTS task_tags_fts_ai",
+    "DROP TRIGGER IF EXISTS task_tags_fts_ad",
+    "DROP TRIGGER IF EXISTS tags_fts_au",
+    "DROP TABLE IF EXISTS tasks_fts",
+]
+
+
+async def ensure_search_index(db) -> None:
+    """Создать FTS5-таблицу и триггеры (aiosqlite-соединение из миграций).
+
+    Индекс заполняется целиком только при первом создании, дальше его
+    поддерживают триггеры.
+    """
+    async with db.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='search_fts'") as cur:
+        exists = await cur.fetchone()
+    try:
+        for ddl in _LEGACY_SCHEMA + _DROP_TRIGGERS + FTS_SCHEMA:
+            await db.execute(ddl)
+    except Exception as e:
+        # SQLite без FTS5 — поиск останется на LIKE
+        logger.warning("search_index_unavailable", error=str(e))
+        return
+    if not exists:
+        await db.execute(
+            "INSERT INTO search_fts(search_fts, rank) VALUES ('rank', ?)", (BM25_RANK,)
+        )
+        await db.executescript(
+            _task_sql("SELECT id AS v FROM tasks")
+            + _comment_sql("SELECT id AS v FROM comments")
+            + _meeting_sql("SELECT id AS v FROM meetings")
+            + _page_sql("SELECT id AS v FROM knowledge_pages")
+        )
+        logger.info("search_index_built", table="search_fts")
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """Строка пользователя → FTS5 MATCH: все слова (AND), длинные — как префикс."""
+    tokens = re.findall(r"\w+", q)
+    if not tokens:
+        return None
+    return " ".join(
+        f'"{token}"*' if len(token) >= MIN_PREFIX_LEN else f'"{token}"'
+        for token in tokens
+    )
+
+
+_LIKE_WHERE = """deleted = 0 AND archived = 0
+                  AND (lower(title) LIKE :p OR lower(coalesce(description, '')) LIKE :p
+                       OR CAST(id AS TEXT) = :q)"""
+
+
+def _like_params(q: str) -> dict:
+    return {"p": f"%{q.lower()}%", "q": q.strip().lstrip("#")}
+
+
+def _iso(value) -> Optional[str]:
+    if not value:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value).replace(" ", "T")
+
+
+class SearchService:
+
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        q: str,
+        kinds: Optional[list[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict:
+        """Единый поиск: типизированные хиты по рангу bm25, сниппеты, пагинация."""
+        match = build_match_query(q)
+        kinds = [k for k in (kinds or KIND_CODES) if k in KIND_CODES]
+        if not match or not kinds:
+            return {"items": [], "total": 0, "limit": limit, "offset": offset}
+
+        kind_params = {f"k{i}": k for i, k in enumerate(kinds)}
+        kind_filter = ", ".join(f":{p}" for p in kind_params)
+        params = {"match": match, **kind_params}
+
+        try:
+            total = (await db.execute(
+                text(f"SELECT count(*) FROM search_fts WHERE search_fts MATCH :match AND kind IN ({kind_filter})"),
+                params,
+            )).scalar() or 0
+            if total == 0:
+                return {"items": [], "total": 0, "limit": limit, "offset": offset}
+
+            rows = (await db.execute(
+                text(f"""
+                    SELECT kind, ref_id, rank,
+                           snippet(search_fts, -1, :open, :close, '…', 12) AS snippet
+                    FROM search_fts
+                    WHERE search_fts MATCH :match AND kind IN ({kind_filter})
+                    ORDER BY rank
+                    LIMIT :limit OFFSET :offset
+                """),
+                {**params, "open": SNIPPET_OPEN, "close": SNIPPET_CLOSE, "limit": limit, "offset": offset},
+            )).all()
+        except OperationalError as e:
+            logger.warning("search_fts_failed", error=str(e))
+            return await SearchService._search_all_like(db, q, kinds, limit, offset)
+
+        details = await SearchService._load_details(db, rows)
+        items = []
+        for row in rows:
+            detail = details.get((row.kind, row.ref_id))
+            if detail is None:
+                continue
+            items.append({
+                "type": row.kind,
+                "id": row.ref_id,
+                **detail,
+                "snippet": row.snippet,
+                "rank": row.rank,
+            })
+        return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+    @staticmethod
+    async def _load_details(db: AsyncSession, rows) -> dict[tuple[str, int], dict]:
+        """Подтянуть поля для карточек хитов: один запрос на тип."""
+        ids: dict[str, list[int]] = {}
+        for row in rows:
+            ids.setdefault(row.kind, []).append(row.ref_id)
+
+        def in_clause(values: list[int]) -> str:
+            return ", ".join(str(int(v)) for v in values)
+
+        details: dict[tuple[str, int], dict] = {}
+        if "task" in ids:
+            result = await db.execute(text(f"""
+                SELECT id, title, status, priority, project_id, due_date FROM tasks
+                WHERE id IN ({in_clause(ids["task"])})
+            """))
+            for r in result:
+                details[("task", r.id)] = {
+                    "title": r.title, "status": r.status, "priority": r.priority,
+                    "project_id": r.project_id, "due_date": _iso(r.due_date),
+                }
+        if "comment" in ids:
+            result = await db.execute(text(f"""
+                SELECT c.id, c.task_id, c.author_name, c.created_at, t.title AS task_title
+                FROM comments c JOIN tasks t ON t.id = c.task_id
+                WHERE c.id IN ({in_clause(ids["comment"])})
+            """))
+            for r in result:
+                details[("comment", r.id)] = {
+                    "title": r.task_title, "task_id": r.task_id,
+                    "author_name": r.author_name, "created_at": _iso(r.created_at),
+                }
+        if "meeting" in ids:
+            result = await db.execute(text(f"""
+                SELECT id, title, meeting_type, meeting_date FROM meetings
+                WHERE id IN ({in_clause(ids["meeting"])})
+            """))
+            for r in result:
+                details[("meeting", r.id)] = {
+                    "title": r.title or "Встреча", "meeting_type": r.meeting_type,
+                    "meeting_date": _iso(r.meeting_date),
+                }
+        if "page" in ids:
+            result = await db.execute(text(f"""
+                SELECT id, title, folder_id, updated_at FROM knowledge_pages
+                WHERE id IN ({in_clause(ids["page"])})
+            """))
+            for r in result:
+                details[("page", r.id)] = {
+                    "title": r.title, "folder_id": r.folder_id, "updated_at": _iso(r.updated_at),
+                }
+        return details
+
+    @staticmethod
+    async def search_tasks(db: AsyncSession, q: str, limit: int = 20) -> list[dict]:
+        """Поиск по активным задачам (для /api/search), BM25 + сниппет."""
+        match = build_match_query(q)
+        if not match:
+            return []
+        try:
+            result = await db.execute(
+                text("""
+                    SELECT t.id, t.title, t.description, t.status, t.priority, t.project_id,
+                           t.parent_task_id, t.due_date, t.archived, t.deleted, t.backlog,
+                           snippet(search_fts, -1, :open, :close, '…', 12) AS snippet,
+                           search_fts.rank AS rank
+                    FROM search_fts
+                    JOIN tasks t ON t.id = search_fts.ref_id
+                    WHERE search_fts MATCH :match AND search_fts.kind = 'task'
+                    ORDER BY search_fts.rank
+                    LIMIT :limit
+                """),
+                {"match": match, "open": SNIPPET_OPEN, "close": SNIPPET_CLOSE, "limit": limit},
+            )
+        except OperationalError as e:
+            logger.warning("search_fts_failed", error=str(e))
+            return await SearchService._search_like(db, q, limit)
+        rows = [dict(row._mapping) for row in result]
+
+        # Точное совпадение по номеру задачи — первым
+        if q.strip().lstrip("#").isdigit():
+            task_id = int(q.strip().lstrip("#"))
+            if not any(r["id"] == task_id for r in rows):
+                by_id = await db.execute(
+                    text("""
+                        SELECT id, title, description, status, priority, project_id,
+                               parent_task_id, due_date, archived, deleted, backlog
+                        FROM tasks WHERE id = :id AND deleted = 0 AND archived = 0
+                    """),
+                    {"id": task_id},
+                )
+                rows = [dict(r._mapping) for r in by_id] + rows
+            rows.sort(key=lambda r: r["id"] != task_id)
+
+        return [SearchService._to_hit(r) for r in rows[:limit]]
+
+    @staticmethod
+    async def _search_like(db: AsyncSession, q: str, limit: int, offset: int = 0) -> list[dict]:
+        """Запасной поиск, если FTS5 недоступен."""
+        result = await db.execute(
+            text(f"""
+                SELECT id, title, description, status, priority, project_id,
+                       parent_task_id, due_date, archived, deleted, backlog
+                FROM tasks
+                WHERE {_LIKE_WHERE}
+                ORDER BY updated_at DESC
+                LIMIT :limit OFFSET :offset
+            """),
+            {**_like_params(q), "limit": limit, "offset": offset},
+        )
+        return [SearchService._to_hit(dict(r._mapping)) for r in result]
+
+    @staticmethod
+    async def _search_all_like(db: AsyncSession, q: str, kinds: list[str], limit: int, offset: int) -> dict:
+        """Запасной единый поиск без FTS5: только задачи, по LIKE, без ранга и сниппетов."""
+        if "task" not in kinds:
+            return {"items": [], "total": 0, "limit": limit, "offset": offset}
+        total = (await db.execute(
+            text(f"SELECT count(*) FROM tasks WHERE {_LIKE_WHERE}"), _like_params(q),
+        )).scalar() or 0
+        hits = await SearchService._search_like(db, q, limit, offset) if total else []
+        items = [{
+            "type": "task",
+            "id": hit["id"],
+            "title": hit["title"],
+            "status": hit["status"],
+            "priority": hit["priority"],
+            "project_id": hit["project_id"],
+            "due_date": hit["due_date"],
+            "snippet": None,
+            "rank": None,
+        } for hit in hits]
+        return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+    @staticmethod
+    def _to_hit(row: dict) -> dict:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row.get("description") or "",
+            "status": row["status"],
+            "priority": row["priority"],
+            "project_id": row["project_id"],
+            "parent_task_id": row["parent_task_id"],
+            "due_date": _iso(row.get("due_date")),
+            "archived": bool(row["archived"]),
+            "deleted": bool(row["deleted"]),
+            "backlog": bool(row["backlog"]),
+            "snippet": row.get("snippet"),
+            "rank": row.get("rank"),
+        }
@@ -0,0 +1,169 @@
+"""Дневные срезы задач (task_snapshots) и тренды по ним: burndown, throughput, cycle time."""
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, func, case, and_, or_, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal, run_write
+from app.core.logging import get_logger
+from app.domain.enums import TaskStatus
+from app.domain.models import Task, TaskSnapshot
+from app.services.digest_service import ACTIVE
+
+logger = get_logger(__name__)
+
+SNAPSHOT_INTERVAL_MINUTES = 60
+BACKFILL_DAYS = 90
+MAX_TREND_DAYS = 365
+
+
+def _count(cond):
+    return func.coalesce(func.sum(case((cond, 1), else_=0)), 0)
+
+
+class SnapshotService:
+
+    @staticmethod
+    async def compute_day(db: AsyncSession, day: date) -> list[dict]:
+        """Срез на конец дня ``day`` (UTC) одним GROUP BY (проект, исполнитель).
+
+        Открытые на конец дня восстанавливаются по created_at/completed_at, поэтому
+        прошлые дни можно досчитать задним числом. Архив и удалённые не учитываются
+        (момент архивации не хранится), бэклог — тоже.
+        """
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        done = Task.status == TaskStatus.DONE.value
+        completed_today = and_(done, Task.completed_at >= start, Task.completed_at < end)
+        is_open = and_(
+            Task.created_at < end,
+            Task.archived == False,  # noqa: E712
+            Task.backlog == False,  # noqa: E712
+            or_(
+                and_(done, Task.completed_at >= end),
+                Task.status.in_(ACTIVE),
+            ),
+        )
+        cycle = case(
+            (completed_today, (func.julianday(Task.completed_at) - func.julianday(Task.created_at)) * 86400),
+            else_=0,
+        )
+        created = _count(and_(Task.created_at >= start, Task.created_at < end))
+        completed = _count(completed_today)
+        open_count = _count(is_open)
+        result = await db.execute(
+            select(
+                Task.project_id,
+                Task.assignee_id,
+                open_count.label("open_count"),
+                _count(and_(is_open, Task.due_date < end)).label("overdue_count"),
+                created.label("created_count"),
+                completed.label("completed_count"),
+                func.coalesce(func.sum(cycle), 0.0).label("cycle_secs"),
+            )
+            .where(Task.deleted == False, Task.created_at < end)  # noqa: E712
+            .group_by(Task.project_id, Task.assignee_id)
+            .having((open_count + created + completed) > 0)
+        )
+        return [{"day": day, **row._mapping} for row in result]
+
+    @staticmethod
+    async def save_day(day: date) -> int:
+        """Пересчитать день и заменить его строки в task_snapshots."""
+        async with AsyncSessionLocal() as db:
+            rows = await SnapshotService.compute_day(db, day)
+
+        async def _write(db):
+            await db.execute(delete(TaskSnapshot).where(TaskSnapshot.day == day))
+            if rows:
+                await db.execute(insert(TaskSnapshot), rows)
+
+        await run_write(_write)
+        return len(rows)
+
+    @staticmethod
+    async def refresh(backfill_days: int = BACKFILL_DAYS) -> None:
+        """Досчитать пропущенные дни (после последнего среза) и обновить сегодняшний."""
+        today = Clock.now().date()
+        async with AsyncSessionLocal() as db:
+            last = (await db.execute(select(func.max(TaskSnapshot.day)))).scalar()
+        if isinstance(last, str):
+            last = date.fromisoformat(last)
+        # Последний сохранённый день тоже пересчитываем — он мог быть снят не в конце суток
+        day = last if last else today - timedelta(days=backfill_days)
+        days = 0
+        while day <= today:
+            await SnapshotService.save_day(day)
+            day += timedelta(days=1)
+            days += 1
+        logger.info("task_snapshots_refreshed", days=days, until=today.isoformat())
+
+    # --- тренды: O(дней × проектов × исполнителей), tasks не читается ---
+
+    @staticmethod
+    async def _series(
+        db: AsyncSession,
+        columns: list,
+        days: int,
+        project_id: Optional[int],
+        assignee_id: Optional[int],
+    ) -> list[dict]:
+        since = Clock.now().date() - timedelta(days=max(1, min(days, MAX_TREND_DAYS)) - 1)
+        query = (
+            select(TaskSnapshot.day, *columns)
+            .where(TaskSnapshot.day >= since)
+            .group_by(TaskSnapshot.day)
+            .order_by(TaskSnapshot.day)
+        )
+        if project_id is not None:
+            query = query.where(TaskSnapshot.project_id == project_id)
+        if assignee_id is not None:
+            query = query.where(TaskSnapshot.assignee_id == assignee_id)
+        result = await db.execute(query)
+        return [
+            {"day": row.day.isoformat() if hasattr(row.day, "isoformat") else row.day,
+             **{k: v for k, v in row._mapping.items() if k != "day"}}
+            for row in result
+        ]
+
+    @staticmethod
+    async def burndown(db: AsyncSession, days: int = 30, project_id: Optional[int] = None,
+                       assignee_id: Optional[int] = None) -> list[dict]:
+        """Открытые и просроченные задачи на конец каждого дня."""
+        return await SnapshotService._series(db, [
+            func.sum(TaskSnapshot.open_count).label("open"),
+            func.sum(TaskSnapshot.overdue_count).label("overdue"),
+        ], days, project_id, assignee_id)
+
+    @staticmethod
+    async def throughput(db: AsyncSession, days: int = 30, project_id: Optional[int] = None,
+                         assignee_id: Optional[int] = None) -> list[dict]:
+        """Создано и закрыто задач за день."""
+        return await SnapshotService._series(db, [
+            func.sum(TaskSnapshot.created_count).label("created"),
+            func.sum(TaskSnapshot.completed_count).label("completed"),
+        ], days, project_id, assignee_id)
+
+    @staticmethod
+    async def cycle_time(db: AsyncSession, days: int = 30, project_id: Optional[int] = None,
+                         assignee_id: Optional[int] = None) -> list[dict]:
+        """Среднее время created→completed (дни) по задачам, закрытым в этот день."""
+        rows = await SnapshotService._series(db, [
+            func.sum(TaskSnapshot.completed_count).label("completed"),
+            func.sum(TaskSnapshot.cycle_secs).label("cycle_secs"),
+        ], days, project_id, assignee_id)
+        for row in rows:
+            secs = row.pop("cycle_secs") or 0
+            row["avg_days"] = round(secs / row["completed"] / 86400, 1) if row["completed"] else None
+        return rows
+
+
+async def run_snapshot_job():
+    """Фоновый цикл в процессе бота: досчитать историю, затем раз в час обновлять текущий день."""
+    while True:
+        try:
+            await SnapshotService.refresh()
+        except Exception as e:
+            logger.error("task_snapshots_error", error=str(e))
+        await asyncio.sleep(SNAPSHOT_INTERVAL_MINUTES * 60)
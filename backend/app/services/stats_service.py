@@ -0,0 +1,110 @@
+"""Счётчики задач для /api/stats — таблица task_counters, которую ведут триггеры."""
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.logging import get_logger
+from app.domain.enums import TaskStatus
+
+logger = get_logger(__name__)
+
+# Одна строка на комбинацию (status, archived, deleted, backlog) — десятки строк
+# вместо скана tasks; триггеры работают и для записей из процесса бота.
+_BUCKET = "coalesce({r}.status, ''), {r}.archived, {r}.deleted, {r}.backlog"
+
+
+def _inc(row: str) -> str:
+    return f"""
+        INSERT INTO task_counters (status, archived, deleted, backlog, n)
+        VALUES ({_BUCKET.format(r=row)}, 1)
+        ON CONFLICT (status, archived, deleted, backlog) DO UPDATE SET n = n + 1;
+    """
+
+
+def _dec(row: str) -> str:
+    return f"""
+        UPDATE task_counters SET n = n - 1
+        WHERE (status, archived, deleted, backlog) = ({_BUCKET.format(r=row)});
+    """
+
+
+STATS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS task_counters (
+        status TEXT NOT NULL,
+        archived BOOLEAN NOT NULL,
+        deleted BOOLEAN NOT NULL,
+        backlog BOOLEAN NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, archived, deleted, backlog)
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_counters_ai AFTER INSERT ON tasks BEGIN
+        {_inc("NEW")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_counters_au
+        AFTER UPDATE OF status, archived, deleted, backlog ON tasks BEGIN
+        {_dec("OLD")}
+        {_inc("NEW")}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_counters_ad AFTER DELETE ON tasks BEGIN
+        {_dec("OLD")}
+    END""",
+]
+
+# Пересчёт одним GROUP BY — при старте, чтобы счётчики не расходились с tasks
+_REBUILD = [
+    "DELETE FROM task_counters",
+    """INSERT INTO task_counters (status, archived, deleted, backlog, n)
+       SELECT coalesce(status, ''), archived, deleted, backlog, count(*)
+       FROM tasks GROUP BY 1, 2, 3, 4""",
+]
+
+
+async def ensure_task_counters(db) -> None:
+    """Создать task_counters + триггеры и пересчитать (aiosqlite-соединение из миграций)."""
+    for ddl in STATS_SCHEMA + _REBUILD:
+        await db.execute(ddl)
+
+
+class StatsService:
+
+    @staticmethod
+    async def get_stats(db: AsyncSession) -> dict:
+        """Счётчики дашборда одним запросом по task_counters."""
+        try:
+            result = await db.execute(
+                text("SELECT status, archived, deleted, backlog, n FROM task_counters WHERE n > 0")
+            )
+        except OperationalError as e:
+            # Таблицы нет (миграции не прошли) — тот же расчёт одним проходом по tasks
+            logger.warning("task_counters_unavailable", error=str(e))
+            await db.rollback()
+            result = await db.execute(
+                text("""
+                    SELECT status, archived, deleted, backlog, count(*) AS n
+                    FROM tasks GROUP BY status, archived, deleted, backlog
+                """)
+            )
+        return StatsService._fold(result.all())
+
+    @staticmethod
+    def _fold(rows) -> dict:
+        stats = {
+            "total": 0, "todo": 0, "doing": 0, "done": 0, "blocked": 0,
+            "on_hold": 0, "archived": 0, "deleted": 0,
+        }
+        buckets = {
+            TaskStatus.TODO.value: "todo",
+            TaskStatus.DOING.value: "doing",
+            TaskStatus.DONE.value: "done",
+            TaskStatus.BLOCKED.value: "blocked",
+            TaskStatus.ON_HOLD.value: "on_hold",
+        }
+        for status, archived, deleted, backlog, n in rows:
+            if deleted:
+                stats["deleted"] += n
+            elif archived:
+                stats["archived"] += n
+            elif not backlog:
+                stats["total"] += n
+                if status in buckets:
+                    stats[buckets[status]] += n
+        return stats
@@ -0,0 +1,135 @@
+"""Инкрементальная синхронизация задач: версии в task_versions, выдача изменений после курсора."""
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.models import Task, TaskDependency, task_tags
+
+SYNC_PAGE_LIMIT = 500
+SYNC_MAX_LIMIT = 5000
+
+
+def _bump(task: str, table: str, kind: str) -> str:
+    """Триггер: следующая версия из sync_seq для задачи ``task`` (выражение от NEW/OLD)."""
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_sync_a{kind[0]}
+        AFTER {kind.upper()} ON {table} BEGIN
+        UPDATE sync_seq SET value = value + 1 WHERE id = 1;
+        INSERT OR REPLACE INTO task_versions (task_id, version, removed)
+        VALUES ({task}, (SELECT value FROM sync_seq WHERE id = 1),
+                NOT EXISTS (SELECT 1 FROM tasks WHERE id = {task}));
+    END"""
+
+
+# Версия задачи растёт при любом изменении строки, тегов или зависимостей — из API
+# и из бота. Писатель в SQLite один, поэтому версии монотонны в порядке commit и
+# курсор «version > since» ничего не пропускает. removed = 1 — задача удалена из БД.
+SYNC_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sync_seq (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL
+    )""",
+    "INSERT OR IGNORE INTO sync_seq (id, value) VALUES (1, 1)",
+    """CREATE TABLE IF NOT EXISTS task_versions (
+        task_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        removed INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_task_versions_version ON task_versions (version)",
+    # Задачи, созданные до появления таблицы, — в первой версии
+    "INSERT OR IGNORE INTO task_versions (task_id, version) SELECT id, 1 FROM tasks",
+    _bump("NEW.id", "tasks", "insert"),
+    _bump("NEW.id", "tasks", "update"),
+    _bump("OLD.id", "tasks", "delete"),
+    _bump("NEW.task_id", "task_tags", "insert"),
+    _bump("OLD.task_id", "task_tags", "delete"),
+    _bump("NEW.task_id", "task_dependencies", "insert"),
+    _bump("OLD.task_id", "task_dependencies", "delete"),
+]
+
+# Скалярные поля задачи в ответе; связи — id тегов и зависимостей, исполнитель — assignee_id
+SYNC_COLUMNS = [
+    "id", "title", "description", "status", "priority", "project_id", "assignee_id",
+    "parent_task_id", "due_date", "archived", "deleted", "backlog", "is_idea",
+    "backlog_added_at", "recurrence", "recurrence_end_date", "time_spent",
+    "created_at", "updated_at", "started_at", "completed_at",
+]
+
+
+async def ensure_task_versions(db) -> None:
+    """Создать sync_seq, task_versions + триггеры (aiosqlite-соединение из миграций)."""
+    for ddl in SYNC_SCHEMA:
+        await db.execute(ddl)
+
+
+class SyncService:
+
+    @staticmethod
+    async def changes(
+        db: AsyncSession,
+        since: int = 0,
+        limit: int = SYNC_PAGE_LIMIT,
+        project_id: Optional[int] = None,
+        assignee_id: Optional[int] = None,
+    ) -> dict:
+        """Изменения задач после курсора ``since`` (0 — всё), страница до ``limit`` задач.
+
+        ``tasks`` — текущее состояние изменённых задач с ``tag_ids`` и ``depends_on``
+        (списки целиком, клиент заменяет их), ``removed`` — id удалённых из БД и,
+        при фильтре по проекту/исполнителю, вышедших из него задач. При ``since=0``
+        у клиента ещё ничего нет — ``removed`` пустой, чужие id не раскрываются. Следующий
+        запрос — с ``since=cursor``, пока ``has_more``. Задача могла измениться
+        между чтением версий и строк — тогда она придёт ещё раз со следующей страницей.
+        """
+        limit = max(1, min(limit, SYNC_MAX_LIMIT))
+        versions = (await db.execute(
+            text("SELECT task_id, version, removed FROM task_versions "
+                 "WHERE version > :since ORDER BY version LIMIT :limit"),
+            {"since": since, "limit": limit},
+        )).all()
+        if not versions:
+            return {"cursor": since, "has_more": False, "tasks": [], "removed": []}
+
+        # Полная выгрузка: удалять на клиенте нечего
+        tombstones = since > 0
+        removed = [row.task_id for row in versions if row.removed and tombstones]
+        changed = [row.task_id for row in versions if not row.removed]
+        tasks: list[dict] = []
+        if changed:
+            columns = [getattr(Task, name) for name in SYNC_COLUMNS]
+            rows = (await db.execute(select(*columns).where(Task.id.in_(changed)))).all()
+            found = {row.id: dict(row._mapping) for row in rows}
+            if tombstones:
+                removed.extend(task_id for task_id in changed if task_id not in found)
+
+            tag_ids: dict[int, list[int]] = {}
+            for task_id, tag_id in (await db.execute(
+                select(task_tags.c.task_id, task_tags.c.tag_id).where(task_tags.c.task_id.in_(found))
+            )).all():
+                tag_ids.setdefault(task_id, []).append(tag_id)
+            depends_on: dict[int, list[int]] = {}
+            for task_id, other in (await db.execute(
+                select(TaskDependency.task_id, TaskDependency.depends_on_id)
+                .where(TaskDependency.task_id.in_(found))
+            )).all():
+                depends_on.setdefault(task_id, []).append(other)
+
+            for task_id in changed:
+                task = found.get(task_id)
+                if task is None:
+                    continue
+                if ((project_id is not None and task["project_id"] != project_id)
+                        or (assignee_id is not None and task["assignee_id"] != assignee_id)):
+                    if tombstones:
+                        removed.append(task_id)
+                    continue
+                task["tag_ids"] = tag_ids.get(task_id, [])
+                task["depends_on"] = depends_on.get(task_id, [])
+                tasks.append(task)
+
+        return {
+            "cursor": versions[-1].version,
+            "has_more": len(versions) == limit,
+            "tasks": tasks,
+            "removed": removed,
+        }
@@ -48,13 +48,14 @@ class TaskService:
         
         task = await self.repository.create(task)
         
-        # Log to domain events
+        # Log to domain events — в той же транзакции, что и задача
         try:
             from app.domain import events as events_module
             await events_module.save_event(
                 "task.created",
-                {"title": title, "source": source.value},
+                {"title": title, "source": source.value, "assignee_id": task.assignee_id},
                 task_id=task.id,
+                db=self.session,
             )
         except Exception:
             pass
@@ -112,13 +113,15 @@ class TaskService:
 
         task = await self.repository.update(task)
         
-        # Log to domain events
+        # Log to domain events — в той же транзакции, что и задача
         try:
             from app.domain import events as events_module
             await events_module.save_event(
                 "task.status_changed",
-                {"old_status": old_status.value, "new_status": new_status.value},
+                {"old_status": old_status.value, "new_status": new_status.value,
+                 "assignee_id": task.assignee_id},
                 task_id=task.id,
+                db=self.session,
             )
         except Exception:
             pass
@@ -1,126 +1,491 @@
-"""Webhook trigger service."""
+"""Webhook delivery: transactional outbox + пул воркеров в процессе API."""
 import asyncio
 import json
 import hmac
 import hashlib
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
 import aiohttp
+from sqlalchemy import select, update, delete, func, text, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import AsyncSessionLocal
-from app.domain.models import Webhook, WebhookLog
+from app.config import settings
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal, run_write
+from app.core.logging import get_logger
+from app.domain.models import Webhook, WebhookLog, WebhookOutbox
+
+logger = get_logger(__name__)
+
+OUTBOX_POLL_SECONDS = 2  # подхват строк из другого процесса (бот) и наступивших ретраев
+CLAIM_BATCH = 200
+BATCH_MAX_EVENTS = 100  # потолок пакета, если у вебхука не задан batch_max_events
+BACKOFF_BASE_SECONDS = 2
+BACKOFF_MAX_SECONDS = 3600
+REQUEST_TIMEOUT_SECONDS = 15
+
+
+def _sign(secret: str, body: str) -> str:
+    return hmac.new(secret.encode(), body.encode(), hashlib.sha256).hexdigest()
+
+
+def _backoff(attempts: int) -> float:
+    """Пауза перед следующей попыткой: экспонента с потолком и jitter ±50%."""
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.5)
+
+
+# Версия набора вебхуков: триггеры увеличивают её при любом изменении таблицы
+# webhooks — так реестр другого процесса (бот ↔ API) узнаёт, что пора перечитать.
+WEBHOOKS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS cache_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )""",
+    "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('webhooks', 0)",
+    # Пересоздаём: в старых БД триггер не следил за колонками пакетного режима
+    "DROP TRIGGER IF EXISTS webhooks_version_au",
+] + [
+    # UPDATE — только подписки, активность и пакетный режим:
+    # last_triggered_at меняется на каждой доставке
+    f"""CREATE TRIGGER IF NOT EXISTS webhooks_version_{suffix} AFTER {op} ON webhooks BEGIN
+        UPDATE cache_versions SET version = version + 1 WHERE name = 'webhooks';
+    END"""
+    for suffix, op in (("ai", "INSERT"), ("au", "UPDATE OF events, is_active, batch_window_sec, batch_max_events"), ("ad", "DELETE"))
+]
+
+
+async def ensure_webhook_registry(db) -> None:
+    """Создать cache_versions + триггеры на webhooks (aiosqlite-соединение из миграций)."""
+    for ddl in WEBHOOKS_SCHEMA:
+        await db.execute(ddl)
+
+
+class WebhookRegistry:
+    """Подписки event → [webhook_id] и настройки пакетного режима в памяти процесса.
+
+    Свой процесс сбрасывает реестр сразу (``invalidate()`` из CRUD), чужой —
+    по версии в cache_versions, которую проверяем не чаще раза в
+    VERSION_CHECK_SECONDS. Между проверками fan-out события не читает БД.
+    """
+
+    VERSION_CHECK_SECONDS = 5.0
+
+    def __init__(self):
+        self._by_event: Optional[dict[str, list[int]]] = None
+        self._batching: dict[int, tuple[int, int]] = {}
+        self._version: Optional[int] = None
+        self._checked_at = float("-inf")
+
+    def invalidate(self) -> None:
+        self._by_event = None
+
+    async def subscribers(self, event: str) -> list[int]:
+        await self._refresh()
+        return self._by_event.get(event, [])
+
+    async def batching(self) -> dict[int, tuple[int, int]]:
+        """webhook_id → (окно в секундах, максимум событий) для вебхуков с пакетным режимом."""
+        await self._refresh()
+        return self._batching
+
+    async def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._by_event is None or now - self._checked_at >= self.VERSION_CHECK_SECONDS:
+            self._checked_at = now
+            # Своя сессия: в кэш попадает только закоммиченное, а не транзакция вызывающего
+            async with AsyncSessionLocal() as db:
+                version = (await db.execute(
+                    text("SELECT version FROM cache_versions WHERE name = 'webhooks'")
+                )).scalar()
+                if self._by_event is None or version != self._version:
+                    # Версию читаем до строк: изменение между ними лишь вызовет ещё одну перезагрузку
+                    self._by_event, self._batching = await self._load(db)
+                    self._version = version
+
+    @staticmethod
+    async def _load(db: AsyncSession) -> tuple[dict[str, list[int]], dict[int, tuple[int, int]]]:
+        result = await db.execute(
+            select(Webhook.id, Webhook.events, Webhook.batch_window_sec, Webhook.batch_max_events)
+            .where(Webhook.is_active == True)
+        )
+        by_event: dict[str, list[int]] = defaultdict(list)
+        batching: dict[int, tuple[int, int]] = {}
+        for webhook_id, events, window, max_events in result:
+            if window:
+                batching[webhook_id] = (window, max_events or BATCH_MAX_EVENTS)
+            try:
+                for event in json.loads(events):
+                    by_event[event].append(webhook_id)
+            except (TypeError, ValueError):
+                continue
+        logger.info("webhook_registry_loaded", events=len(by_event), batching=len(batching))
+        return dict(by_event), batching
+
+
+webhook_registry = WebhookRegistry()
+
+
+async def enqueue_webhook_event(db: AsyncSession, event: str, task_data: Dict[str, Any]) -> int:
+    """Положить доставки события в outbox в транзакции вызывающего.
+
+    Commit делает вызывающий: откат изменения задачи откатывает и вебхуки.
+    Для вебхука в пакетном режиме строка откладывается на окно — за это время
+    к ней присоединяются следующие события, и уходят они одним запросом.
+    После commit стоит вызвать ``notify_dispatcher()``, иначе строки подхватятся
+    в течение OUTBOX_POLL_SECONDS.
+    """
+    webhook_ids = await webhook_registry.subscribers(event)
+    if not webhook_ids:
+        return 0
+    batching = await webhook_registry.batching()
+    now = Clock.now()
+    body = json.dumps({"event": event, "task": task_data, "timestamp": now.isoformat()},
+                      ensure_ascii=False, default=str)
+    db.add_all([
+        WebhookOutbox(
+            webhook_id=webhook_id, event=event, payload=body,
+            next_attempt_at=now + timedelta(seconds=batching[webhook_id][0])
+            if webhook_id in batching else now,
+        )
+        for webhook_id in webhook_ids
+    ])
+    return len(webhook_ids)
 
 
 async def trigger_webhooks(event: str, task_data: Dict[str, Any]) -> None:
     """
     Trigger all webhooks for a given event.
-    
+
+    Для вызовов вне транзакции изменения: событие пишется в outbox отдельной записью.
+
     Args:
         event: Event name (task.created, task.status_changed, task.updated, task.deleted)
         task_data: Task data to send in the payload
     """
-    async with AsyncSessionLocal() as db:
-        # Find all active webhooks that subscribe to this event
-        from sqlalchemy import select
-        
-        result = await db.execute(
-            select(Webhook).where(Webhook.is_active == True)
+    async def _write(db):
+        return await enqueue_webhook_event(db, event, task_data)
+
+    if await run_write(_write):
+        notify_dispatcher()
+
+
+async def _trigger_single_webhook(
+    session: aiohttp.ClientSession,
+    url: str,
+    secret: Optional[str],
+    body: str,
+    batch_size: Optional[int] = None,
+) -> tuple[Optional[int], Optional[str], Optional[str]]:
+    """Одна попытка доставки: (status_code, response, error).
+
+    Для пакета body — JSON-массив событий, подпись считается по нему целиком.
+    """
+    headers = {"Content-Type": "application/json"}
+    if batch_size is not None:
+        headers["X-Webhook-Batch-Size"] = str(batch_size)
+    if secret:
+        headers["X-Webhook-Signature"] = _sign(secret, body)
+    try:
+        async with session.post(url, data=body.encode(), headers=headers) as resp:
+            try:
+                response = await resp.text()
+            except Exception:
+                response = None
+            error = None if 200 <= resp.status < 300 else f"HTTP {resp.status}"
+            return resp.status, response, error
+    except asyncio.TimeoutError:
+        return None, None, f"Timeout after {REQUEST_TIMEOUT_SECONDS}s"
+    except aiohttp.ClientError as e:
+        return None, None, f"Client error: {str(e)}"
+    except Exception as e:
+        return None, None, f"Error: {str(e)}"
+
+
+@dataclass
+class _Delivery:
+    ids: list[int]  # строки outbox; больше одной — пакет
+    webhook_id: int
+    url: str
+    secret: Optional[str]
+    event: str
+    payload: str
+    attempts: int
+    created: list[datetime]
+    batch: bool = False
+
+
+def _ready_batches(stats, batching: dict[int, tuple[int, int]], now: datetime) -> list[int]:
+    """Вебхуки, пакет которых пора отправлять: (webhook_id, count, min next_attempt_at) → ids."""
+    ready = []
+    for webhook_id, count, first_due in stats:
+        if isinstance(first_due, str):
+            first_due = datetime.fromisoformat(first_due)
+        if count >= batching[webhook_id][1] or (first_due is not None and first_due <= now):
+            ready.append(webhook_id)
+    return ready
+
+
+class WebhookDispatcher:
+    """Читает webhook_outbox и доставляет через пул воркеров с общей HTTP-сессией.
+
+    Один экземпляр на процесс API. Параллельность ограничена WEBHOOK_WORKERS
+    и WEBHOOK_PER_ENDPOINT на вебхук, неудачи повторяются с экспоненциальной
+    паузой и jitter, после WEBHOOK_MAX_ATTEMPTS строка помечается dead.
+    """
+
+    def __init__(self, workers: int, per_endpoint: int, max_attempts: int):
+        self.workers = workers
+        self.per_endpoint = per_endpoint
+        self.max_attempts = max_attempts
+        self._queue: asyncio.Queue | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._inflight: set[int] = set()
+        self._batch_inflight: set[int] = set()  # webhook_id: пакет вебхука уже в работе
+        self._limits: dict[int, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_endpoint)
         )
-        webhooks = result.scalars().all()
-        
-        for webhook in webhooks:
-            # Check if webhook subscribes to this event
+        self._deferred: dict[int, deque[_Delivery]] = defaultdict(deque)
+        self._session: aiohttp.ClientSession | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._lags_ms: deque[float] = deque(maxlen=1000)
+        self.stats = {"delivered": 0, "retried": 0, "dead": 0}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.workers * 4)
+        self._wakeup = asyncio.Event()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.workers * 2),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        )
+        self._tasks = [asyncio.create_task(self._poll())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info("webhook_dispatcher_started", workers=self.workers)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._inflight.clear()
+        self._batch_inflight.clear()
+        self._deferred.clear()
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def wake(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _poll(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await self._claim()
+            except Exception as e:
+                logger.error("webhook_outbox_poll_error", error=str(e))
             try:
-                events = json.loads(webhook.events)
-            except:
+                await asyncio.wait_for(self._wakeup.wait(), OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> None:
+        now = Clock.now()
+        batching = await webhook_registry.batching()
+        async with AsyncSessionLocal() as db:
+            query = (
+                select(WebhookOutbox, Webhook.url, Webhook.secret, Webhook.is_active)
+                .join(Webhook, Webhook.id == WebhookOutbox.webhook_id)
+                .where(WebhookOutbox.status == "pending", WebhookOutbox.next_attempt_at <= now)
+                .order_by(WebhookOutbox.next_attempt_at, WebhookOutbox.id)
+                .limit(CLAIM_BATCH + len(self._inflight))
+            )
+            if batching:
+                query = query.where(WebhookOutbox.webhook_id.not_in(list(batching)))
+            rows = (await db.execute(query)).all()
+            batches = await self._claim_batches(db, batching, now) if batching else []
+
+        disabled = [row.WebhookOutbox.id for row in rows if not row.is_active]
+        if disabled:
+            # Вебхук выключили — отложенные доставки в dead, а не копятся в pending
+            async def _write(db):
+                await db.execute(
+                    update(WebhookOutbox).where(WebhookOutbox.id.in_(disabled))
+                    .values(status="dead", last_error="Webhook disabled")
+                )
+
+            await run_write(_write)
+
+        for row in rows:
+            outbox = row.WebhookOutbox
+            if not row.is_active or outbox.id in self._inflight:
+                continue
+            self._inflight.add(outbox.id)
+            # Очередь ограничена — при медленных получателях поллер ждёт здесь
+            await self._queue.put(_Delivery(
+                ids=[outbox.id], webhook_id=outbox.webhook_id, url=row.url, secret=row.secret,
+                event=outbox.event, payload=outbox.payload, attempts=outbox.attempts,
+                created=[outbox.created_at],
+            ))
+        for delivery in batches:
+            self._inflight.update(delivery.ids)
+            await self._queue.put(delivery)
+
+    async def _claim_batches(self, db: AsyncSession, batching: dict[int, tuple[int, int]],
+                             now: datetime) -> list[_Delivery]:
+        """Пакеты вебхуков, у которых истекло окно старейшего события или набрался максимум.
+
+        В пакет идут и ещё не «созревшие» строки (attempts = 0): они ждали только окна.
+        Строки в паузе между ретраями остаются ждать своего next_attempt_at.
+        """
+        claimable = and_(
+            WebhookOutbox.status == "pending",
+            or_(WebhookOutbox.attempts == 0, WebhookOutbox.next_attempt_at <= now),
+        )
+        stats = (await db.execute(
+            select(WebhookOutbox.webhook_id, func.count(), func.min(WebhookOutbox.next_attempt_at))
+            .where(claimable, WebhookOutbox.webhook_id.in_(list(batching)))
+            .group_by(WebhookOutbox.webhook_id)
+        )).tuples().all()
+        deliveries = []
+        for webhook_id in _ready_batches(stats, batching, now):
+            if webhook_id in self._batch_inflight:
                 continue
-            
-            if event not in events:
+            rows = (await db.execute(
+                select(WebhookOutbox, Webhook.url, Webhook.secret)
+                .join(Webhook, Webhook.id == WebhookOutbox.webhook_id)
+                .where(claimable, WebhookOutbox.webhook_id == webhook_id)
+                .order_by(WebhookOutbox.id)
+                .limit(batching[webhook_id][1])
+            )).all()
+            if not rows:
                 continue
-            
-            # Trigger webhook asynchronously
-            asyncio.create_task(
-                _trigger_single_webhook(webhook, event, task_data)
-            )
+            outboxes = [row.WebhookOutbox for row in rows]
+            deliveries.append(_Delivery(
+                ids=[o.id for o in outboxes], webhook_id=webhook_id,
+                url=rows[0].url, secret=rows[0].secret, event="batch",
+                # payload каждой строки — готовый JSON-объект, склеиваем без перекодирования
+                payload="[" + ",".join(o.payload for o in outboxes) + "]",
+                attempts=max(o.attempts for o in outboxes),
+                created=[o.created_at for o in outboxes], batch=True,
+            ))
+            self._batch_inflight.add(webhook_id)
+        return deliveries
 
+    async def _worker(self) -> None:
+        while True:
+            delivery = await self._queue.get()
+            while delivery is not None:
+                limit = self._limits[delivery.webhook_id]
+                if limit.locked():
+                    # Вебхук занят — не держим воркер, доставку заберёт тот, кто освободит слот
+                    self._deferred[delivery.webhook_id].append(delivery)
+                    break
+                async with limit:
+                    await self._deliver(delivery)
+                deferred = self._deferred.get(delivery.webhook_id)
+                delivery = deferred.popleft() if deferred else None
 
-async def _trigger_single_webhook(
-    webhook: Webhook,
-    event: str,
-    task_data: Dict[str, Any]
-) -> None:
-    """Trigger a single webhook with retry logic."""
-    from app.core.db import AsyncSessionLocal
-    
-    # Build payload
-    payload = {
-        "event": event,
-        "task": task_data,
-        "timestamp": asyncio.get_event_loop().time() if asyncio.get_event_loop().is_running() else "N/A"
-    }
-    
-    # Sign payload if secret is set
-    signature = None
-    if webhook.secret:
-        signature = hmac.new(
-            webhook.secret.encode(),
-            json.dumps(payload).encode(),
-            hashlib.sha256
-        ).hexdigest()
-    
-    headers = {"Content-Type": "application/json"}
-    if signature:
-        headers["X-Webhook-Signature"] = signature
-    
-    # Retry logic: 3 attempts with exponential backoff (1s, 5s, 30s)
-    delays = [1, 5, 30]
-    
-    async with AsyncSessionLocal() as db:
-        for attempt, delay in enumerate(delays):
-            log_entry = WebhookLog(
-                webhook_id=webhook.id,
-                event=event,
+    async def _deliver(self, delivery: _Delivery) -> None:
+        try:
+            result = await _trigger_single_webhook(
+                self._session, delivery.url, delivery.secret, delivery.payload,
+                batch_size=len(delivery.ids) if delivery.batch else None,
             )
-            
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        webhook.url,
-                        json=payload,
-                        headers=headers,
-                        timeout=aiohttp.ClientTimeout(total=15)
-                    ) as resp:
-                        log_entry.status_code = resp.status
-                        try:
-                            log_entry.response = await resp.text()
-                        except:
-                            log_entry.response = None
-                        
-                        # Success - 2xx status
-                        if 200 <= resp.status < 300:
-                            webhook.last_triggered_at = log_entry.created_at
-                            db.add(log_entry)
-                            await db.commit()
-                            return  # Exit on success
-                        
-            except asyncio.TimeoutError:
-                log_entry.error = f"Timeout after 15s (attempt {attempt + 1}/3)"
-            except aiohttp.ClientError as e:
-                log_entry.error = f"Client error: {str(e)} (attempt {attempt + 1}/3)"
-            except Exception as e:
-                log_entry.error = f"Error: {str(e)} (attempt {attempt + 1}/3)"
-            
-            # Log failed attempt
-            db.add(log_entry)
-            await db.commit()
-            
-            # Wait before next attempt (except on last attempt)
-            if attempt < len(delays) - 1:
-                await asyncio.sleep(delay)
-        
-        # All attempts failed - log final failure
-        # The log was already added in the loop
-        pass
+            await self._record(delivery, *result)
+        except Exception as e:
+            logger.error("webhook_delivery_error", outbox_ids=delivery.ids, error=str(e))
+        finally:
+            self._inflight.difference_update(delivery.ids)
+            if delivery.batch:
+                self._batch_inflight.discard(delivery.webhook_id)
+
+    async def _record(self, delivery: _Delivery, status_code: Optional[int],
+                      response: Optional[str], error: Optional[str]) -> None:
+        now = Clock.now()
+        attempts = delivery.attempts + 1
+        dead = error is not None and attempts >= self.max_attempts
+
+        async def _write(db):
+            db.add(WebhookLog(
+                webhook_id=delivery.webhook_id, event=delivery.event,
+                status_code=status_code, response=response,
+                error=f"{error} (attempt {attempts}/{self.max_attempts})" if error else None,
+            ))
+            if error is None:
+                await db.execute(delete(WebhookOutbox).where(WebhookOutbox.id.in_(delivery.ids)))
+                await db.execute(
+                    update(Webhook).where(Webhook.id == delivery.webhook_id)
+                    .values(last_triggered_at=now)
+                )
+            else:
+                await db.execute(
+                    update(WebhookOutbox).where(WebhookOutbox.id.in_(delivery.ids)).values(
+                        attempts=attempts,
+                        last_error=error,
+                        status="dead" if dead else "pending",
+                        next_attempt_at=now + timedelta(seconds=_backoff(attempts)),
+                    )
+                )
+
+        await run_write(_write)
+        if error is None:
+            self.stats["delivered"] += len(delivery.ids)
+            self._lags_ms.extend((now - created).total_seconds() * 1000 for created in delivery.created)
+        elif dead:
+            self.stats["dead"] += len(delivery.ids)
+            logger.warning("webhook_dead_lettered", outbox_ids=delivery.ids,
+                           webhook_id=delivery.webhook_id, error=error)
+        else:
+            self.stats["retried"] += len(delivery.ids)
+
+    async def metrics(self, db: AsyncSession) -> dict:
+        """Очередь в БД + задержка доставки (created → доставлено) по последним 1000."""
+        counts = dict((await db.execute(
+            select(WebhookOutbox.status, func.count()).group_by(WebhookOutbox.status)
+        )).tuples().all())
+        oldest = (await db.execute(
+            select(func.min(WebhookOutbox.created_at)).where(WebhookOutbox.status == "pending")
+        )).scalar()
+        if isinstance(oldest, str):
+            oldest = datetime.fromisoformat(oldest)
+        lags = sorted(self._lags_ms)
+
+        def _pct(p: float) -> Optional[float]:
+            return round(lags[min(len(lags) - 1, int(len(lags) * p))], 1) if lags else None
+
+        return {
+            "running": self.running,
+            "pending": counts.get("pending", 0),
+            "dead": counts.get("dead", 0),
+            "in_flight": len(self._inflight),
+            "oldest_pending_sec": round((Clock.now() - oldest).total_seconds(), 1) if oldest else None,
+            "lag_p50_ms": _pct(0.5),
+            "lag_p95_ms": _pct(0.95),
+            **self.stats,
+        }
+
+
+dispatcher = WebhookDispatcher(
+    workers=settings.WEBHOOK_WORKERS,
+    per_endpoint=settings.WEBHOOK_PER_ENDPOINT,
+    max_attempts=settings.WEBHOOK_MAX_ATTEMPTS,
+)
+
+
+def notify_dispatcher() -> None:
+    """Разбудить диспетчер после commit (в процессе без диспетчера — no-op)."""
+    dispatcher.wake()
 
 
 async def trigger_task_created(task_data: Dict[str, Any]) -> None:
@@ -148,4 +513,4 @@ async def trigger_task_status_changed(
 
 async def trigger_task_deleted(task_data: Dict[str, Any]) -> None:
     """Trigger webhooks for task.deleted event."""
-    await trigger_webhooks("task.deleted", task_data)
\ No newline at end of file
+    await trigger_webhooks("task.deleted", task_data)
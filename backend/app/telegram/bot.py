@@ -3,7 +3,6 @@ import asyncio
 import re
 import os
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from app.config import settings
@@ -12,6 +11,7 @@ from app.core.db import AsyncSessionLocal
 from sqlalchemy import select
 from app.domain.models import AppSetting
 from app.telegram.middleware import UserTrackingMiddleware
+from app.telegram.fsm_storage import make_storage
 from app.telegram.handlers import (
     help_handlers,
     task_handlers,
@@ -25,6 +25,10 @@ from app.telegram.handlers.sprint_handlers import router as sprint_router
 from app.telegram.handlers.my_handler import router as my_router
 from app.telegram.handlers.remind_handler import router as remind_router
 from app.telegram.deadline_notifier import run_deadline_checker
+from app.telegram.heartbeat import run_heartbeat
+from app.services.snapshot_service import run_snapshot_job
+from app.services.projection_service import run_projection_job
+from app.services.reminder_service import run_reminder_scheduler
 
 logger = get_logger(__name__)
 
@@ -157,7 +161,7 @@ async def _make_bot_async() -> Bot:
 
 # Глобальные объекты — bot пересоздаётся в start_bot() уже с прокси
 # Здесь нужен объект для импорта хендлерами (dp, storage), bot — placeholder
-storage = MemoryStorage()
+storage = make_storage()  # FSM_STORAGE: fsm_states в SQLite (по умолчанию) или память
 dp = Dispatcher(storage=storage)
 
 # bot создаётся без прокси как placeholder для импортов на уровне модуля.
@@ -206,7 +210,7 @@ async def start_bot():
 
     logger.info("bot_token_loaded", source="db" if not settings.TELEGRAM_BOT_TOKEN else ".env")
 
-    from app.telegram.deadline_notifier import record_heartbeat_sync
+    from app.telegram.heartbeat import record_heartbeat_sync
     setup_handlers()
     logger.info("bot_starting")
     record_heartbeat_sync()
@@ -214,6 +218,9 @@ async def start_bot():
     # Пересоздаём bot с прокси (ProxyConnector требует запущенного event loop)
     old_bot = bot
     bot = await _make_bot_async()
+    # Все запросы к Bot API — через общую очередь с лимитами Telegram и retry_after
+    from app.telegram.send_queue import SendRateLimiter
+    bot.session.middleware(SendRateLimiter())
     try:
         await old_bot.session.close()
     except Exception:
@@ -232,6 +239,7 @@ async def start_bot():
             BotCommand(command="meetings", description="История встреч"),
             BotCommand(command="digest",   description="Еженедельный дайджест"),
             BotCommand(command="remind",   description="Напомнить о задаче: /remind 42 2h"),
+            BotCommand(command="reminders", description="Мои напоминания"),
             BotCommand(command="menu",     description="Главное меню"),
             BotCommand(command="help",     description="Справка по всем командам"),
         ]), timeout=15)
@@ -252,13 +260,44 @@ async def start_bot():
     except Exception as e:
         logger.warning("bot_username_save_failed", error=str(e))
 
+    heartbeat_task = None
     checker_task = None
+    snapshot_task = None
+    projection_task = None
+    reminder_task = None
     try:
+        heartbeat_task = asyncio.create_task(run_heartbeat(bot))
         checker_task = asyncio.create_task(run_deadline_checker(bot))
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        snapshot_task = asyncio.create_task(run_snapshot_job())
+        projection_task = asyncio.create_task(run_projection_job())
+        reminder_task = asyncio.create_task(run_reminder_scheduler(bot))
+        if settings.TELEGRAM_MODE == "webhook" and settings.TELEGRAM_WEBHOOK_URL:
+            from app.telegram.webhook import run_webhook
+            await run_webhook(dp, bot)
+        else:
+            if settings.TELEGRAM_MODE == "webhook":
+                logger.warning("webhook_url_missing", hint="Set TELEGRAM_WEBHOOK_URL; falling back to polling")
+            # getUpdates не работает, пока зарегистрирован webhook (после переключения режима)
+            try:
+                await asyncio.wait_for(bot.delete_webhook(), timeout=15)
+            except Exception as e:
+                logger.warning("delete_webhook_failed", error=str(e))
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        if heartbeat_task:
+            heartbeat_task.cancel()
         if checker_task:
             checker_task.cancel()
+        if snapshot_task:
+            snapshot_task.cancel()
+        if projection_task:
+            projection_task.cancel()
+        if reminder_task:
+            reminder_task.cancel()
+        from app.domain.events import event_store
+        await event_store.flush()
+        from app.telegram.middleware import user_tracker
+        await user_tracker.flush()
         await bot.session.close()
 
 
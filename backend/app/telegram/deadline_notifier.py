@@ -1,21 +1,67 @@
 """Deadline notification scheduler — runs alongside bot polling."""
 import asyncio
+import heapq
+import itertools
 from datetime import datetime, timezone, timedelta
+from typing import Optional
 from zoneinfo import ZoneInfo
 from sqlalchemy import select, text
-from sqlalchemy.orm import selectinload
-from app.core.db import AsyncSessionLocal
+from app.core.db import AsyncSessionLocal, run_write, schedule_write
 from app.core.clock import Clock
 from app.core.logging import get_logger
 from app.config import settings
-from app.domain.models import LocalAccount
+from app.domain.models import LocalAccount, NotificationPref
+from app.services.notification_service import MAX_LISTED
+from app.services.push_service import pref_enabled
+from app.telegram.send_queue import bulk_sends
 
 logger = get_logger(__name__)
 
 DEFAULT_NOTIFY_HOURS = [24, 3]
-CHECK_INTERVAL_MINUTES = 30
-
-_started_at: datetime | None = None
+# Как часто читать журнал deadline_changes; сами пороги срабатывают по таймеру кучи
+CHANGES_POLL_SECONDS = 5
+RETRY_SECONDS = 60
+# Темп и повторы после retry_after — в send_queue; здесь только число запросов в полёте
+SEND_CONCURRENCY = 8
+
+# Журнал изменений, влияющих на расписание уведомлений; читает DeadlineScheduler.
+# task_id NULL — сменились пороги deadline_notify_hours, нужна полная пересборка.
+DEADLINE_FEED_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS deadline_changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS deadline_changes_ai AFTER INSERT ON tasks
+        WHEN NEW.due_date IS NOT NULL BEGIN
+        INSERT INTO deadline_changes (task_id) VALUES (NEW.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS deadline_changes_au
+        AFTER UPDATE OF due_date, assignee_id, status, deleted, archived ON tasks
+        WHEN (NEW.due_date IS NOT NULL OR OLD.due_date IS NOT NULL)
+         AND (NEW.due_date IS NOT OLD.due_date OR NEW.assignee_id IS NOT OLD.assignee_id
+              OR NEW.status IS NOT OLD.status OR NEW.deleted IS NOT OLD.deleted
+              OR NEW.archived IS NOT OLD.archived) BEGIN
+        INSERT INTO deadline_changes (task_id) VALUES (NEW.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS deadline_changes_settings_ai AFTER INSERT ON app_settings
+        WHEN NEW.key = 'deadline_notify_hours' BEGIN
+        INSERT INTO deadline_changes (task_id) VALUES (NULL);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS deadline_changes_settings_au AFTER UPDATE ON app_settings
+        WHEN NEW.key = 'deadline_notify_hours' AND NEW.value IS NOT OLD.value BEGIN
+        INSERT INTO deadline_changes (task_id) VALUES (NULL);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS deadline_changes_settings_ad AFTER DELETE ON app_settings
+        WHEN OLD.key = 'deadline_notify_hours' BEGIN
+        INSERT INTO deadline_changes (task_id) VALUES (NULL);
+    END""",
+]
+
+
+async def ensure_deadline_feed(db) -> None:
+    """Создать deadline_changes + триггеры (aiosqlite-соединение из миграций)."""
+    for ddl in DEADLINE_FEED_SCHEMA:
+        await db.execute(ddl)
 
 
 async def _get_notify_hours() -> list[int]:
@@ -34,193 +80,330 @@ async def _get_notify_hours() -> list[int]:
     return DEFAULT_NOTIFY_HOURS
 
 
-def record_heartbeat_sync():
-    """Маркер времени старта — вызывается синхронно до event loop."""
-    global _started_at
-    if _started_at is None:
-        _started_at = Clock.now()
-
-
-async def record_heartbeat(username: str = ""):
-    """Записать heartbeat в БД — видно из любого процесса."""
-    global _started_at
-    now = Clock.now()
-    if _started_at is None:
-        _started_at = now
-
-    async with AsyncSessionLocal() as db:
-        await db.execute(text("""
-            INSERT OR REPLACE INTO bot_heartbeat (id, last_seen, username, started_at)
-            VALUES (1, :last_seen, :username, :started_at)
-        """), {"last_seen": now, "username": username, "started_at": _started_at})
-        await db.commit()
-
+def _plan_notifications(rows, sent: set, notify_hours: list[int], now: datetime,
+                        default_tz: str) -> list[dict]:
+    """Выбрать, что отправить: по задаче — самый срочный наступивший порог, если он ещё не отправлен.
+
+    Пропущенные более ранние пороги не досылаются: задаче за 2ч до дедлайна
+    приходит одно «через несколько часов», а не «завтра дедлайн» следом.
+    """
+    now_utc = now.replace(tzinfo=timezone.utc)
+    planned = []
+    seen = set()
+    for row in rows:
+        if row.id in seen:
+            continue  # у аккаунта несколько telegram-привязок — шлём на первую
+        seen.add(row.id)
+        try:
+            telegram_id = int(row.provider_user_id)
+        except (TypeError, ValueError):
+            continue
+
+        due_utc = row.due_date.replace(tzinfo=timezone.utc)
+        hours_left = (due_utc - now_utc).total_seconds() / 3600
+        passed = [h for h in notify_hours if hours_left <= h]
+        if not passed:
+            continue
+        threshold = min(passed)
+        if (row.id, threshold) in sent:
+            continue
 
-async def get_bot_status_from_db() -> dict:
-    """Читать статус бота из БД."""
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(
-            text("SELECT last_seen, username, started_at FROM bot_heartbeat WHERE id=1")
+        try:
+            user_tz = ZoneInfo(row.timezone or default_tz)
+        except Exception:
+            user_tz = ZoneInfo("UTC")
+        due_user_tz = due_utc.astimezone(user_tz)
+        tz_label = due_user_tz.strftime("%H:%M")
+        due_str = due_user_tz.strftime(f"%d.%m в {tz_label}")
+        urgency = "🔴 Через несколько часов!" if threshold <= 3 else "⚠️ Завтра дедлайн"
+
+        text_msg = (
+            f"{urgency}\n\n"
+            f"📋 *{row.title}*\n"
+            f"📅 Дедлайн: {due_str}\n"
+            f"⏰ Осталось: ~{int(hours_left)}ч\n"
         )
-        row = result.fetchone()
-
-    if not row:
-        return {"ok": False, "username": None, "last_seen": None,
-                "uptime_sec": None, "error": "Bot not started yet"}
-
-    last_seen, username, started_at = row
-    if isinstance(last_seen, str):
-        last_seen = datetime.fromisoformat(last_seen)
-    if isinstance(started_at, str):
-        started_at = datetime.fromisoformat(started_at)
-
-    now = Clock.now()
-    seconds_ago = (now - last_seen).total_seconds()
-    uptime = int((now - started_at).total_seconds()) if started_at else None
-
-    if seconds_ago > 90:
-        return {"ok": False, "username": username, "last_seen": last_seen.isoformat(),
-                "uptime_sec": uptime, "error": f"No heartbeat for {int(seconds_ago)}s"}
-    return {"ok": True, "username": username, "last_seen": last_seen.isoformat(),
-            "uptime_sec": uptime, "error": None}
-
-
-async def check_deadlines(bot):
-    """Проверить дедлайны и отправить уведомления."""
+        if row.project_id:
+            text_msg += f"\n[Открыть задачу]({settings.web_url}/?task={row.id})"
+
+        planned.append({
+            "task_id": row.id,
+            "threshold_hours": threshold,
+            "user_telegram_id": telegram_id,
+            "text": text_msg,
+            "line": f"{urgency.split()[0]} *{row.title}* — {due_str}",
+        })
+    return planned
+
+
+def _coalesce_messages(planned: list[dict]) -> list[tuple[int, str, list[dict]]]:
+    """Одно сообщение на получателя: (chat_id, текст, задачи в нём).
+
+    Несколько задач одному исполнителю в одном срабатывании (пачка правок из
+    журнала за CHANGES_POLL_SECONDS или общий дедлайн) — сводка вместо N сообщений.
+    """
+    by_chat: dict[int, list[dict]] = {}
+    for item in planned:
+        by_chat.setdefault(item["user_telegram_id"], []).append(item)
+    messages = []
+    for chat_id, items in by_chat.items():
+        if len(items) == 1:
+            text_msg = items[0]["text"]
+        else:
+            lines = [item["line"] for item in items[:MAX_LISTED]]
+            if len(items) > MAX_LISTED:
+                lines.append(f"…и ещё {len(items) - MAX_LISTED}")
+            text_msg = f"⏰ Дедлайны: {len(items)} задач\n\n" + "\n".join(lines)
+            text_msg += f"\n\n[Открыть задачи]({settings.web_url}/)"
+        messages.append((chat_id, text_msg, items))
+    return messages
+
+
+async def _send_planned(bot, planned: list[dict]) -> list[dict]:
+    """Отправка сводками по получателю, не больше SEND_CONCURRENCY запросов одновременно.
+
+    Рассылка идёт с приоритетом BULK: ответы пользователям в очереди send_queue её обгоняют.
+    """
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+    async def _send(chat_id: int, text_msg: str, items: list[dict]):
+        async with semaphore:
+            try:
+                await bot.send_message(chat_id=chat_id, text=text_msg, parse_mode="Markdown")
+            except Exception as e:
+                logger.warning("deadline_notification_failed",
+                               task_ids=[item["task_id"] for item in items], error=str(e))
+                return []
+            return items
+
+    with bulk_sends():
+        results = await asyncio.gather(*(_send(*message) for message in _coalesce_messages(planned)))
+    return [item for items in results for item in items]
+
+
+async def check_deadlines(bot, task_ids: Optional[list[int]] = None,
+                          notify_hours: Optional[list[int]] = None):
+    """Проверить дедлайны и отправить уведомления.
+
+    Три запроса: задачи вместе с telegram-привязкой и таймзоной исполнителя
+    (кому уведомления о дедлайнах выключены в notification_prefs — отсеиваются), уже отправленные пороги по этим задачам и один INSERT отправленного в конце.
+    ``task_ids`` — проверить только эти задачи (их передаёт DeadlineScheduler).
+    """
     from app.domain.models import Task, DeadlineNotification, UserIdentity, AppSetting
 
-    notify_hours = await _get_notify_hours()
+    if notify_hours is None:
+        notify_hours = await _get_notify_hours()
     if not notify_hours:
         return
 
     now = Clock.now()
+    window_end = now + timedelta(hours=max(notify_hours) + 1)
+    # IS NOT вместо "= 0": флаги не индексируемы, и планировщик берёт диапазон
+    # по ix_tasks_due_date, а не ix_tasks_digest_assignee (полный проход по задачам)
+    due_filter = (
+        Task.due_date != None,
+        Task.due_date <= window_end,
+        Task.due_date > now,
+        Task.status.notin_(["DONE", "CANCELLED"]),
+        Task.deleted.is_not(True),
+        Task.archived.is_not(True),
+        Task.assignee_id != None,
+    )
+    if task_ids is not None:
+        due_filter += (Task.id.in_(task_ids),)
 
     async with AsyncSessionLocal() as db:
-        window_end = now + timedelta(hours=max(notify_hours) + 1)
-        result = await db.execute(
-            select(Task)
-            .options(selectinload(Task.assignee))
-            .where(
-                Task.due_date != None,
-                Task.due_date <= window_end,
-                Task.due_date > now,
-                Task.status.notin_(["DONE", "CANCELLED"]),
-                Task.deleted == False,
-                Task.archived == False,
-                Task.assignee_id != None,
-            )
-        )
-        tasks = result.scalars().all()
-
-        for task in tasks:
-            if not task.assignee_id:
-                continue
-            
-            # Find telegram_id through UserIdentity
-            identity_result = await db.execute(
-                select(UserIdentity).where(
-                    UserIdentity.local_account_id == task.assignee_id,
-                    UserIdentity.provider == "telegram",
-                )
+        rows = (await db.execute(
+            select(
+                Task.id, Task.title, Task.project_id, Task.due_date,
+                UserIdentity.provider_user_id, LocalAccount.timezone,
             )
-            identity = identity_result.scalar_one_or_none()
-            if not identity:
-                continue
-            
-            telegram_id = int(identity.provider_user_id)
-
-            # Get user's timezone for displaying deadline
-            account_result = await db.execute(
-                select(LocalAccount).where(LocalAccount.id == task.assignee_id)
-            )
-            account = account_result.scalar_one_or_none()
-            user_tz_str = account.timezone if account and account.timezone else None
-
-            # Fallback: system default from AppSettings
-            if not user_tz_str:
-                try:
-                    sys_result = await db.execute(
-                        select(AppSetting.value).where(AppSetting.key == "default_timezone")
-                    )
-                    user_tz_str = sys_result.scalar_one_or_none()
-                except Exception:
-                    pass
-                user_tz_str = user_tz_str or "UTC"
+            .join(UserIdentity, (UserIdentity.local_account_id == Task.assignee_id)
+                  & (UserIdentity.provider == "telegram"))
+            .join(LocalAccount, LocalAccount.id == Task.assignee_id)
+            .outerjoin(NotificationPref, NotificationPref.account_id == Task.assignee_id)
+            .where(*due_filter, pref_enabled("deadlines"))
+            .order_by(Task.due_date, Task.id, UserIdentity.id)
+        )).all()
+        if not rows:
+            return
+
+        sent = {(task_id, threshold) for task_id, threshold in await db.execute(
+            select(DeadlineNotification.task_id, DeadlineNotification.threshold_hours)
+            .where(DeadlineNotification.task_id.in_(select(Task.id).where(*due_filter)))
+        )}
+
+        default_tz = (await db.execute(
+            select(AppSetting.value).where(AppSetting.key == "default_timezone")
+        )).scalar_one_or_none() or "UTC"
+
+    planned = _plan_notifications(rows, sent, notify_hours, now, default_tz)
+    if not planned:
+        return
 
+    delivered = await _send_planned(bot, planned)
+    if not delivered:
+        return
+
+    records = [
+        {
+            "task_id": item["task_id"],
+            "threshold_hours": item["threshold_hours"],
+            "user_telegram_id": item["user_telegram_id"],
+            "sent_at": now,
+        }
+        for item in delivered
+    ]
+
+    async def _write(db):
+        # Core-insert одним executemany — без ORM-обработки строк
+        await db.execute(DeadlineNotification.__table__.insert(), records)
+
+    await run_write(_write)
+    logger.info("deadline_notifications_sent", candidates=len(rows),
+                planned=len(planned), sent=len(delivered))
+
+
+class DeadlineScheduler:
+    """Куча (момент срабатывания, задача) вместо опроса окна дедлайнов раз в 30 минут.
+
+    При старте заполняется предстоящими дедлайнами, дальше читает deadline_changes —
+    журнал, который пишут триггеры на tasks, поэтому правки из API, бота и TaskService
+    видны одинаково. Устаревшие записи кучи не удаляются, а отбрасываются по версии задачи.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.notify_hours: list[int] = []
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._versions: dict[int, int] = {}
+        self._seq = itertools.count(1)
+        self._last_change_id = 0
+
+    def schedule(self, task_id: int, due_date: Optional[datetime], now: datetime) -> None:
+        """Перепланировать задачу; ``due_date=None`` — снять с расписания."""
+        if due_date is None or due_date <= now:
+            self._versions.pop(task_id, None)
+            return
+        version = self._versions[task_id] = next(self._seq)
+        # Прошедшие пороги схлопываются в одно срабатывание «сейчас»
+        fire_times = {max(due_date - timedelta(hours=h), now) for h in self.notify_hours}
+        for fire_at in fire_times:
+            heapq.heappush(self._heap, (fire_at, task_id, version))
+
+    def pop_due(self, now: datetime) -> list[int]:
+        """Снять с кучи задачи, чей порог наступил (без устаревших записей)."""
+        task_ids = set()
+        while self._heap and self._heap[0][0] <= now:
+            _, task_id, version = heapq.heappop(self._heap)
+            if self._versions.get(task_id) == version:
+                task_ids.add(task_id)
+        return sorted(task_ids)
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        while self._heap and self._versions.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    async def _load(self, db, task_ids: Optional[list[int]] = None) -> dict[int, Optional[datetime]]:
+        from app.domain.models import Task
+
+        query = select(Task.id, Task.due_date).where(
+            Task.due_date > Clock.now(),
+            Task.status.notin_(["DONE", "CANCELLED"]),
+            Task.deleted.is_not(True),
+            Task.archived.is_not(True),
+            Task.assignee_id != None,
+        )
+        if task_ids is not None:
+            query = query.where(Task.id.in_(task_ids))
+        return dict((await db.execute(query)).tuples().all())
+
+    async def seed(self) -> None:
+        """Заполнить кучу заново: при старте и при смене deadline_notify_hours."""
+        self.notify_hours = await _get_notify_hours()
+        self._heap.clear()
+        self._versions.clear()
+        async with AsyncSessionLocal() as db:
+            self._last_change_id = (await db.execute(
+                text("SELECT coalesce(max(id), 0) FROM deadline_changes")
+            )).scalar()
+            upcoming = await self._load(db)
+        now = Clock.now()
+        for task_id, due_date in upcoming.items():
+            self.schedule(task_id, due_date, now)
+        self._prune()
+        logger.info("deadline_scheduler_seeded", tasks=len(upcoming), entries=len(self._heap))
+
+    async def poll_changes(self) -> None:
+        """Применить новые записи deadline_changes (дёшево: поиск по PK)."""
+        async with AsyncSessionLocal() as db:
+            changes = (await db.execute(
+                text("SELECT id, task_id FROM deadline_changes WHERE id > :last ORDER BY id"),
+                {"last": self._last_change_id},
+            )).all()
+            if not changes:
+                return
+            self._last_change_id = changes[-1][0]
+            task_ids = sorted({task_id for _, task_id in changes if task_id is not None})
+            reseed = any(task_id is None for _, task_id in changes)
+            if not reseed:
+                upcoming = {}
+                for i in range(0, len(task_ids), 500):
+                    upcoming.update(await self._load(db, task_ids[i:i + 500]))
+        if reseed:
+            await self.seed()
+            return
+        now = Clock.now()
+        for task_id in task_ids:
+            self.schedule(task_id, upcoming.get(task_id), now)
+        self._prune()
+
+    def _prune(self) -> None:
+        last = self._last_change_id
+
+        async def _write(db):
+            await db.execute(text("DELETE FROM deadline_changes WHERE id <= :last"), {"last": last})
+
+        schedule_write(_write)
+
+    async def fire_due(self) -> None:
+        now = Clock.now()
+        task_ids = self.pop_due(now)
+        for i in range(0, len(task_ids), 500):
+            chunk = task_ids[i:i + 500]
             try:
-                user_tz = ZoneInfo(user_tz_str)
-            except Exception:
-                user_tz = ZoneInfo("UTC")
-
-            due_utc = task.due_date.replace(tzinfo=timezone.utc)
-            due_user_tz = due_utc.astimezone(user_tz)
-            hours_left = (due_utc - now.replace(tzinfo=timezone.utc)).total_seconds() / 3600
-
-            for threshold in notify_hours:
-                if hours_left <= threshold:
-                    notif_result = await db.execute(
-                        select(DeadlineNotification).where(
-                            DeadlineNotification.task_id == task.id,
-                            DeadlineNotification.threshold_hours == threshold,
-                        )
-                    )
-                    if notif_result.scalar_one_or_none():
-                        continue
-
-                    tz_label = due_user_tz.strftime("%H:%M")
-                    due_str = due_user_tz.strftime(f"%d.%m в {tz_label}")
-                    urgency = "🔴 Через несколько часов!" if threshold <= 3 else "⚠️ Завтра дедлайн"
-
-                    text_msg = (
-                        f"{urgency}\n\n"
-                        f"📋 *{task.title}*\n"
-                        f"📅 Дедлайн: {due_str}\n"
-                        f"⏰ Осталось: ~{int(hours_left)}ч\n"
-                    )
-                    if task.project_id:
-                        text_msg += f"\n[Открыть задачу]({settings.web_url}/?task={task.id})"
-
-                    try:
-                        await bot.send_message(
-                            chat_id=telegram_id,
-                            text=text_msg,
-                            parse_mode="Markdown",
-                        )
-                        db.add(DeadlineNotification(
-                            task_id=task.id,
-                            threshold_hours=threshold,
-                            sent_at=now.replace(tzinfo=None),
-                            user_telegram_id=telegram_id,
-                        ))
-                        await db.commit()
-                        logger.info("deadline_notification_sent",
-                                    task_id=task.id, threshold=threshold,
-                                    user=telegram_id)
-                    except Exception as e:
-                        logger.warning("deadline_notification_failed",
-                                       task_id=task.id, error=str(e))
-                    break
+                await check_deadlines(self.bot, chunk, self.notify_hours)
+            except Exception as e:
+                logger.error("deadline_checker_error", error=str(e))
+                retry_at = Clock.now() + timedelta(seconds=RETRY_SECONDS)
+                for task_id in chunk:
+                    if task_id in self._versions:
+                        heapq.heappush(self._heap, (retry_at, task_id, self._versions[task_id]))
 
 
 async def run_deadline_checker(bot):
-    """Запускаем бесконечный цикл проверки дедлайнов + heartbeat."""
-    try:
-        me = await bot.get_me()
-        username = me.username or ""
-    except Exception:
-        username = ""
-
-    await record_heartbeat(username)
-    logger.info("deadline_checker_started", username=username,
-                interval_min=CHECK_INTERVAL_MINUTES)
+    """Планировщик уведомлений о дедлайнах."""
+    scheduler = DeadlineScheduler(bot)
+    while True:
+        try:
+            await scheduler.seed()
+            break
+        except Exception as e:
+            logger.error("deadline_checker_error", error=str(e))
+            await asyncio.sleep(RETRY_SECONDS)
+    logger.info("deadline_checker_started", poll_sec=CHANGES_POLL_SECONDS)
 
-    await asyncio.sleep(60)
     while True:
-        await record_heartbeat(username)
         try:
-            await check_deadlines(bot)
+            await scheduler.poll_changes()
+            await scheduler.fire_due()
         except Exception as e:
             logger.error("deadline_checker_error", error=str(e))
-        for _ in range(CHECK_INTERVAL_MINUTES * 2):
-            await asyncio.sleep(30)
-            await record_heartbeat(username)
+        wait = CHANGES_POLL_SECONDS
+        until_next = scheduler.seconds_until_next(Clock.now())
+        if until_next is not None:
+            wait = min(wait, until_next)
+        await asyncio.sleep(wait)
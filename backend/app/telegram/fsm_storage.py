@@ -0,0 +1,218 @@
+"""FSM-хранилище бота в SQLite: горячий кэш в памяти, склейка записей, TTL диалогов."""
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import text
+
+from app.core.db import AsyncSessionLocal, run_write, schedule_write
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+FSM_FLUSH_SECONDS = 0.2  # окно склейки: шаги диалога за него уходят одной записью
+FSM_CACHE_CAPACITY = 10_000  # ключей в LRU (включая «пустые» — чтобы не читать БД на каждый апдейт)
+FSM_SWEEP_SECONDS = 3600  # как часто удалять из таблицы брошенные диалоги
+
+FSM_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS fsm_states (
+        key TEXT PRIMARY KEY,
+        state TEXT,
+        data TEXT NOT NULL DEFAULT '{}',
+        updated_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_fsm_states_updated_at ON fsm_states (updated_at)",
+]
+
+
+async def ensure_fsm_states(db) -> None:
+    """Создать fsm_states (aiosqlite-соединение из миграций)."""
+    for ddl in FSM_SCHEMA:
+        await db.execute(ddl)
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    updated_at: float = 0.0  # time.time() последней записи; по нему считается TTL
+
+    @property
+    def empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище aiogram поверх таблицы fsm_states.
+
+    Чтения идут из LRU-кэша: FSM-middleware запрашивает состояние на каждый
+    апдейт, и для известного ключа это обращение к dict без БД. Промах —
+    один SELECT по PK, результат (в том числе «нет диалога») кэшируется.
+    Записи меняют кэш сразу, а в БД уходят пачкой раз в FSM_FLUSH_SECONDS
+    через очередь записи: set_state + update_data одного шага — один upsert.
+    Диалог без изменений дольше ``ttl`` считается брошенным и сбрасывается.
+
+    ``cache=False`` — для нескольких процессов бота на одной БД: каждое чтение
+    идёт в таблицу (кроме ещё не записанных изменений своего процесса).
+    """
+
+    def __init__(
+        self,
+        ttl: float = 24 * 3600,
+        cache: bool = True,
+        flush_interval: float = FSM_FLUSH_SECONDS,
+        capacity: int = FSM_CACHE_CAPACITY,
+    ):
+        self.ttl = ttl
+        self.cache = cache
+        self.flush_interval = flush_interval
+        self.capacity = capacity
+        self._records: OrderedDict[str, _Record] = OrderedDict()
+        self._dirty: set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._swept_at = time.time()
+
+    @staticmethod
+    def _key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    def _expired(self, record: _Record, now: float) -> bool:
+        return not record.empty and now - record.updated_at > self.ttl
+
+    async def _load(self, k: str) -> _Record:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                text("SELECT state, data, updated_at FROM fsm_states WHERE key = :key"), {"key": k}
+            )).first()
+        if row is None:
+            return _Record()
+        return _Record(state=row.state, data=json.loads(row.data), updated_at=row.updated_at)
+
+    async def _record(self, key: StorageKey) -> _Record:
+        k = self._key(key)
+        record = self._records.get(k)
+        if record is None or (not self.cache and k not in self._dirty):
+            loaded = await self._load(k)
+            # Пока шёл SELECT, ключ мог записать другой апдейт — его версия новее
+            record = self._records.get(k) if k in self._dirty else None
+            if record is None:
+                record = loaded
+                self._records[k] = record
+        self._records.move_to_end(k)
+        if self._expired(record, time.time()):
+            record.state, record.data = None, {}
+            self._dirty.add(k)
+            self._schedule()
+        self._evict()
+        return record
+
+    def _evict(self) -> None:
+        # Вытесняем только записанные в БД ключи; несохранённые ждут flush
+        while len(self._records) > self.capacity:
+            for k in self._records:
+                if k not in self._dirty:
+                    del self._records[k]
+                    break
+            else:
+                return
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.flush_interval, self._flush)
+
+    async def _write(self, key: StorageKey) -> _Record:
+        record = await self._record(key)
+        record.updated_at = time.time()
+        self._dirty.add(self._key(key))
+        self._schedule()
+        return record
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._write(key)
+        record.state = state.state if isinstance(state, State) else state
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._record(key)).state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._write(key)
+        record.data = data.copy()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._record(key)).data.copy()
+
+    def _take(self) -> Optional[Any]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        dirty, self._dirty = self._dirty, set()
+        upserts, deletes = [], []
+        for k in dirty:
+            record = self._records.get(k)
+            if record is None or record.empty:
+                deletes.append({"key": k})
+            else:
+                upserts.append({
+                    "key": k,
+                    "state": record.state,
+                    "data": json.dumps(record.data, ensure_ascii=False, default=str),
+                    "updated_at": record.updated_at,
+                })
+            if not self.cache and record is not None:
+                del self._records[k]
+        now = time.time()
+        cutoff = None
+        if now - self._swept_at > FSM_SWEEP_SECONDS:
+            self._swept_at = now
+            cutoff = now - self.ttl
+        if not (upserts or deletes or cutoff):
+            return None
+
+        async def _writer(db):
+            if upserts:
+                await db.execute(text(
+                    "INSERT INTO fsm_states (key, state, data, updated_at) "
+                    "VALUES (:key, :state, :data, :updated_at) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, "
+                    "updated_at = excluded.updated_at"
+                ), upserts)
+            if deletes:
+                await db.execute(text("DELETE FROM fsm_states WHERE key = :key"), deletes)
+            if cutoff is not None:
+                swept = await db.execute(
+                    text("DELETE FROM fsm_states WHERE updated_at < :cutoff"), {"cutoff": cutoff}
+                )
+                if swept.rowcount:
+                    logger.info("fsm_states_expired", count=swept.rowcount)
+
+        return _writer
+
+    def _flush(self) -> None:
+        writer = self._take()
+        if writer is not None:
+            schedule_write(writer)
+
+    async def flush(self) -> None:
+        """Записать накопленные изменения и дождаться commit."""
+        writer = self._take()
+        if writer is not None:
+            await run_write(writer)
+
+    async def close(self) -> None:
+        # Dispatcher вызывает при остановке polling
+        await self.flush()
+
+
+def make_storage() -> BaseStorage:
+    """Хранилище FSM по настройке FSM_STORAGE."""
+    from app.config import settings
+
+    if settings.FSM_STORAGE == "memory":
+        from aiogram.fsm.storage.memory import MemoryStorage
+        return MemoryStorage()
+    return SQLiteStorage(ttl=settings.FSM_TTL_HOURS * 3600, cache=settings.FSM_CACHE)
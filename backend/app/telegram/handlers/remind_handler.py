@@ -1,12 +1,10 @@
-"""Handler for /remind command — reminder for a specific task."""
-import asyncio
-from datetime import datetime, timezone, timedelta
+"""Handlers for /remind, /reminders, /unremind — reminders for a specific task."""
+from datetime import timedelta
 from app.core.clock import Clock
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 from app.core.logging import get_logger
-from app.config import settings
 
 router = Router()
 logger = get_logger(__name__)
@@ -19,9 +17,12 @@ HELP_TEXT = (
     "`/remind 42 30m` — через 30 минут\n"
     "`/remind 42 2h` — через 2 часа\n"
     "`/remind 42 1d` — через 1 день\n"
-    "`/remind 42 18:00` — сегодня в 18:00 (UTC+3)\n"
+    "`/remind 42 18:00` — сегодня в 18:00 (UTC+3)\n\n"
+    "`/reminders` — ваши напоминания, `/unremind <номер>` — отменить\n"
 )
 
+MSK = timedelta(hours=3)
+
 
 def _parse_delay(arg: str) -> int | None:
     """Парсим строку задержки → секунды. None если не распознано."""
@@ -51,9 +52,9 @@ def _parse_delay(arg: str) -> int | None:
 async def cmd_remind(message: Message):
     """Установить напоминание: /remind <task_id> <время>"""
     from sqlalchemy import select
-    from app.core.db import AsyncSessionFactory
+    from app.core.db import AsyncSessionLocal
     from app.domain.models import Task
-    from app.telegram.bot import bot
+    from app.services.reminder_service import ReminderService, wake_scheduler
 
     args = (message.text or "").split(maxsplit=2)[1:]
 
@@ -80,16 +81,24 @@ async def cmd_remind(message: Message):
         await message.answer("❌ Максимальный срок напоминания — 30 дней.")
         return
 
-    # Получаем задачу
-    async with AsyncSessionFactory() as db:
+    chat_id = message.chat.id
+    async with AsyncSessionLocal() as db:
         result = await db.execute(
             select(Task).where(Task.id == task_id, Task.deleted == False)
         )
         task = result.scalar_one_or_none()
-
-    if not task:
-        await message.answer(f"❌ Задача #{task_id} не найдена.")
-        return
+        if not task:
+            await message.answer(f"❌ Задача #{task_id} не найдена.")
+            return
+        task_title = task.title
+        reminder = await ReminderService.create(
+            db, task_id, chat_id,
+            remind_at=Clock.now() + timedelta(seconds=delay_sec),
+            created_by=message.from_user.id if message.from_user else None,
+        )
+        reminder_id = reminder.id
+        await db.commit()
+    wake_scheduler()
 
     # Форматируем время
     if delay_sec < 3600:
@@ -101,29 +110,56 @@ async def cmd_remind(message: Message):
     else:
         human = f"{delay_sec // 86400} дн"
 
-    chat_id = message.chat.id
-    task_title = task.title
-
     await message.answer(
         f"✅ Напомню о задаче *#{task_id}* через *{human}*\n"
-        f"📋 {task_title}"
+        f"📋 {task_title}\n"
+        f"Отменить: `/unremind {reminder_id}`"
     )
+    logger.info("reminder_set", task_id=task_id, delay_sec=delay_sec, chat_id=chat_id,
+                reminder_id=reminder_id)
+
+
+@router.message(Command("reminders"))
+async def cmd_reminders(message: Message):
+    """Список напоминаний этого чата."""
+    from datetime import datetime
+    from app.core.db import AsyncSessionLocal
+    from app.services.reminder_service import ReminderService
+
+    async with AsyncSessionLocal() as db:
+        reminders = await ReminderService.list_pending(db, chat_id=message.chat.id)
 
-    # Запускаем asyncio task с задержкой
-    async def _send_reminder():
-        await asyncio.sleep(delay_sec)
-        try:
-            await bot.send_message(
-                chat_id=chat_id,
-                text=(
-                    f"⏰ *Напоминание!*\n\n"
-                    f"📋 *#{task_id} {task_title}*\n"
-                    f"[Открыть задачу]({settings.web_url}/?task={task_id})"
-                ),
-                parse_mode="Markdown",
-            )
-        except Exception as e:
-            logger.warning("remind_send_failed", task_id=task_id, error=str(e))
-
-    asyncio.create_task(_send_reminder())
-    logger.info("reminder_set", task_id=task_id, delay_sec=delay_sec, chat_id=chat_id)
+    if not reminders:
+        await message.answer("⏰ Напоминаний нет.\n\n" + HELP_TEXT)
+        return
+
+    lines = ["⏰ *Напоминания* (время МСК)\n"]
+    for r in reminders:
+        at = datetime.fromisoformat(r["remind_at"]) + MSK
+        lines.append(f"`{r['id']}` · {at.strftime('%d.%m %H:%M')} · #{r['task_id']} {r['task_title']}")
+    lines.append("\nОтменить: `/unremind <номер>`")
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("unremind"))
+async def cmd_unremind(message: Message):
+    """Отменить напоминание: /unremind <номер>"""
+    from app.core.db import AsyncSessionLocal
+    from app.services.reminder_service import ReminderService
+
+    args = (message.text or "").split()[1:]
+    try:
+        reminder_id = int(args[0])
+    except (IndexError, ValueError):
+        await message.answer("Использование: `/unremind <номер>` — номер из `/reminders`")
+        return
+
+    async with AsyncSessionLocal() as db:
+        cancelled = await ReminderService.cancel(db, reminder_id, chat_id=message.chat.id)
+        await db.commit()
+
+    if cancelled:
+        logger.info("reminder_cancelled", reminder_id=reminder_id, chat_id=message.chat.id)
+        await message.answer(f"🗑 Напоминание `{reminder_id}` отменено.")
+    else:
+        await message.answer(f"❌ Напоминание `{reminder_id}` не найдено.")
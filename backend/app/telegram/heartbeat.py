@@ -0,0 +1,251 @@
+"""Heartbeat бота: mmap-файл для API (без БД), в bot_heartbeat — редко и при смене состояния."""
+import asyncio
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal, run_write
+from app.core.logging import get_logger
+from app.telegram.send_queue import send_scheduler
+
+logger = get_logger(__name__)
+
+HEARTBEAT_SECONDS = 5  # как часто бот обновляет файл
+HEARTBEAT_PERSIST_SECONDS = 600  # как часто копия уходит в bot_heartbeat (плюс при старте и смене username)
+STALE_SECONDS = 90  # дольше без heartbeat — бот считается недоступным
+
+_MAGIC = b"TFHB"
+# magic, seq (seqlock: нечётный — идёт запись), last_seen, started_at (unix), pid, username, длина payload
+_HEADER = struct.Struct("<4sQddI64sH")
+_PAYLOAD_MAX = 4096  # JSON метрик (send_queue)
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 4
+FILE_SIZE = _HEADER.size + _PAYLOAD_MAX
+
+_started_at: Optional[datetime] = None
+
+
+def heartbeat_path() -> str:
+    """Файл рядом с SQLite-базой (у бота и API он общий), иначе во временной папке."""
+    if settings.BOT_HEARTBEAT_FILE:
+        return settings.BOT_HEARTBEAT_FILE
+    url = settings.DATABASE_URL
+    if "sqlite" in url and ":///" in url:
+        db_path = url.split(":///", 1)[1]
+        return os.path.join(os.path.dirname(db_path) or ".", "bot_heartbeat.mmap")
+    return os.path.join(tempfile.gettempdir(), "teamflow_bot_heartbeat.mmap")
+
+
+def _to_datetime(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+def _to_ts(dt: datetime) -> float:
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class HeartbeatFile:
+    """Запись фиксированного размера в mmap-файле: пишет один процесс, читают любые.
+
+    Писатель обновляет её через seqlock (seq нечётный на время записи),
+    читатель повторяет чтение, если seq изменился, — блокировок и fsync нет,
+    обновление и чтение — микросекунды.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._inode: Optional[int] = None
+        self._seq = 0
+
+    def _open_writer(self) -> mmap.mmap:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, FILE_SIZE)
+            mm = mmap.mmap(fd, FILE_SIZE)
+        finally:
+            os.close(fd)
+        self._seq = _SEQ.unpack_from(mm, _SEQ_OFFSET)[0] & ~1
+        return mm
+
+    def write(self, last_seen: float, started_at: float, username: str, payload: bytes = b"") -> None:
+        if self._mm is None:
+            self._mm = self._open_writer()
+        if len(payload) > _PAYLOAD_MAX:
+            payload = b""  # обрезанный JSON не прочитать — лучше без метрик
+        self._seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, self._seq, last_seen, started_at, os.getpid(),
+                          username.encode()[:64], len(payload))
+        self._mm[_HEADER.size:_HEADER.size + len(payload)] = payload
+        self._seq += 1
+        _SEQ.pack_into(self._mm, _SEQ_OFFSET, self._seq)
+
+    def read(self) -> Optional[dict]:
+        """Последняя запись или None (файла нет / бот ещё не писал)."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            self.close()
+            return None
+        if self._mm is None or inode != self._inode:
+            self.close()
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < FILE_SIZE:
+                    return None
+                self._mm = mmap.mmap(f.fileno(), FILE_SIZE, access=mmap.ACCESS_READ)
+            self._inode = inode
+        for _ in range(100):
+            data = self._mm[:FILE_SIZE]
+            magic, seq, last_seen, started_at, pid, username, length = _HEADER.unpack_from(data)
+            if magic != _MAGIC:
+                return None
+            if seq % 2 == 0 and _SEQ.unpack_from(self._mm, _SEQ_OFFSET)[0] == seq:
+                payload = data[_HEADER.size:_HEADER.size + length]
+                return {
+                    "last_seen": last_seen,
+                    "started_at": started_at,
+                    "pid": pid,
+                    "username": username.rstrip(b"\0").decode(errors="replace"),
+                    "payload": json.loads(payload) if payload else None,
+                }
+        return None
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._inode = None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Heartbeat:
+    """Сторона бота: файл — на каждый beat, БД — раз в HEARTBEAT_PERSIST_SECONDS и при смене username."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.file = HeartbeatFile(path or heartbeat_path())
+        self._persisted_at: Optional[float] = None
+        self._persisted_username: Optional[str] = None
+
+    async def beat(self, username: str = "") -> None:
+        global _started_at
+        now = Clock.now()
+        if _started_at is None:
+            _started_at = now
+        send_queue = send_scheduler.snapshot()
+        try:
+            self.file.write(_to_ts(now), _to_ts(_started_at), username, json.dumps(send_queue).encode())
+        except OSError as e:
+            logger.warning("heartbeat_file_failed", path=self.file.path, error=str(e))
+        if (self._persisted_at is None or username != self._persisted_username
+                or time.monotonic() - self._persisted_at >= HEARTBEAT_PERSIST_SECONDS):
+            await persist_heartbeat(username, send_queue)
+            self._persisted_at = time.monotonic()
+            self._persisted_username = username
+
+
+def record_heartbeat_sync():
+    """Маркер времени старта — вызывается синхронно до event loop."""
+    global _started_at
+    if _started_at is None:
+        _started_at = Clock.now()
+
+
+async def persist_heartbeat(username: str = "", send_queue: Optional[dict] = None):
+    """Записать heartbeat в БД — копия для случая, когда файла heartbeat нет."""
+    global _started_at
+    now = Clock.now()
+    if _started_at is None:
+        _started_at = now
+
+    async def _write(db):
+        await db.execute(text("""
+            INSERT OR REPLACE INTO bot_heartbeat (id, last_seen, username, started_at, send_queue)
+            VALUES (1, :last_seen, :username, :started_at, :send_queue)
+        """), {"last_seen": now, "username": username, "started_at": _started_at,
+               "send_queue": json.dumps(send_queue) if send_queue is not None else None})
+
+    await run_write(_write)
+
+
+async def run_heartbeat(bot):
+    """Heartbeat бота каждые HEARTBEAT_SECONDS (отдельно от планировщиков — их задержки не выглядят как падение)."""
+    try:
+        me = await bot.get_me()
+        username = me.username or ""
+    except Exception:
+        username = ""
+    heartbeat = Heartbeat()
+    while True:
+        try:
+            await heartbeat.beat(username)
+        except Exception as e:
+            logger.error("heartbeat_error", error=str(e))
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+
+
+_reader: Optional[HeartbeatFile] = None
+
+
+def _status(last_seen: datetime, username: Optional[str], started_at: Optional[datetime],
+            send_queue: Optional[dict], stale_after: float, error: Optional[str] = None) -> dict:
+    now = Clock.now()
+    seconds_ago = (now - last_seen).total_seconds()
+    uptime = int((now - started_at).total_seconds()) if started_at else None
+    if error is None and seconds_ago > stale_after:
+        error = f"No heartbeat for {int(seconds_ago)}s"
+    return {"ok": error is None, "username": username, "last_seen": last_seen.isoformat(),
+            "uptime_sec": uptime, "send_queue": send_queue, "error": error}
+
+
+async def get_bot_status() -> dict:
+    """Статус бота: из файла heartbeat, без БД; если файла нет — по копии в bot_heartbeat."""
+    global _reader
+    path = heartbeat_path()
+    if _reader is None or _reader.path != path:
+        _reader = HeartbeatFile(path)
+    try:
+        beat = _reader.read()
+    except (OSError, ValueError) as e:
+        logger.warning("heartbeat_file_read_failed", path=path, error=str(e))
+        beat = None
+    if beat is not None:
+        return _status(
+            _to_datetime(beat["last_seen"]), beat["username"], _to_datetime(beat["started_at"]),
+            beat["payload"], STALE_SECONDS,
+            error=None if _pid_alive(beat["pid"]) else "Bot process is not running",
+        )
+
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            text("SELECT last_seen, username, started_at, send_queue FROM bot_heartbeat WHERE id=1")
+        )).fetchone()
+    if not row:
+        return {"ok": False, "username": None, "last_seen": None,
+                "uptime_sec": None, "send_queue": None, "error": "Bot not started yet"}
+
+    last_seen, username, started_at, send_queue = row
+    if isinstance(last_seen, str):
+        last_seen = datetime.fromisoformat(last_seen)
+    if isinstance(started_at, str):
+        started_at = datetime.fromisoformat(started_at)
+    return _status(last_seen, username, started_at, json.loads(send_queue) if send_queue else None,
+                   HEARTBEAT_PERSIST_SECONDS + STALE_SECONDS)
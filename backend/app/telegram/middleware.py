@@ -1,14 +1,100 @@
 """Middleware для автосохранения пользователей."""
-from typing import Callable, Any, Awaitable
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Any, Awaitable, Optional
 from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject, Message, CallbackQuery
-from app.core.db import AsyncSessionLocal
+from aiogram.types import TelegramObject, Message, CallbackQuery, User
+from sqlalchemy import text
+from app.core.clock import Clock
+from app.core.db import run_write, schedule_write
+from app.core.logging import get_logger
 from app.repositories.user_repository import UserRepository
 
+logger = get_logger(__name__)
+
+TRACKER_CAPACITY = 10_000  # пользователей в LRU; вытесненный при следующем событии сверится с БД
+TOUCH_FLUSH_SECONDS = 60.0
+
+
+class UserTracker:
+    """Write-behind кэш Telegram-пользователей: telegram_id → (хэш профиля, account_id).
+
+    Пока имя и username не меняются, событие не трогает БД: отметка
+    last_seen_at копится в памяти и раз в TOUCH_FLUSH_SECONDS уходит одним
+    executemany по PK через очередь записи. Новый пользователь или смена
+    профиля — одна запись сразу (handler может искать аккаунт следом).
+    """
+
+    def __init__(self, capacity: int = TRACKER_CAPACITY):
+        self.capacity = capacity
+        self._known: OrderedDict[int, tuple[int, int]] = OrderedDict()
+        self._touched: dict[int, datetime] = {}  # account_id → последнее событие
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def _digest(user: User) -> int:
+        return hash((user.first_name, user.last_name, user.username))
+
+    async def track(self, user: User) -> None:
+        digest = self._digest(user)
+        known = self._known.get(user.id)
+        if known and known[0] == digest:
+            self._known.move_to_end(user.id)
+            account_id = known[1]
+        else:
+            async def _write(db):
+                account = await UserRepository(db).create_or_update(
+                    telegram_id=user.id,
+                    first_name=user.first_name,
+                    username=user.username,
+                    last_name=user.last_name,
+                )
+                return account.id
+
+            account_id = await run_write(_write)
+            self._known[user.id] = (digest, account_id)
+            if len(self._known) > self.capacity:
+                self._known.popitem(last=False)
+        self._touch(account_id)
+
+    def _touch(self, account_id: int) -> None:
+        self._touched[account_id] = Clock.now()
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(TOUCH_FLUSH_SECONDS, self._flush)
+
+    def _take(self) -> list[dict]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        touched, self._touched = self._touched, {}
+        return [{"id": account_id, "seen": seen} for account_id, seen in touched.items()]
+
+    def _flush(self) -> None:
+        rows = self._take()
+        if rows:
+            schedule_write(_touch_writer(rows))
+
+    async def flush(self) -> None:
+        """Записать накопленные отметки и дождаться commit (при остановке бота)."""
+        rows = self._take()
+        if rows:
+            await run_write(_touch_writer(rows))
+
+
+def _touch_writer(rows: list[dict]):
+    async def _write(db):
+        await db.execute(text("UPDATE local_accounts SET last_seen_at = :seen WHERE id = :id"), rows)
+
+    return _write
+
+
+user_tracker = UserTracker()
+
 
 class UserTrackingMiddleware(BaseMiddleware):
-    """Ищет LocalAccount через UserIdentity при каждом событии.
-    
+    """Синхронизирует LocalAccount с Telegram-профилем через ``user_tracker``.
+
     Передаёт telegram_id в data["tg_user_id"] — не сам объект,
     чтобы избежать DetachedInstanceError после закрытия сессии.
     Handlers сами загружают пользователя если нужно.
@@ -28,19 +114,10 @@ class UserTrackingMiddleware(BaseMiddleware):
 
         if from_user and not from_user.is_bot:
             try:
-                async with AsyncSessionLocal() as session:
-                    repo = UserRepository(session)
-                    await repo.create_or_update(
-                        telegram_id=from_user.id,
-                        first_name=from_user.first_name,
-                        username=from_user.username,
-                        last_name=from_user.last_name,
-                    )
-                    await session.commit()
+                await user_tracker.track(from_user)
             except Exception as e:
                 # Не ломаем обработку события из-за ошибки трекинга
-                import logging
-                logging.getLogger(__name__).warning(f"UserTracking failed: {e}")
+                logger.warning("user_tracking_failed", telegram_id=from_user.id, error=str(e))
 
             # Передаём только telegram_id — безопасно
             data["tg_user_id"] = from_user.id
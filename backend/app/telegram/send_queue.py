@@ -0,0 +1,233 @@
+"""Очередь исходящих запросов бота: token bucket на бота и на чат, retry_after, приоритет ответов."""
+import asyncio
+from collections import deque
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from typing import Optional, Union
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+INTERACTIVE, BULK = 0, 1
+PRIORITY_NAMES = ("interactive", "bulk")
+# Методы, на которые действуют лимиты Telegram на сообщения (sendChatAction — нет)
+LIMITED_PREFIXES = ("send", "edit", "copy", "forward")
+MAX_RETRIES = 3  # повторов после retry_after; дальше исключение уходит вызывающему
+CHAT_BURST = 3  # сообщений подряд в один чат до ограничения скорости
+CHAT_BUCKETS_MAX = 10_000  # сверх — забываем полные (простаивающие) чаты
+
+ChatId = Union[int, str, None]
+
+# Приоритет отправки в текущем контексте: handler'ы — INTERACTIVE (по умолчанию),
+# фоновые рассылки оборачиваются в bulk_sends()
+send_priority: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_sends():
+    """Отправки внутри блока (и в задачах, созданных в нём) — с приоритетом BULK."""
+    token = send_priority.set(BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Сколько секунд до следующего токена (0 — можно сейчас)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    @property
+    def full(self) -> bool:
+        return self.tokens >= self.capacity
+
+
+class SendScheduler:
+    """Выдаёт разрешения на отправку в порядке приоритета в рамках лимитов Telegram.
+
+    Ожидающие стоят в двух FIFO (интерактивные ответы и рассылки), один
+    диспетчер проходит их по порядку и пропускает первый запрос, для которого
+    есть токен в общем bucket'е и в bucket'е его чата — рассылка в занятый
+    чат не держит остальные. ``retry_after`` от Telegram останавливает чат
+    (или всего бота, если чата у метода нет) на указанное время.
+    """
+
+    def __init__(
+        self,
+        per_sec: Optional[float] = None,
+        per_chat_per_sec: Optional[float] = None,
+        per_group_per_min: Optional[float] = None,
+    ):
+        self.per_sec = per_sec or settings.TELEGRAM_SEND_PER_SEC
+        self.per_chat_per_sec = per_chat_per_sec or settings.TELEGRAM_SEND_PER_CHAT_PER_SEC
+        self.per_group_per_sec = (per_group_per_min or settings.TELEGRAM_SEND_PER_GROUP_PER_MIN) / 60
+        self._queues: tuple[deque, deque] = (deque(), deque())  # (chat_id, future, поставлен в)
+        self._global: Optional[TokenBucket] = None
+        self._chats: dict[ChatId, TokenBucket] = {}
+        self._paused: dict[ChatId, float] = {}  # chat_id (None — весь бот) → до какого loop.time()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.retry_after = 0
+        self.failed = 0
+        self._max_wait = 0.0
+
+    async def acquire(self, chat_id: ChatId, priority: int = INTERACTIVE) -> None:
+        """Дождаться разрешения на один запрос в чат ``chat_id``."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queues[priority].append((chat_id, future, loop.time()))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wakeup.set()
+        await future  # при отмене future отменяется вместе с ожиданием — диспетчер его пропустит
+
+    def pause(self, chat_id: ChatId, seconds: float) -> None:
+        """Не отправлять в чат (None — никуда) ``seconds`` секунд."""
+        until = asyncio.get_running_loop().time() + seconds
+        self._paused[chat_id] = max(self._paused.get(chat_id, 0.0), until)
+        self.retry_after += 1
+        self._wakeup.set()
+
+    def _chat_bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= CHAT_BUCKETS_MAX:
+                for key in [key for key, b in self._chats.items() if b.wait(now) == 0 and b.full]:
+                    del self._chats[key]
+            private = isinstance(chat_id, int) and chat_id > 0
+            rate = self.per_chat_per_sec if private else self.per_group_per_sec
+            bucket = self._chats[chat_id] = TokenBucket(rate, CHAT_BURST, now)
+        return bucket
+
+    def _chat_wait(self, chat_id: ChatId, now: float) -> float:
+        paused = self._paused.get(chat_id)
+        if paused is not None:
+            if paused > now:
+                return paused - now
+            del self._paused[chat_id]
+        if chat_id is None:
+            return 0.0
+        return self._chat_bucket(chat_id, now).wait(now)
+
+    def _grant(self, now: float) -> Optional[float]:
+        """Выдать все возможные разрешения; вернуть, через сколько секунд пробовать снова (None — очередь пуста)."""
+        if self._global is None:
+            self._global = TokenBucket(self.per_sec, self.per_sec, now)
+        while True:
+            retry: Optional[float] = None
+            pending = False
+            global_wait = max(self._global.wait(now), self._chat_wait(None, now))
+            blocked: set = set()
+            chosen = None
+            for queue in self._queues:
+                while queue and queue[0][1].done():
+                    queue.popleft()
+                for index, (chat_id, future, _) in enumerate(queue):
+                    if future.done() or chat_id in blocked:
+                        continue
+                    pending = True
+                    if global_wait > 0:
+                        break
+                    wait = self._chat_wait(chat_id, now)
+                    if wait == 0:
+                        chosen = (queue, index)
+                        break
+                    blocked.add(chat_id)
+                    retry = wait if retry is None else min(retry, wait)
+                if chosen or (pending and global_wait > 0):
+                    break
+            if chosen is None:
+                if not pending:
+                    return None
+                return global_wait if global_wait > 0 else retry
+
+            queue, index = chosen
+            chat_id, future, queued_at = queue[index]
+            del queue[index]
+            self._global.take()
+            if chat_id is not None:
+                self._chats[chat_id].take()
+            self.sent += 1
+            self._max_wait = max(self._max_wait, now - queued_at)
+            future.set_result(None)
+
+    async def _run(self) -> None:
+        # Очередь опустела — диспетчер завершается, следующий acquire запустит новый
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._grant(loop.time())
+            if delay is None:
+                return
+            self._wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+
+    def snapshot(self) -> dict:
+        """Метрики очереди; max_wait_ms — наибольшее ожидание с прошлого снимка."""
+        max_wait, self._max_wait = self._max_wait, 0.0
+        return {
+            "queued": {
+                name: sum(1 for _, future, _ in queue if not future.done())
+                for name, queue in zip(PRIORITY_NAMES, self._queues)
+            },
+            "sent": self.sent,
+            "retry_after": self.retry_after,
+            "failed": self.failed,
+            "paused_chats": len(self._paused),
+            "max_wait_ms": round(max_wait * 1000),
+        }
+
+
+send_scheduler = SendScheduler()
+
+
+class SendRateLimiter(BaseRequestMiddleware):
+    """Middleware сессии бота: все запросы к Bot API идут через ``send_scheduler``.
+
+    Сообщения (send*/edit*/copy*/forward*) ждут токен с приоритетом из
+    ``send_priority``; на ``TelegramRetryAfter`` чат ставится на паузу и запрос
+    повторяется до MAX_RETRIES раз — вызывающий код видит только успех или
+    окончательную ошибку.
+    """
+
+    def __init__(self, scheduler: SendScheduler = send_scheduler):
+        self.scheduler = scheduler
+
+    async def __call__(self, make_request, bot, method):
+        api_method = method.__api_method__
+        limited = api_method.startswith(LIMITED_PREFIXES) and api_method != "sendChatAction"
+        chat_id = getattr(method, "chat_id", None)
+        for attempt in range(MAX_RETRIES + 1):
+            if limited:
+                await self.scheduler.acquire(chat_id, send_priority.get())
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                logger.warning("telegram_retry_after", method=api_method, chat_id=chat_id,
+                               retry_after=e.retry_after, attempt=attempt + 1)
+                if attempt == MAX_RETRIES:
+                    self.scheduler.failed += 1
+                    raise
+                self.scheduler.pause(chat_id, e.retry_after)
+                if not limited:
+                    await asyncio.sleep(e.retry_after)
@@ -0,0 +1,202 @@
+"""Webhook-режим бота: aiohttp-сервер, проверка секрета, пул обработчиков с порядком по чатам."""
+import asyncio
+import hashlib
+import hmac
+import signal
+from collections import OrderedDict, deque
+from contextlib import suppress
+from typing import Any, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from pydantic import ValidationError
+
+from app.config import get_secret_key_async, settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+SUBMIT_TIMEOUT = 10.0  # сколько webhook ждёт места в очереди, потом 503 — Telegram повторит
+RECENT_UPDATES = 1000  # update_id для отсева повторной доставки
+DRAIN_TIMEOUT = 30.0
+
+
+def update_chat_key(update: Update) -> int:
+    """Ключ порядка апдейта: id чата, иначе пользователя, иначе сам update_id."""
+    try:
+        event = update.event
+    except Exception:
+        return -update.update_id
+    chat = getattr(event, "chat", None) or getattr(getattr(event, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(event, "from_user", None) or getattr(event, "user", None)
+    if user is not None:
+        return user.id
+    return -update.update_id
+
+
+class UpdatePipeline:
+    """Пул из ``workers`` обработчиков апдейтов с порядком внутри чата.
+
+    У каждого чата своя очередь; чат с апдейтами стоит в общей очереди
+    готовых и в каждый момент обрабатывается не больше чем одним воркером.
+    После одного апдейта чат уходит в конец очереди готовых — длинный диалог
+    не задерживает остальные чаты. Всего в работе не больше ``max_pending``
+    апдейтов: сверх этого ``submit`` ждёт (backpressure на webhook).
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        workers: int,
+        max_pending: int,
+        workflow_data: Optional[dict[str, Any]] = None,
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.workflow_data = workflow_data or {}
+        self._chats: dict[int, deque[Update]] = {}
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._recent: OrderedDict[int, None] = OrderedDict()
+        self._pending = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def submit(self, update: Update, timeout: float = SUBMIT_TIMEOUT) -> bool:
+        """Поставить апдейт в очередь его чата; False — нет места за ``timeout``."""
+        if update.update_id in self._recent:
+            return True
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("telegram_updates_backlog_full", update_id=update.update_id)
+            return False
+        self._recent[update.update_id] = None
+        if len(self._recent) > RECENT_UPDATES:
+            self._recent.popitem(last=False)
+
+        key = update_chat_key(update)
+        queue = self._chats.get(key)
+        if queue is None:
+            self._chats[key] = deque([update])
+            self._ready.put_nowait(key)
+        else:
+            queue.append(update)
+        self._pending += 1
+        self._drained.clear()
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            update = queue[0]
+            try:
+                await self.dispatcher.feed_update(self.bot, update, **self.workflow_data)
+            except Exception as e:
+                logger.error("telegram_update_failed", update_id=update.update_id, error=str(e))
+            finally:
+                queue.popleft()
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                self._slots.release()
+                self._pending -= 1
+                if not self._pending:
+                    self._drained.set()
+
+    async def stop(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """Дождаться обработки принятых апдейтов (не дольше ``timeout``) и остановить воркеры."""
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        if self._pending:
+            logger.warning("telegram_updates_dropped", count=self._pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def create_webhook_app(pipeline: UpdatePipeline, secret: str, path: str) -> web.Application:
+    """aiohttp-приложение с одним POST ``path``: секрет → Update → очередь."""
+    expected = secret.encode()
+
+    async def handle(request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "").encode()
+        if not hmac.compare_digest(token, expected):
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": pipeline.bot})
+        except (ValueError, ValidationError):
+            return web.Response(status=400)
+        if not await pipeline.submit(update):
+            return web.Response(status=503)
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
+
+
+def webhook_secret(bot_token: str, secret_key: str) -> str:
+    """Секрет webhook по умолчанию: HMAC токена бота на SECRET_KEY.
+
+    Одинаков при каждом старте — если ``setWebhook`` не прошёл, Telegram
+    шлёт апдейты с тем же секретом, что уже зарегистрирован. Hex укладывается
+    в допустимые Telegram символы (A-Z, a-z, 0-9, _, -) и 256 знаков.
+    """
+    return hmac.new(secret_key.encode(), bot_token.encode(), hashlib.sha256).hexdigest()
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, stop: Optional[asyncio.Event] = None) -> None:
+    """Принимать апдейты через webhook до SIGTERM/SIGINT (или ``stop``).
+
+    Поднимает aiohttp-сервер на TELEGRAM_WEBHOOK_HOST:PORT и регистрирует
+    TELEGRAM_WEBHOOK_URL + PATH в Telegram. При остановке сначала перестаёт
+    принимать запросы, затем дорабатывает очередь; webhook не снимается —
+    пока бот перезапускается, апдейты копит Telegram.
+    """
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+
+    path = settings.TELEGRAM_WEBHOOK_PATH
+    url = settings.TELEGRAM_WEBHOOK_URL.rstrip("/") + path
+    secret = settings.TELEGRAM_WEBHOOK_SECRET or webhook_secret(bot.token, await get_secret_key_async())
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+
+    await dp.emit_startup(bot=bot, **workflow_data)
+    pipeline = UpdatePipeline(dp, bot, settings.TELEGRAM_WORKERS, settings.TELEGRAM_MAX_PENDING, workflow_data)
+    pipeline.start()
+    runner = web.AppRunner(create_webhook_app(pipeline, secret, path))
+    try:
+        await runner.setup()
+        await web.TCPSite(runner, settings.TELEGRAM_WEBHOOK_HOST, settings.TELEGRAM_WEBHOOK_PORT).start()
+        try:
+            await bot.set_webhook(url, secret_token=secret, allowed_updates=dp.resolve_used_update_types())
+        except Exception as e:
+            # Сервер всё равно работает: локально — для POST записанных апдейтов,
+            # при недоступном Telegram — по ранее зарегистрированному webhook
+            # (секрет от старта к старту не меняется, апдейты проходят проверку)
+            logger.warning("set_webhook_failed", url=url, error=str(e))
+        logger.info("webhook_started", url=url, port=settings.TELEGRAM_WEBHOOK_PORT,
+                    workers=settings.TELEGRAM_WORKERS)
+        await stop.wait()
+    finally:
+        await runner.cleanup()
+        await pipeline.stop()
+        await dp.emit_shutdown(bot=bot, **workflow_data)
+        logger.info("webhook_stopped")
@@ -17,6 +17,8 @@ from app.web.routes_webhooks import router as webhooks_router
 from app.web.routes_auth import router as auth_router
 from app.web.routes_system_settings import router as system_settings_router
 from app.web.routes_events import router as events_router
+from app.web.routes_stream import router as stream_router
+from app.web.routes_sync import router as sync_router
 
 app = FastAPI(
     title="TeamFlow API",
@@ -232,6 +234,31 @@ async def on_app_startup():
     await load_cors_origins()
     logger.info("cors_origins_ready", origins=get_cors_origins())
 
+    from app.services.webhook_service import dispatcher
+    await dispatcher.start()
+
+    from app.services.change_stream import change_stream
+    await change_stream.start()
+
+
+@app.on_event("shutdown")
+async def on_app_shutdown():
+    """Остановить вебхуки и push: накопленные сводки досылаются, webhook_outbox остаётся в БД."""
+    from app.services.webhook_service import dispatcher
+    await dispatcher.stop()
+
+    from app.services.change_stream import change_stream
+    await change_stream.stop()
+
+    from app.web.routes import push_notifications
+    await push_notifications.flush()
+
+    from app.services.push_service import push_dispatcher
+    await push_dispatcher.close()
+
+    from app.domain.events import event_store
+    await event_store.flush()
+
 
 # Handle CORS preflight
 @app.options("/{path:path}")
@@ -249,6 +276,8 @@ app.include_router(webhooks_router, prefix="/api")
 app.include_router(auth_router, prefix="/api/auth")
 app.include_router(system_settings_router, prefix="/api/settings")
 app.include_router(events_router, prefix="/api/events")
+app.include_router(stream_router, prefix="/api")
+app.include_router(sync_router, prefix="/api")
 
 
 @app.get("/")
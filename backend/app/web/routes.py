@@ -16,6 +16,7 @@ import secrets
 from app.core.db import get_db
 from app.core.clock import Clock
 from app.services.task_service import TaskService
+from app.services.notification_service import Notification, NotificationAggregator, summarize
 from app.repositories.user_repository import UserRepository
 from app.domain.enums import TaskStatus
 from app.domain.models import Task, Project, Meeting, Comment, Blocker, LocalAccount
@@ -61,33 +62,10 @@ async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
 
 @router.get("/stats", response_model=StatsResponse)
 async def get_stats(db: AsyncSession = Depends(get_db)):
-    """#260 — Optimized: simple COUNT queries instead of loading full objects."""
-    from app.domain.models import Task as TaskModel
-    from sqlalchemy import func as sa_func
-    from sqlalchemy import select as sa_select
+    """Счётчики дашборда: task_counters ведут триггеры, один запрос на десятки строк."""
+    from app.services.stats_service import StatsService
 
-    async def count(where) -> int:
-        result = await db.execute(sa_select(sa_func.count(TaskModel.id)).where(*where))
-        return result.scalar() or 0
-
-    base = [
-        TaskModel.archived == False,
-        TaskModel.deleted == False,
-        TaskModel.backlog == False,
-    ]
-
-    return {
-        "total": await count(base),
-        "todo": await count(base + [TaskModel.status == TaskStatus.TODO.value]),
-        "doing": await count(base + [TaskModel.status == TaskStatus.DOING.value]),
-        "done": await count(base + [TaskModel.status == TaskStatus.DONE.value]),
-        "blocked": await count(base + [TaskModel.status == TaskStatus.BLOCKED.value]),
-        "on_hold": await count(base + [TaskModel.status == TaskStatus.ON_HOLD.value]),
-        "archived": await count(
-            [TaskModel.archived == True, TaskModel.deleted == False]
-        ),
-        "deleted": await count([TaskModel.deleted == True]),
-    }
+    return await StatsService.get_stats(db)
 
 
 @router.get("/users", response_model=List[schemas.LocalAccountResponse])
@@ -293,26 +271,25 @@ async def change_task_status(
             await service.block_task(task, request.block_reason.strip())
         else:
             await service.change_status(task_id, TaskStatus(request.status))
-        await db.commit()
 
-        # #260 — Reuse the same task object (already in session, fields updated)
-        # Trigger webhook for status change
+        # Вебхук — в outbox в той же транзакции, что и смена статуса
+        webhooks_queued = 0
         if old_status and old_status != request.status:
-            try:
-                from app.services.webhook_service import trigger_task_status_changed
-
-                task_data = {
-                    "id": task.id,
-                    "title": task.title,
-                    "status": task.status,
-                    "project_id": task.project_id,
-                    "assignee_id": task.assignee_id,
-                }
-                asyncio.create_task(
-                    trigger_task_status_changed(old_status, request.status, task_data)
-                )
-            except Exception as e:
-                print(f"[WEBHOOK] Error triggering status change webhook: {e}")
+            from app.services.webhook_service import enqueue_webhook_event
+
+            webhooks_queued = await enqueue_webhook_event(db, "task.status_changed", {
+                "id": task.id,
+                "title": task.title,
+                "status": request.status,
+                "project_id": task.project_id,
+                "assignee_id": task.assignee_id,
+                "status_change": {"old": old_status, "new": request.status},
+            })
+        await db.commit()
+        if webhooks_queued:
+            from app.services.webhook_service import notify_dispatcher
+
+            notify_dispatcher()
 
         # #260 — Reuse the same task object for recurrence (no additional SELECT)
         if request.status == TaskStatus.DONE.value:
@@ -347,10 +324,11 @@ async def change_task_status(
                         await db.commit()
 
         background_tasks.add_task(
-            send_push,
+            queue_push,
             title=f"Задача обновлена: #{task_id}",
             body=f"Новый статус: {request.status}",
             url=f"/?task={task_id}",
+            summary=f"#{task_id} {task.title} → {request.status}",
         )
         return {"ok": True}
     except ValueError as e:
@@ -1697,143 +1675,71 @@ async def auto_archive_done_tasks(db: AsyncSession = Depends(get_db)):
         .where(TaskModel.completed_at != None)  # noqa: E711
         .where(TaskModel.completed_at < cutoff)
         .values(archived=True)
+        .returning(TaskModel.id, TaskModel.title, TaskModel.project_id, TaskModel.assignee_id)
     )
+    archived = result.all()
+
+    # По событию на задачу; вебхуки в пакетном режиме получат их несколькими запросами
+    from app.services.webhook_service import enqueue_webhook_event, notify_dispatcher
+
+    webhooks_queued = 0
+    for task_id, title, project_id, assignee_id in archived:
+        webhooks_queued += await enqueue_webhook_event(db, "task.updated", {
+            "id": task_id,
+            "title": title,
+            "status": "DONE",
+            "project_id": project_id,
+            "assignee_id": assignee_id,
+            "archived": True,
+        })
     await db.commit()
-    return {"archived": result.rowcount}
+    if webhooks_queued:
+        notify_dispatcher()
+    return {"archived": len(archived)}
 
 
 # ============= WEB PUSH API =============
 
 
-async def send_push(title: str, body: str, url: str = "/", task_id: int = None) -> None:
-    """Send Web Push notification to all active subscriptions.
+async def send_push(title: str, body: str, url: str = "/", task_id: int = None,
+                    pref: Optional[str] = "status_changed",
+                    account_ids: Optional[list[int]] = None) -> None:
+    """Send Web Push notification to subscribers with ``pref`` enabled.
 
-    #272 — VAPID keys and email stored in app_settings DB.
-    #260 — Runs in thread pool to avoid blocking event loop.
-    #317 — Conditional: only send to users who have relevant notifications enabled.
+    #272 — VAPID keys and email stored in app_settings DB (кэшируются в push_dispatcher).
+    #317 — Conditional: получатели фильтруются по notification_prefs в SQL.
+    ``account_ids`` — только этим аккаунтам (сводки из push_notifications).
     """
-    import asyncio
-    import json
-    from app.core.db import AsyncSessionLocal
-    from app.domain.models import PushSubscription as PushSubscriptionModel, AppSetting
-    from app.services.vapid_service import (
-        get_vapid_private_key,
-        get_vapid_claims_email,
-        set_vapid_keys,
-        generate_vapid_keys,
-    )
-    from pywebpush import webpush, WebPushException
+    from app.services.push_service import push_dispatcher
 
-    async with AsyncSessionLocal() as session:
-        private_key = await get_vapid_private_key(session)
-        claims_email = await get_vapid_claims_email(session)
-
-        # Auto-generate keys if not configured
-        if not private_key:
-            logger.info("send_push: VAPID keys not found, auto-generating")
-            private_key, public_key = generate_vapid_keys()
-            await set_vapid_keys(session, private_key, public_key)
-            logger.info("send_push: VAPID keys generated and saved to DB")
-
-        # Fetch subscriptions with account_id
-        result = await session.execute(
-            select(PushSubscriptionModel).where(
-                PushSubscriptionModel.account_id != None
-            )
-        )
-        subs = list(result.scalars().all())
+    await push_dispatcher.send(title, body, url, pref=pref, account_ids=account_ids)
 
-    if not subs:
-        logger.info("send_push: no subscriptions with account_id, skipping")
-        return
 
-    # Load user preferences for conditional push
-    user_prefs = {}  # account_id -> dict
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(AppSetting))
-        for setting in result.scalars().all():
-            if setting.key.startswith("notif_prefs_"):
-                try:
-                    acc_id = int(setting.key.replace("notif_prefs_", ""))
-                    user_prefs[acc_id] = json.loads(setting.value)
-                except Exception:
-                    pass
-
-    logger.info("send_push: sending '%s' to %d subscription(s), email=%s", title, len(subs), claims_email)
-
-    sent_count = 0
-    fail_count = 0
-
-    async def _send_one(sub):
-        """Отправить один push в thread pool."""
-        nonlocal sent_count, fail_count
-
-        # Check user preferences
-        if sub.account_id and sub.account_id in user_prefs:
-            prefs = user_prefs[sub.account_id]
-            if not prefs.get("status_changed", True):
-                logger.info("send_push: skipped for account_id=%d (status_changed disabled)", sub.account_id)
-                return
-
-        loop = asyncio.get_event_loop()
-        payload = json.dumps({"title": title, "body": body, "url": url})
-        try:
-            await loop.run_in_executor(
-                None,
-                lambda: webpush(
-                    subscription_info={
-                        "endpoint": sub.endpoint,
-                        "keys": {"p256dh": sub.p256dh, "auth": sub.auth},
-                    },
-                    data=payload,
-                    vapid_private_key=private_key,
-                    vapid_claims={"sub": f"mailto:{claims_email}"},
-                    content_encoding="aes128gcm",
-                    ttl=3600,
-                    headers={"Urgency": "high"},
-                    timeout=10,
-                ),
-            )
-            sent_count += 1
-            logger.info("Push sent OK to %s (account_id=%d)", sub.endpoint[:60], sub.account_id)
-        except WebPushException as exc:
-            fail_count += 1
-            if (
-                hasattr(exc, "response")
-                and exc.response is not None
-                and exc.response.status_code == 410
-            ):
-                async with AsyncSessionLocal() as session:
-                    await session.execute(
-                        delete(PushSubscriptionModel).where(
-                            PushSubscriptionModel.endpoint == sub.endpoint
-                        )
-                    )
-                    await session.commit()
-                logger.info(
-                    "Push cleanup: removed expired endpoint %s", sub.endpoint[:40]
-                )
-            else:
-                logger.error(
-                    "Push delivery FAILED for %s: %s (status %s)",
-                    sub.endpoint[:40],
-                    exc,
-                    getattr(getattr(exc, "response", None), "status_code", "?"),
-                )
-        except Exception as exc:
-            fail_count += 1
-            logger.error("Push delivery ERROR for %s: %s", sub.endpoint[:40], exc)
+async def _send_coalesced_push(batches: dict) -> None:
+    """Сводка на аккаунт; одинаковые сводки уходят одним send_push на все аккаунты."""
+    by_message: dict[tuple, list[int]] = {}
+    for account_id, items in batches.items():
+        note = summarize(items)
+        by_message.setdefault((note.title, note.body, note.url), []).append(account_id)
+    for (title, body, url), account_ids in by_message.items():
+        # Настройки проверены при постановке в очередь
+        await send_push(title, body, url, pref=None, account_ids=account_ids)
 
-    # Отправляем все параллельно с timeout
-    try:
-        await asyncio.wait_for(
-            asyncio.gather(*[_send_one(sub) for sub in subs], return_exceptions=True),
-            timeout=15.0,
-        )
-    except asyncio.TimeoutError:
-        logger.warning("send_push timed out after 15s")
 
-    logger.info("send_push done: %d sent, %d failed", sent_count, fail_count)
+push_notifications = NotificationAggregator(settings.NOTIFY_COALESCE_SECONDS, _send_coalesced_push)
+
+
+async def queue_push(title: str, body: str, url: str = "/", pref: str = "status_changed",
+                     summary: Optional[str] = None) -> None:
+    """Поставить push в окно склейки: за NOTIFY_COALESCE_SECONDS на аккаунт уходит одна сводка."""
+    from app.core.db import AsyncSessionLocal
+    from app.services.push_service import PushDispatcher
+
+    async with AsyncSessionLocal() as session:
+        account_ids = await PushDispatcher.recipient_accounts(session, pref)
+    note = Notification(title=title, body=body, url=url, summary=summary)
+    for account_id in account_ids:
+        push_notifications.add(account_id, note)
 
 
 @router.get("/push/vapid-public-key")
@@ -1923,6 +1829,9 @@ async def update_push_config(
         raise HTTPException(status_code=400, detail="Invalid email address")
 
     await set_vapid_claims_email(db, email)
+    from app.services.push_service import push_dispatcher
+
+    push_dispatcher.invalidate()
     return {"ok": True, "claims_email": email}
 
 
@@ -1952,58 +1861,33 @@ async def push_unsubscribe(
 async def search_tasks(
     q: str = Query(default=""), limit: int = 20, db: AsyncSession = Depends(get_db)
 ):
-    """Полнотекстовый поиск по задачам (id + title + description)."""
-    from sqlalchemy import or_, cast, String
+    """Полнотекстовый поиск по задачам (FTS5: title, description, comments, tags)."""
+    from app.services.search_service import SearchService
 
     q = q.strip()
     if len(q) < 2:
         return []
-    limit = min(limit, 50)
-    # Поиск по ID задачи (без #)
-    try:
-        task_id = int(q)
-        id_match = Task.id == task_id
-    except (ValueError, TypeError):
-        id_match = None
-    # Поиск по title и description (case-insensitive через multiple LIKE)
-    q_lower = q.lower()
-    q_upper = q.upper()
-    q_title = q.capitalize()
-    result = await db.execute(
-        select(Task)
-        .where(Task.deleted == False)
-        .where(Task.archived == False)
-        .where(
-            or_(
-                id_match if id_match else cast(Task.id, String).like(f"%{q}%"),
-                Task.title.like(f"%{q_lower}%"),
-                Task.title.like(f"%{q_upper}%"),
-                Task.title.like(f"%{q_title}%"),
-                Task.description.like(f"%{q_lower}%"),
-                Task.description.like(f"%{q_upper}%"),
-                Task.description.like(f"%{q_title}%"),
-            )
-        )
-        .order_by(Task.updated_at.desc())
-        .limit(limit)
-    )
-    tasks = result.scalars().all()
-    return [
-        {
-            "id": t.id,
-            "title": t.title,
-            "description": t.description or "",
-            "status": t.status,
-            "priority": t.priority,
-            "project_id": t.project_id,
-            "parent_task_id": t.parent_task_id,
-            "due_date": t.due_date.isoformat() if t.due_date else None,
-            "archived": t.archived,
-            "deleted": t.deleted,
-            "backlog": t.backlog,
-        }
-        for t in tasks
-    ]
+    return await SearchService.search_tasks(db, q, min(limit, 50))
+
+
+@router.get("/search/all")
+async def search_all(
+    q: str = Query(default=""),
+    types: Optional[str] = Query(default=None, description="task,meeting,page,comment"),
+    limit: int = 20,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_db),
+):
+    """Единый поиск по задачам, встречам, базе знаний и комментариям (один FTS5-индекс)."""
+    from app.services.search_service import SearchService
+
+    q = q.strip()
+    limit = max(1, min(limit, 50))
+    offset = max(0, offset)
+    if len(q) < 2:
+        return {"items": [], "total": 0, "limit": limit, "offset": offset}
+    kinds = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    return await SearchService.search(db, q, kinds, limit, offset)
 
 
 # ============= SPRINT STATUS & REORDER =============
@@ -2078,272 +1962,74 @@ async def reorder_sprint_tasks(
 
 @router.get("/digest")
 async def get_digest(db: AsyncSession = Depends(get_db)):
-    """Данные для страницы дайджеста."""
-    from app.repositories.project_repository import ProjectRepository
-    from app.domain.enums import TaskStatus as TS, TaskPriority as TP
-    from datetime import datetime, timedelta
-
-    service = TaskService(db)
-    all_tasks = await service.get_all_tasks()
+    """Данные для страницы дайджеста (агрегаты в SQL по всем задачам)."""
+    from app.services.digest_service import DigestService
 
-    proj_repo = ProjectRepository(db)
-    projects = await proj_repo.get_all_active()
+    return await DigestService(db).get_digest_data()
 
-    today = Clock.now().date()
-    soon = today + timedelta(days=7)
 
-    terminal = {TS.DONE.value, TS.ON_HOLD.value}
-    active_statuses = {TS.TODO.value, TS.DOING.value, TS.BLOCKED.value}
+# ============= TRENDS API =============
 
-    def is_overdue(t) -> bool:
-        return bool(
-            t.due_date and t.due_date.date() < today and t.status not in terminal
-        )
 
-    def is_due_soon(t) -> bool:
-        return bool(
-            t.due_date
-            and today <= t.due_date.date() <= soon
-            and t.status not in terminal
-        )
+@router.get("/trends/burndown")
+async def get_trend_burndown(
+    days: int = Query(30, ge=1, le=365),
+    project_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Открытые/просроченные задачи по дням — из task_snapshots."""
+    from app.services.snapshot_service import SnapshotService
 
-    def avg_completion_days(tasks_list) -> float | None:
-        done = [
-            t
-            for t in tasks_list
-            if t.status == TS.DONE.value and t.completed_at and t.created_at
-        ]
-        if not done:
-            return None
-        return round(
-            sum((t.completed_at - t.created_at).total_seconds() for t in done)
-            / len(done)
-            / 86400,
-            1,
-        )
+    return await SnapshotService.burndown(db, days, project_id, assignee_id)
 
-    # Только верхнеуровневые задачи для статистики по проектам
-    top_tasks = [t for t in all_tasks if not t.parent_task_id]
-    # Активные задачи (не DONE, не ON_HOLD, не удалённые)
-    active_tasks = [t for t in all_tasks if t.status in active_statuses]
-
-    # Общая статистика
-    stats = {
-        "total": len(all_tasks),
-        "active": len(active_tasks),
-        "todo": sum(1 for t in all_tasks if t.status == TS.TODO.value),
-        "doing": sum(1 for t in all_tasks if t.status == TS.DOING.value),
-        "done": sum(1 for t in all_tasks if t.status == TS.DONE.value),
-        "blocked": sum(1 for t in all_tasks if t.status == TS.BLOCKED.value),
-        "on_hold": sum(1 for t in all_tasks if t.status == TS.ON_HOLD.value),
-        "overdue": sum(1 for t in all_tasks if is_overdue(t)),
-        "due_soon": sum(1 for t in all_tasks if is_due_soon(t)),
-        "avg_completion_days": avg_completion_days(all_tasks),
-        # Разбивка по приоритетам (#85)
-        "priority": {
-            "urgent": sum(1 for t in active_tasks if t.priority == TP.URGENT.value),
-            "high": sum(1 for t in active_tasks if t.priority == TP.HIGH.value),
-            "normal": sum(1 for t in active_tasks if t.priority == TP.NORMAL.value),
-            "low": sum(1 for t in active_tasks if t.priority == TP.LOW.value),
-        },
-        # Бэклог (#86)
-        "backlog": sum(1 for t in all_tasks if getattr(t, "is_backlog", False)),
-    }
 
-    # Задачи с дедлайнами (#87) — списки, не только счётчики
-    overdue_tasks = sorted(
-        [t for t in all_tasks if is_overdue(t)], key=lambda t: t.due_date
-    )[:10]
-    due_soon_tasks = sorted(
-        [t for t in all_tasks if is_due_soon(t)], key=lambda t: t.due_date
-    )[:10]
+@router.get("/trends/throughput")
+async def get_trend_throughput(
+    days: int = Query(30, ge=1, le=365),
+    project_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Создано/закрыто задач по дням — из task_snapshots."""
+    from app.services.snapshot_service import SnapshotService
 
-    def task_brief(t):
-        return {
-            "id": t.id,
-            "title": t.title,
-            "due_date": t.due_date.isoformat() if t.due_date else None,
-            "priority": t.priority,
-            "status": t.status,
-            "project_id": t.project_id,
-        }
+    return await SnapshotService.throughput(db, days, project_id, assignee_id)
 
-    # Прогресс подзадач (#89) — задачи у которых есть дети
-    task_map = {t.id: t for t in all_tasks}
-    children_map: dict = {}
-    for t in all_tasks:
-        if t.parent_task_id:
-            children_map.setdefault(t.parent_task_id, []).append(t)
-
-    subtask_progress = []
-    for tid, children in children_map.items():
-        parent = task_map.get(tid)
-        if not parent or parent.status == TS.DONE.value:
-            continue
-        total_ch = len(children)
-        done_ch = sum(1 for c in children if c.status == TS.DONE.value)
-        subtask_progress.append(
-            {
-                "id": parent.id,
-                "title": parent.title,
-                "project_id": parent.project_id,
-                "done": done_ch,
-                "total": total_ch,
-                "pct": round(done_ch / total_ch * 100) if total_ch else 0,
-            }
-        )
-    subtask_progress.sort(key=lambda x: (-x["total"], -x["pct"]))
-    subtask_progress = subtask_progress[:15]
 
-    # Статистика по проектам (только top-level задачи)
-    def proj_stat(proj_tasks, proj_id, name, emoji):
-        active_p = [t for t in proj_tasks if t.status in active_statuses]
-        return {
-            "id": proj_id,
-            "name": name,
-            "emoji": emoji,
-            "total": len(proj_tasks),
-            "active": len(active_p),
-            "done": sum(1 for t in proj_tasks if t.status == TS.DONE.value),
-            "doing": sum(1 for t in proj_tasks if t.status == TS.DOING.value),
-            "todo": sum(1 for t in proj_tasks if t.status == TS.TODO.value),
-            "blocked": sum(1 for t in proj_tasks if t.status == TS.BLOCKED.value),
-            "on_hold": sum(1 for t in proj_tasks if t.status == TS.ON_HOLD.value),
-            "backlog": sum(1 for t in proj_tasks if getattr(t, "is_backlog", False)),
-            "overdue": sum(1 for t in proj_tasks if is_overdue(t)),
-            "due_soon": sum(1 for t in proj_tasks if is_due_soon(t)),
-            "avg_completion_days": avg_completion_days(proj_tasks),
-        }
+@router.get("/trends/cycle-time")
+async def get_trend_cycle_time(
+    days: int = Query(30, ge=1, le=365),
+    project_id: Optional[int] = None,
+    assignee_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Среднее время выполнения задач по дням закрытия — из task_snapshots."""
+    from app.services.snapshot_service import SnapshotService
 
-    project_stats = []
-    for proj in projects:
-        proj_tasks = [t for t in top_tasks if t.project_id == proj.id]
-        if not proj_tasks:
-            continue
-        project_stats.append(
-            proj_stat(proj_tasks, proj.id, proj.name, proj.emoji or "📁")
-        )
+    return await SnapshotService.cycle_time(db, days, project_id, assignee_id)
 
-    no_proj = [t for t in top_tasks if not t.project_id]
-    if no_proj:
-        project_stats.append(proj_stat(no_proj, None, "Без проекта", "📋"))
 
-    # Топ активных проектов (#88) — сортировка по числу активных задач
-    project_stats.sort(key=lambda p: (-p["active"], -p["total"]))
+# ============= REMINDERS API =============
 
-    # Топ исполнителей
-    performers: dict = {}
-    for task in all_tasks:
-        if task.assignee:
-            name = task.assignee.display_name
-        elif task:
-            name = task
-        else:
-            continue
-        if name not in performers:
-            performers[name] = {
-                "completed": 0,
-                "total": 0,
-                "on_time": 0,
-                "with_deadline": 0,
-                "_done_secs": [],
-            }
-        performers[name]["total"] += 1
-        if task.status == TS.DONE.value:
-            performers[name]["completed"] += 1
-            if task.due_date:
-                performers[name]["with_deadline"] += 1
-                completed_at = task.completed_at or task.updated_at
-                if completed_at and completed_at <= task.due_date:
-                    performers[name]["on_time"] += 1
-            if task.completed_at and task.created_at:
-                performers[name]["_done_secs"].append(
-                    (task.completed_at - task.created_at).total_seconds()
-                )
 
-    top_performers = sorted(
-        [{"name": n, **v} for n, v in performers.items()],
-        key=lambda x: x["completed"],
-        reverse=True,
-    )[:10]
-    for p in top_performers:
-        secs = p.pop("_done_secs", [])
-        p["avg_days"] = round(sum(secs) / len(secs) / 86400, 1) if secs else None
+@router.get("/reminders")
+async def get_reminders(task_id: Optional[int] = None, db: AsyncSession = Depends(get_db)):
+    """Ожидающие напоминания /remind (ставятся из бота)."""
+    from app.services.reminder_service import ReminderService
 
-    # Активность комментариев за неделю (#90)
-    from app.domain.models import Comment
+    return await ReminderService.list_pending(db, task_id=task_id)
 
-    week_ago = Clock.now() - timedelta(days=7)
-    comments_result = await db.execute(
-        select(Comment).where(Comment.created_at >= week_ago)
-    )
-    week_comments = list(comments_result.scalars().all())
-    comment_authors: dict = {}
-    for c in week_comments:
-        name = c.author_name or "Аноним"
-        comment_authors[name] = comment_authors.get(name, 0) + 1
-    comment_activity = {
-        "total": len(week_comments),
-        "by_author": sorted(
-            [{"name": n, "count": v} for n, v in comment_authors.items()],
-            key=lambda x: -x["count"],
-        ),
-    }
 
-    # Прогресс активных спринтов (#91)
-    from app.domain.models import Sprint, SprintTask
-    from sqlalchemy.orm import selectinload
+@router.delete("/reminders/{reminder_id}")
+async def cancel_reminder(reminder_id: int, db: AsyncSession = Depends(get_db)):
+    """Отменить напоминание — планировщик бота проверяет таблицу при срабатывании."""
+    from app.services.reminder_service import ReminderService
 
-    sprints_result = await db.execute(
-        select(Sprint)
-        .where(Sprint.status == "active", Sprint.is_deleted == False)
-        .options(selectinload(Sprint.tasks))
-        .order_by(Sprint.position)
-    )
-    active_sprints = list(sprints_result.scalars().all())
-    sprint_progress = []
-    for sp in active_sprints:
-        task_ids = [st.task_id for st in sp.tasks]
-        if not task_ids:
-            sprint_progress.append(
-                {
-                    "id": sp.id,
-                    "name": sp.name,
-                    "total": 0,
-                    "done": 0,
-                    "doing": 0,
-                    "todo": 0,
-                    "blocked": 0,
-                    "pct": 0,
-                }
-            )
-            continue
-        sp_tasks = [t for t in all_tasks if t.id in set(task_ids)]
-        sp_done = sum(1 for t in sp_tasks if t.status == TS.DONE.value)
-        sp_total = len(sp_tasks)
-        sprint_progress.append(
-            {
-                "id": sp.id,
-                "name": sp.name,
-                "total": sp_total,
-                "done": sp_done,
-                "doing": sum(1 for t in sp_tasks if t.status == TS.DOING.value),
-                "todo": sum(1 for t in sp_tasks if t.status == TS.TODO.value),
-                "blocked": sum(1 for t in sp_tasks if t.status == TS.BLOCKED.value),
-                "pct": round(sp_done / sp_total * 100) if sp_total else 0,
-            }
-        )
-
-    return {
-        "stats": stats,
-        "projects": project_stats,
-        "top_performers": top_performers,
-        "overdue_tasks": [task_brief(t) for t in overdue_tasks],
-        "due_soon_tasks": [task_brief(t) for t in due_soon_tasks],
-        "subtask_progress": subtask_progress,
-        "comment_activity": comment_activity,
-        "sprint_progress": sprint_progress,
-    }
+    if not await ReminderService.cancel(db, reminder_id):
+        raise HTTPException(status_code=404, detail="Reminder not found")
+    await db.commit()
+    return {"ok": True}
 
 
 # ============= EXPORT / IMPORT =============
@@ -2928,9 +2614,9 @@ async def get_version():
 @router.get("/bot-status")
 async def get_bot_status_endpoint():
     """Статус Telegram-бота — живой ли, когда последний раз видели."""
-    from app.telegram.deadline_notifier import get_bot_status_from_db
+    from app.telegram.heartbeat import get_bot_status
 
-    return await get_bot_status_from_db()
+    return await get_bot_status()
 
 
 @router.post("/settings/restart/{service}")
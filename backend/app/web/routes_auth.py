@@ -13,7 +13,6 @@ from app.config import settings, get_web_url_async
 from app.domain.models import LocalAccount, LocalIdentity, UserIdentity, AppSetting, TeamMember
 from sqlalchemy import select
 from app.services.account_service import AccountService
-from app.services.settings_service import SettingsService
 
 logger = get_logger(__name__)
 
@@ -307,21 +306,9 @@ async def update_profile(request: UpdateProfileRequest, account_id: int = Query(
 @router.get("/notification-settings")
 async def get_notification_settings(account_id: int = Query(...), db: AsyncSession = Depends(get_db)):
     """Get user's push notification preferences."""
-    result = await db.execute(
-        select(AppSetting.value).where(AppSetting.key == f"notif_prefs_{account_id}")
-    )
-    val = result.scalar_one_or_none()
-    if val:
-        import json
-        return json.loads(val)
-    # Defaults
-    return {
-        "assigned": True,
-        "status_changed": True,
-        "comments": False,
-        "deadlines": True,
-        "all_tasks": False,
-    }
+    from app.services.push_service import NotificationPrefsService
+
+    return await NotificationPrefsService.get(db, account_id)
 
 
 @router.put("/notification-settings")
@@ -329,15 +316,9 @@ async def save_notification_settings(
     body: dict, account_id: int = Query(...), db: AsyncSession = Depends(get_db)
 ):
     """Save user's push notification preferences."""
-    import json
-    prefs = {
-        "assigned": body.get("assigned", True),
-        "status_changed": body.get("status_changed", True),
-        "comments": body.get("comments", False),
-        "deadlines": body.get("deadlines", True),
-        "all_tasks": body.get("all_tasks", False),
-    }
-    await SettingsService.set(db, f"notif_prefs_{account_id}", json.dumps(prefs))
+    from app.services.push_service import NotificationPrefsService
+
+    prefs = await NotificationPrefsService.set(db, account_id, body)
     await db.commit()
     return {"status": "ok", "settings": prefs}
 
@@ -1,9 +1,12 @@
 """Domain events API."""
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.db import get_db
 from app.domain import events as events_module
+from app.services.projection_service import ProjectionQueries, projection_runner
+from app.services.settings_service import SettingsService
 
 router = APIRouter()
 
@@ -34,4 +37,66 @@ async def get_events(
 async def check_enabled() -> dict:
     """Check if event store is enabled."""
     enabled = await events_module.is_event_store_enabled()
-    return {"enabled": enabled}
\ No newline at end of file
+    return {"enabled": enabled}
+
+
+class EnabledRequest(BaseModel):
+    enabled: bool
+
+
+@router.put("/enabled")
+async def set_enabled(request: EnabledRequest, db: AsyncSession = Depends(get_db)) -> dict:
+    """Enable or disable the event store (бот подхватит флаг в течение FLAG_CHECK_SECONDS)."""
+    await SettingsService.set(db, "event_store_enabled", "true" if request.enabled else "false")
+    await db.commit()
+    events_module.event_store.invalidate()
+    return {"enabled": request.enabled}
+
+
+# --- Проекции (read-модели по журналу событий) ---
+
+@router.get("/projections")
+async def get_projections(db: AsyncSession = Depends(get_db)) -> list[dict]:
+    """Курсоры проекций и отставание от головы журнала."""
+    return await projection_runner.status(db)
+
+
+class RebuildRequest(BaseModel):
+    projections: Optional[list[str]] = None  # None — все
+
+
+@router.post("/projections/rebuild")
+async def rebuild_projections(request: RebuildRequest, background_tasks: BackgroundTasks) -> dict:
+    """Очистить read-модели и проиграть журнал заново (в фоне; бот тоже догоняет курсор)."""
+    try:
+        await projection_runner.rebuild(request.projections)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(projection_runner.catch_up)
+    return {"status": "rebuilding", "projections": request.projections or list(projection_runner.projections)}
+
+
+@router.get("/tasks/{task_id}/activity")
+async def get_task_activity(
+    task_id: int,
+    limit: int = Query(50, le=500),
+    db: AsyncSession = Depends(get_db),
+) -> list[dict]:
+    """Лента активности задачи (проекция task_activity)."""
+    return await ProjectionQueries.task_activity(db, task_id, limit)
+
+
+@router.get("/status-durations")
+async def get_status_durations(db: AsyncSession = Depends(get_db)) -> list[dict]:
+    """Гистограмма времени в статусах (проекция status_durations)."""
+    return await ProjectionQueries.status_durations(db)
+
+
+@router.get("/throughput")
+async def get_user_throughput(
+    days: int = Query(30, ge=1, le=365),
+    assignee_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+) -> list[dict]:
+    """Создано/закрыто по дням и исполнителям (проекция user_throughput)."""
+    return await ProjectionQueries.throughput(db, days, assignee_id)
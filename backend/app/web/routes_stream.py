@@ -0,0 +1,56 @@
+"""SSE-поток изменений для веб-клиента (/api/stream)."""
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from app.services.change_stream import change_stream
+
+router = APIRouter()
+
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    project_id: Optional[list[int]] = Query(None, description="Только эти проекты (можно несколько)"),
+    last_event_id: Optional[int] = Query(None, description="Продолжить после этого id"),
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+):
+    """События ``task``/``sprint``/``meeting``/``comment`` с ``{op, id, project_id, task_id}``.
+
+    ``reset`` — пропущенное не восстановить, клиенту нужно перечитать списки.
+    EventSource сам переподключается и присылает Last-Event-ID.
+    """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+
+    async def events():
+        # Подписка — только внутри запущенного генератора: если клиент отключится
+        # до первого чанка, генератор не стартует и подписчика не останется
+        sub, backlog, reset = await change_stream.subscribe(set(project_id or ()), resume_from)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for change in backlog:
+                yield change.to_sse()
+            while True:
+                try:
+                    change = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield change.to_sse()
+                if sub.overflow and sub.queue.empty():
+                    sub.overflow = False
+                    yield "event: reset\ndata: {}\n\n"
+        finally:
+            change_stream.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # nginx не должен буферизовать поток
+    })
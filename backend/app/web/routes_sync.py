@@ -0,0 +1,26 @@
+"""Инкрементальная синхронизация задач (/api/sync)."""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db import get_db
+from app.services.sync_service import SyncService, SYNC_MAX_LIMIT, SYNC_PAGE_LIMIT
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("/tasks")
+async def sync_tasks(
+    since: int = Query(0, ge=0, description="Курсор из предыдущего ответа (0 — полная выгрузка)"),
+    limit: int = Query(SYNC_PAGE_LIMIT, ge=1, le=SYNC_MAX_LIMIT),
+    project_id: Optional[int] = Query(None),
+    assignee_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """Задачи, изменённые после ``since``: ``{cursor, has_more, tasks, removed}``.
+
+    Вместо полных списков /api/tasks, /api/backlog, /api/archive, /api/deleted:
+    клиент хранит курсор и при переподключении забирает только изменения
+    (в том числе тегов и зависимостей); архив, бэклог и удалённые различаются
+    флагами задачи, ``removed`` — удалённые из БД.
+    """
+    return await SyncService.changes(db, since, limit, project_id, assignee_id)
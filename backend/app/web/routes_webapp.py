@@ -14,6 +14,7 @@ from app.core.db import get_db
 from app.core.clock import Clock
 from app.domain.models import Task, Sprint, SprintTask
 from app.domain.enums import TaskStatus
+from app.services.sync_service import SyncService, SYNC_MAX_LIMIT, SYNC_PAGE_LIMIT
 from app.web.schemas import TaskResponse
 from app.config import settings
 
@@ -47,16 +48,7 @@ async def get_my_tasks(
     Используется Mini App для показа персональной доски прямо в Telegram.
     Возвращает задачи отсортированные: URGENT→HIGH→NORMAL→LOW, затем по due_date.
     """
-    from app.domain.models import UserIdentity
-
-    # Find LocalAccount via UserIdentity
-    identity_result = await db.execute(
-        select(UserIdentity.local_account_id).where(
-            UserIdentity.provider == "telegram",
-            UserIdentity.provider_user_id == str(telegram_id),
-        )
-    )
-    account_id = identity_result.scalar_one_or_none()
+    account_id = await _account_id(db, telegram_id)
     if not account_id:
         return []
 
@@ -93,6 +85,35 @@ async def get_my_tasks(
 
     return [_task_to_dict(t) for t in tasks]
 
+
+@router.get("/my-tasks/sync")
+async def sync_my_tasks(
+    telegram_id: int = Query(..., description="Telegram user ID"),
+    since: int = Query(0, ge=0, description="Курсор из предыдущего ответа (0 — всё)"),
+    limit: int = Query(SYNC_PAGE_LIMIT, ge=1, le=SYNC_MAX_LIMIT),
+    db: AsyncSession = Depends(get_db)):
+    """Изменения задач пользователя после курсора — для переподключения Mini App.
+
+    Задачи, переназначенные на другого, приходят в ``removed``. Формат — как у /api/sync/tasks.
+    """
+    account_id = await _account_id(db, telegram_id)
+    if not account_id:
+        return {"cursor": since, "has_more": False, "tasks": [], "removed": []}
+    return await SyncService.changes(db, since, limit, assignee_id=account_id)
+
+
+async def _account_id(db: AsyncSession, telegram_id: int) -> Optional[int]:
+    """LocalAccount по telegram-привязке (UserIdentity)."""
+    from app.domain.models import UserIdentity
+
+    identity_result = await db.execute(
+        select(UserIdentity.local_account_id).where(
+            UserIdentity.provider == "telegram",
+            UserIdentity.provider_user_id == str(telegram_id),
+        )
+    )
+    return identity_result.scalar_one_or_none()
+
 # ---------------------------------------------------------------------------
 # Текущий спринт (сводка для Mini App)
 # ---------------------------------------------------------------------------
@@ -2,11 +2,13 @@
 import json
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.clock import Clock
 from app.core.db import AsyncSessionLocal, get_db
-from app.domain.models import Webhook, WebhookLog
+from app.domain.models import Webhook, WebhookLog, WebhookOutbox
+from app.services.webhook_service import webhook_registry
 from app.web.schemas import (
     WebhookCreate,
     WebhookUpdate,
@@ -38,13 +40,61 @@ async def create_webhook(webhook: WebhookCreate, db: AsyncSession = Depends(get_
         events=json.dumps(webhook.events),
         secret=webhook.secret,
         is_active=webhook.is_active,
+        batch_window_sec=webhook.batch_window_sec,
+        batch_max_events=webhook.batch_max_events,
     )
     db.add(db_webhook)
     await db.commit()
+    webhook_registry.invalidate()
     await db.refresh(db_webhook)
     return db_webhook
 
 
+@router.get("/outbox/stats")
+async def get_outbox_stats(db: AsyncSession = Depends(get_db_session)):
+    """GET /api/webhooks/outbox/stats — очередь доставки и задержка (lag) доставки."""
+    from app.services.webhook_service import dispatcher
+
+    return await dispatcher.metrics(db)
+
+
+@router.get("/outbox/dead")
+async def get_dead_deliveries(db: AsyncSession = Depends(get_db_session)):
+    """GET /api/webhooks/outbox/dead — доставки, исчерпавшие попытки."""
+    result = await db.execute(
+        select(WebhookOutbox).where(WebhookOutbox.status == "dead")
+        .order_by(WebhookOutbox.id.desc()).limit(100)
+    )
+    return [
+        {
+            "id": row.id,
+            "webhook_id": row.webhook_id,
+            "event": row.event,
+            "attempts": row.attempts,
+            "last_error": row.last_error,
+            "created_at": row.created_at,
+        }
+        for row in result.scalars()
+    ]
+
+
+@router.post("/outbox/{outbox_id}/retry")
+async def retry_dead_delivery(outbox_id: int, db: AsyncSession = Depends(get_db_session)):
+    """POST /api/webhooks/outbox/{id}/retry — вернуть dead-доставку в очередь."""
+    from app.services.webhook_service import notify_dispatcher
+
+    result = await db.execute(
+        update(WebhookOutbox)
+        .where(WebhookOutbox.id == outbox_id, WebhookOutbox.status == "dead")
+        .values(status="pending", attempts=0, next_attempt_at=Clock.now())
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=404, detail="Dead delivery not found")
+    await db.commit()
+    notify_dispatcher()
+    return {"ok": True}
+
+
 @router.get("/{webhook_id}", response_model=WebhookResponse)
 async def get_webhook(webhook_id: int, db: AsyncSession = Depends(get_db_session)):
     """GET /api/webhooks/{id} — получить вебхук."""
@@ -75,8 +125,13 @@ async def update_webhook(
         webhook.secret = webhook_update.secret
     if webhook_update.is_active is not None:
         webhook.is_active = webhook_update.is_active
+    if webhook_update.batch_window_sec is not None:
+        webhook.batch_window_sec = webhook_update.batch_window_sec
+    if webhook_update.batch_max_events is not None:
+        webhook.batch_max_events = webhook_update.batch_max_events
 
     await db.commit()
+    webhook_registry.invalidate()
     await db.refresh(webhook)
     return webhook
 
@@ -91,6 +146,7 @@ async def delete_webhook(webhook_id: int, db: AsyncSession = Depends(get_db_sess
 
     await db.delete(webhook)
     await db.commit()
+    webhook_registry.invalidate()
     return None
 
 
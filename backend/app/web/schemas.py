@@ -1,7 +1,7 @@
 """Pydantic schemas for Web API."""
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AssigneeResponse(BaseModel):
@@ -138,6 +138,8 @@ class WebhookCreate(BaseModel):
     events: List[str]  # ["task.created", "task.status_changed", "task.updated", "task.deleted"]
     secret: Optional[str] = None
     is_active: bool = True
+    batch_window_sec: Optional[int] = Field(None, ge=0, le=3600)  # 0/None — без батчей
+    batch_max_events: Optional[int] = Field(None, ge=1, le=500)
 
 
 class WebhookUpdate(BaseModel):
@@ -146,6 +148,8 @@ class WebhookUpdate(BaseModel):
     events: Optional[List[str]] = None
     secret: Optional[str] = None
     is_active: Optional[bool] = None
+    batch_window_sec: Optional[int] = Field(None, ge=0, le=3600)
+    batch_max_events: Optional[int] = Field(None, ge=1, le=500)
 
 
 class WebhookResponse(BaseModel):
@@ -155,6 +159,8 @@ class WebhookResponse(BaseModel):
     events: str  # JSON string
     secret: Optional[str] = None
     is_active: bool
+    batch_window_sec: Optional[int] = None
+    batch_max_events: Optional[int] = None
     created_at: datetime
     last_triggered_at: Optional[datetime] = None
 
@@ -188,5 +194,6 @@ class LocalAccountResponse(BaseModel):
     display_name: Optional[str] = None
     email: Optional[str] = None
     is_active: bool
+    last_seen_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,105 @@
+"""Бенчмарк пула SQLite: req/s для /api/tasks и /api/tasks/{id}/status.
+
+Сравнивает SQLITE_POOL_MODE=null (NullPool, как раньше) и queue (пул
+долгоживущих соединений с PRAGMA). Каждый режим запускается в отдельном
+процессе на временной БД, запросы идут через ASGI без сети.
+
+    cd backend && python benchmarks/bench_db_pool.py --tasks 500 --requests 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ["null", "queue"]
+
+
+async def _worker(n_tasks: int, n_requests: int, concurrency: int) -> dict:
+    from httpx import AsyncClient, ASGITransport
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.domain.models import Task
+    from app.domain.enums import TaskSource
+    from app.web.app import app
+
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Task(title=f"Bench task {i}", source=TaskSource.MANUAL_COMMAND.value)
+            for i in range(n_tasks)
+        ])
+        await db.commit()
+
+    statuses = ["TODO", "DOING"]
+    sem = asyncio.Semaphore(concurrency)
+    results = {}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def run(name: str, make_request):
+            async def one(i: int):
+                async with sem:
+                    resp = await make_request(i)
+                    assert resp.status_code == 200, resp.text
+
+            started = time.perf_counter()
+            await asyncio.gather(*[one(i) for i in range(n_requests)])
+            elapsed = time.perf_counter() - started
+            results[name] = round(n_requests / elapsed, 1)
+
+        await run("GET /api/tasks", lambda i: client.get("/api/tasks"))
+        await run(
+            "POST /api/tasks/{id}/status",
+            lambda i: client.post(
+                f"/api/tasks/{i % n_tasks + 1}/status",
+                json={"status": statuses[i % 2]},
+            ),
+        )
+
+    await engine.dispose()
+    return results
+
+
+def _run_mode(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "SQLITE_POOL_MODE": mode,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+        }
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker",
+             "--tasks", str(args.tasks),
+             "--requests", str(args.requests),
+             "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import logging
+        logging.disable(logging.CRITICAL)
+        results = asyncio.run(_worker(args.tasks, args.requests, args.concurrency))
+        print(json.dumps(results))
+        return
+
+    print(f"tasks={args.tasks} requests={args.requests} concurrency={args.concurrency}")
+    for mode in MODES:
+        for endpoint, rps in _run_mode(mode, args).items():
+            print(f"  {mode:<6} {endpoint:<30} {rps:>8} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Бенчмарк check_deadlines: тысячи задач с дедлайном в окне уведомлений.
+
+Создаёт временную БД (задачи, исполнители с telegram-привязкой, часть порогов
+уже отправлена) и гоняет ``check_deadlines`` с мгновенным фейковым ботом и снятым
+лимитом отправки — время цикла складывается из запросов к БД и подготовки текстов.
+
+    cd backend && python benchmarks/bench_deadlines.py --tasks 100000 --due 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class _Bot:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.sent += 1
+
+
+async def _worker(n_tasks: int, n_due: int) -> dict:
+    from datetime import timedelta
+    from sqlalchemy import text
+    from app.core.clock import Clock
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.telegram import deadline_notifier
+
+    await init_db()
+    rnd = random.Random(7)
+    now = Clock.now()
+    async with AsyncSessionLocal() as db:
+        for i in range(1, 51):
+            await db.execute(text(
+                "INSERT INTO local_accounts (first_name, display_name, is_active, system_role, timezone, "
+                "created_at, updated_at) VALUES (:n, :n, 1, 'user', :tz, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+            ), {"n": f"User {i}", "tz": rnd.choice([None, "Europe/Moscow", "Asia/Tokyo"])})
+            await db.execute(text(
+                "INSERT INTO user_identities (local_account_id, provider, provider_user_id, linked_at) "
+                "VALUES (:i, 'telegram', :tg, CURRENT_TIMESTAMP)"
+            ), {"i": i, "tg": str(100000 + i)})
+        rows = []
+        for i in range(1, n_tasks + 1):
+            due = (now + timedelta(minutes=rnd.randint(10, 24 * 60)) if i <= n_due
+                   else now + timedelta(days=rnd.randint(2, 60)))
+            rows.append({"title": f"Task {i}", "assignee_id": rnd.randint(1, 50), "due_date": due})
+        await db.execute(text("""
+            INSERT INTO tasks (title, status, priority, source, assignee_id, due_date, created_at, updated_at,
+                               archived, deleted, is_idea, backlog, time_spent)
+            VALUES (:title, 'TODO', 'NORMAL', 'web', :assignee_id, :due_date, CURRENT_TIMESTAMP,
+                    CURRENT_TIMESTAMP, 0, 0, 0, 0, 0)
+        """), rows)
+        # Треть задач в окне уже получила уведомление за 24ч
+        await db.execute(text(
+            "INSERT INTO deadline_notifications (task_id, threshold_hours, sent_at, user_telegram_id) "
+            "VALUES (:t, 24, CURRENT_TIMESTAMP, 1)"
+        ), [{"t": t} for t in range(1, n_due + 1, 3)])
+        await db.commit()
+
+    timings = []
+    sent = []
+    for _ in range(2):  # второй прогон: всё уже отправлено, остаётся только выборка
+        bot = _Bot()
+        started = time.perf_counter()
+        await deadline_notifier.check_deadlines(bot)
+        timings.append(round((time.perf_counter() - started) * 1000, 1))
+        sent.append(bot.sent)
+    await engine.dispose()
+    return {"first_ms": timings[0], "first_sent": sent[0], "second_ms": timings[1], "second_sent": sent[1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--due", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(_worker(args.tasks, args.due[0]))))
+        return
+
+    for due in args.due:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/deadlines.db"}
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", "--tasks", str(args.tasks), "--due", str(due)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"  tasks={args.tasks:<7} due={due:<6} first={r['first_ms']}ms (sent {r['first_sent']}) "
+                  f"repeat={r['second_ms']}ms (sent {r['second_sent']})")
+
+
+if __name__ == "__main__":
+    main()
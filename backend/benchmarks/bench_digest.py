@@ -0,0 +1,131 @@
+"""Бенчмарк /api/digest на 10k/100k задач.
+
+Создаёт временную БД (проекты, исполнители, подзадачи, спринт, комментарии),
+замеряет латентность и пик памяти Python для ``DigestService.get_digest_data``.
+
+    cd backend && python benchmarks/bench_digest.py --tasks 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+async def _worker(n_tasks: int, repeats: int) -> dict:
+    from datetime import timedelta
+    from sqlalchemy import text
+    from app.core.clock import Clock
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.services.digest_service import DigestService
+
+    await init_db()
+    rnd = random.Random(7)
+    now = Clock.now()
+    statuses = ["TODO", "DOING", "DONE", "BLOCKED", "ON_HOLD"]
+    priorities = ["URGENT", "HIGH", "NORMAL", "LOW"]
+    async with AsyncSessionLocal() as db:
+        for i in range(20):
+            await db.execute(text(
+                "INSERT INTO projects (name, is_active, deleted, created_at) "
+                "VALUES (:n, 1, 0, CURRENT_TIMESTAMP)"
+            ), {"n": f"Project {i}"})
+        for i in range(50):
+            await db.execute(text(
+                "INSERT INTO local_accounts (first_name, display_name, is_active, system_role, created_at, updated_at) "
+                "VALUES (:n, :n, 1, 'user', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+            ), {"n": f"User {i}"})
+        rows = []
+        for i in range(1, n_tasks + 1):
+            status = rnd.choice(statuses)
+            created = now - timedelta(days=rnd.randint(1, 90))
+            rows.append({
+                "title": f"Task {i}",
+                "status": status,
+                "priority": rnd.choice(priorities),
+                "project_id": rnd.choice([None] + list(range(1, 21))),
+                "assignee_id": rnd.randint(1, 50),
+                "parent_task_id": rnd.randint(1, i - 1) if i > 10 and rnd.random() < 0.2 else None,
+                "due_date": now + timedelta(days=rnd.randint(-20, 20)) if rnd.random() < 0.5 else None,
+                "created_at": created,
+                "completed_at": created + timedelta(hours=rnd.randint(1, 500)) if status == "DONE" else None,
+                "archived": rnd.random() < 0.05,
+                "backlog": rnd.random() < 0.1,
+            })
+        await db.execute(text("""
+            INSERT INTO tasks (title, status, priority, source, project_id, assignee_id, parent_task_id,
+                               due_date, created_at, updated_at, completed_at, archived, deleted,
+                               is_idea, backlog, time_spent)
+            VALUES (:title, :status, :priority, 'web', :project_id, :assignee_id, :parent_task_id,
+                    :due_date, :created_at, :created_at, :completed_at, :archived, 0, 0, :backlog, 0)
+        """), rows)
+        await db.execute(text(
+            "INSERT INTO sprints (name, status, position, is_deleted, start_date, end_date, created_at) "
+            "VALUES ('Sprint', 'active', 0, 0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+        ))
+        await db.execute(
+            text("INSERT INTO sprint_tasks (sprint_id, task_id, position, created_at) "
+                 "VALUES (1, :t, 0, CURRENT_TIMESTAMP)"),
+            [{"t": t} for t in range(1, n_tasks + 1, 50)],
+        )
+        await db.execute(
+            text("INSERT INTO comments (task_id, text, author_name, created_at) "
+                 "VALUES (:t, 'c', :a, CURRENT_TIMESTAMP)"),
+            [{"t": t, "a": f"User {t % 50}"} for t in range(1, n_tasks + 1, 5)],
+        )
+        await db.commit()
+
+    timings = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            digest = await DigestService(db).get_digest_data()
+            timings.append((time.perf_counter() - started) * 1000)
+        # Память — отдельным прогоном: tracemalloc сильно замедляет
+        tracemalloc.start()
+        await DigestService(db).get_digest_data()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    await engine.dispose()
+    timings.sort()
+    return {
+        "total": digest["stats"]["total"],
+        "p50_ms": round(timings[len(timings) // 2], 1),
+        "max_ms": round(timings[-1], 1),
+        "peak_kb": peak // 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(_worker(args.tasks[0], args.repeats))))
+        return
+
+    for n in args.tasks:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/digest.db"}
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", "--tasks", str(n), "--repeats", str(args.repeats)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"  tasks={n:<7} counted={r['total']:<7} p50={r['p50_ms']}ms "
+                  f"max={r['max_ms']}ms peak={r['peak_kb']}KB")
+
+
+if __name__ == "__main__":
+    main()
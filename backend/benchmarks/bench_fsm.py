@@ -0,0 +1,109 @@
+"""Бенчмарк FSM-хранилища бота: накладные расходы на апдейт SQLiteStorage против MemoryStorage.
+
+Имитирует то, что делает aiogram: FSM-middleware читает состояние на каждый
+апдейт, шаг диалога — get_data + update_data + set_state. Считает задержку
+на апдейт (p50/p99) для «горячих» пользователей, первого апдейта нового
+пользователя (промах кэша → SELECT) и режима без кэша (FSM_CACHE=false).
+
+    cd backend && python benchmarks/bench_fsm.py --users 1000 --updates 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _percentiles(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50": samples[len(samples) // 2] * 1e6,
+        "p99": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+async def _run(storage, users: int, updates: int, rnd: random.Random) -> dict:
+    from aiogram.fsm.storage.base import StorageKey
+
+    keys = [StorageKey(bot_id=1, chat_id=uid, user_id=uid) for uid in range(1, users + 1)]
+    cold, hot, steps = [], [], []
+    for key in keys:
+        started = time.perf_counter()
+        await storage.get_state(key)
+        cold.append(time.perf_counter() - started)
+    for i in range(updates):
+        key = rnd.choice(keys)
+        started = time.perf_counter()
+        await storage.get_state(key)  # FSM-middleware
+        if i % 4 == 0:
+            # Шаг диалога в handler
+            data = await storage.get_data(key)
+            await storage.update_data(key, {"step": data.get("step", 0) + 1, "title": f"Задача {i}"})
+            await storage.set_state(key, f"Dialog:step{i % 3}")
+            steps.append(time.perf_counter() - started)
+        else:
+            hot.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    await storage.close()
+    return {
+        "cold": _percentiles(cold),
+        "hot": _percentiles(hot),
+        "step": _percentiles(steps),
+        "close_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+async def _worker(users: int, updates: int) -> dict:
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from sqlalchemy import text
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.telegram.fsm_storage import SQLiteStorage
+
+    await init_db()
+    result = {
+        "memory": await _run(MemoryStorage(), users, updates, random.Random(7)),
+        "sqlite": await _run(SQLiteStorage(), users, updates, random.Random(7)),
+        "sqlite_nocache": await _run(SQLiteStorage(cache=False), users, updates, random.Random(7)),
+    }
+    async with AsyncSessionLocal() as db:
+        result["rows"] = (await db.execute(text("SELECT COUNT(*) FROM fsm_states"))).scalar()
+    await engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(_worker(args.users, args.updates))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/fsm.db"}
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", "--users", str(args.users), "--updates", str(args.updates)],
+            env=env, capture_output=True, text=True, check=True,
+        )
+    r = json.loads(out.stdout.strip().splitlines()[-1])
+    print(f"  users={args.users} updates={args.updates} (мкс на апдейт, p50/p99)")
+    for name in ("memory", "sqlite", "sqlite_nocache"):
+        m = r[name]
+        print(f"  {name:<15} hot={m['hot']['p50']:.1f}/{m['hot']['p99']:.1f}  "
+              f"step={m['step']['p50']:.1f}/{m['step']['p99']:.1f}  "
+              f"cold={m['cold']['p50']:.0f}/{m['cold']['p99']:.0f}  close={m['close_ms']:.1f}ms")
+    print(f"  строк в fsm_states: {r['rows']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Бенчмарк рассылки Web Push: синхронный pywebpush в общем executor против PushDispatcher.
+
+Поднимает локальный push-сервис (aiohttp, отвечает 201) и шлёт одно уведомление
+на N подписок с настоящими ключами p256dh/auth — шифрование и подпись VAPID
+честные, сеть — loopback. БД не нужна: ключ VAPID подставляется напрямую.
+
+    cd backend && python benchmarks/bench_push.py --subs 100 1000
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+PORT = 8799
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _subscriptions(n: int) -> list:
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    subs = []
+    for i in range(n):
+        key = ec.generate_private_key(ec.SECP256R1()).public_key()
+        subs.append(SimpleNamespace(
+            endpoint=f"http://127.0.0.1:{PORT}/push/{i}",
+            p256dh=_b64(key.public_bytes(Encoding.X962, PublicFormat.UncompressedPoint)),
+            auth=_b64(os.urandom(16)),
+        ))
+    return subs
+
+
+async def _legacy(subs: list, payload: str, private_key: str) -> int:
+    """Как было: webpush на подписку в общем executor, новое соединение на каждый запрос."""
+    from pywebpush import webpush
+
+    loop = asyncio.get_running_loop()
+
+    def _send(sub):
+        webpush(
+            subscription_info={"endpoint": sub.endpoint, "keys": {"p256dh": sub.p256dh, "auth": sub.auth}},
+            data=payload, vapid_private_key=private_key,
+            vapid_claims={"sub": "mailto:bench@example.com"},
+            content_encoding="aes128gcm", ttl=3600, timeout=10,
+        )
+
+    results = await asyncio.gather(*(loop.run_in_executor(None, _send, sub) for sub in subs),
+                                   return_exceptions=True)
+    return sum(1 for r in results if not isinstance(r, Exception))
+
+
+async def main(sizes: list[int]) -> None:
+    from aiohttp import web
+    from py_vapid import Vapid
+    from app.services.push_service import PushDispatcher
+    from app.services.vapid_service import generate_vapid_keys
+
+    async def handler(request):
+        await request.read()
+        return web.Response(status=201)
+
+    app = web.Application()
+    app.router.add_post("/push/{n}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+
+    private_key, _ = generate_vapid_keys()
+    payload = json.dumps({"title": "Задача обновлена: #1", "body": "Новый статус: DONE", "url": "/?task=1"})
+    try:
+        for n in sizes:
+            subs = _subscriptions(n)
+            started = time.perf_counter()
+            legacy_ok = await _legacy(subs, payload, private_key)
+            legacy = time.perf_counter() - started
+
+            dispatcher = PushDispatcher(senders=32, encrypt_workers=2)
+            dispatcher._vapid = (Vapid.from_string(private_key=private_key), "bench@example.com")
+            started = time.perf_counter()
+            results = await dispatcher.deliver(subs, payload)
+            current = time.perf_counter() - started
+            await dispatcher.close()
+
+            print(f"  subs={n:<6} pywebpush+executor={legacy:6.2f}s (ok {legacy_ok})  "
+                  f"PushDispatcher={current:6.2f}s (ok {results.count('sent')})")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subs", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+    asyncio.run(main(args.subs))
@@ -0,0 +1,105 @@
+"""Бенчмарк /api/search и /api/search/all на FTS5-индексе.
+
+Создаёт временную БД с N задачами (заголовки/описания на русском и английском,
+комментарии и теги), затем замеряет латентность ``SearchService.search_tasks``
+для типичных запросов.
+
+    cd backend && python benchmarks/bench_search.py --tasks 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+WORDS = [
+    "отчёт", "релиз", "Деплой", "сервер", "бэкап", "миграция", "Дизайн", "макет",
+    "report", "release", "deploy", "server", "backup", "migration", "design", "invoice",
+    "клиент", "договор", "оплата", "Telegram", "бот", "webhook", "поиск", "индекс",
+]
+SYLLABLES = ["ка", "ро", "ми", "на", "те", "ли", "за", "пе", "st", "ar", "on", "re", "de", "la", "ko", "vi"]
+QUERIES = ["деплой", "ДЕПЛОЙ сервер", "миг", "report backup", "оплата договор", "tele", "срочно", "42"]
+
+
+def _vocabulary(rnd: random.Random, size: int = 20000) -> list[str]:
+    """Синтетический словарь + реальные слова с частотой ~1%."""
+    words = list({"".join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))) for _ in range(size)})
+    return words + WORDS * (len(words) // 100 // len(WORDS) + 1)
+
+
+async def _run(n_tasks: int, repeats: int):
+    from sqlalchemy import text
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.services.search_service import SearchService
+
+    await init_db()
+    rnd = random.Random(1)
+    vocab = _vocabulary(rnd)
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("INSERT INTO tags (name, color, created_at) VALUES ('срочно', '#f00', CURRENT_TIMESTAMP)"))
+        await db.execute(
+            text("""INSERT INTO tasks (title, description, status, priority, source, archived, deleted,
+                                       is_idea, backlog, time_spent, created_at, updated_at)
+                    VALUES (:title, :description, 'TODO', 'NORMAL', 'web', 0, 0, 0, 0, 0,
+                            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"""),
+            [
+                {
+                    "title": " ".join(rnd.choices(vocab, k=4)),
+                    "description": " ".join(rnd.choices(vocab, k=20)),
+                }
+                for _ in range(n_tasks)
+            ],
+        )
+        await db.execute(
+            text("INSERT INTO comments (task_id, text, created_at) VALUES (:task_id, :text, CURRENT_TIMESTAMP)"),
+            [{"task_id": i, "text": " ".join(rnd.choices(vocab, k=8))} for i in range(1, n_tasks + 1, 10)],
+        )
+        await db.execute(
+            text("INSERT INTO task_tags (task_id, tag_id) VALUES (:task_id, 1)"),
+            [{"task_id": i} for i in range(1, n_tasks + 1, 50)],
+        )
+        await db.commit()
+    print(f"seeded {n_tasks} tasks (index via triggers) in {time.perf_counter() - started:.1f}s")
+
+    async with AsyncSessionLocal() as db:
+        for q in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                hits = await SearchService.search_tasks(db, q, 20)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            print(f"  {q!r:<22} hits={len(hits):<3} p50={timings[len(timings) // 2]:.2f}ms "
+                  f"max={timings[-1]:.2f}ms")
+        print("unified (all types, page 2):")
+        for q in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                result = await SearchService.search(db, q, limit=20, offset=20)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            print(f"  {q!r:<22} total={result['total']:<6} p50={timings[len(timings) // 2]:.2f}ms "
+                  f"max={timings[-1]:.2f}ms")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp}/search.db"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    asyncio.run(_run(args.tasks, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
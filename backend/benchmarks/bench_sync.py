@@ -0,0 +1,105 @@
+"""Бенчмарк /api/sync/tasks: полная выгрузка и дельта после правок против /api/tasks.
+
+Создаёт временную БД с N задачами (часть с тегами и зависимостями), меняет
+``--changes`` задач и сравнивает объём и время ответа дельты с полными списками.
+
+    cd backend && python benchmarks/bench_sync.py --tasks 10000 --changes 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def _get(client, url: str, params: dict) -> tuple[dict | list, int, float]:
+    started = time.perf_counter()
+    response = await client.get(url, params=params)
+    elapsed = (time.perf_counter() - started) * 1000
+    response.raise_for_status()
+    return response.json(), len(response.content), elapsed
+
+
+async def _worker(n_tasks: int, n_changes: int) -> dict:
+    from httpx import AsyncClient, ASGITransport
+    from sqlalchemy import text
+    from app.core.clock import Clock
+    from app.core.db import init_db, AsyncSessionLocal, engine
+    from app.web.app import app
+
+    await init_db()
+    rnd = random.Random(7)
+    now = Clock.now()
+    async with AsyncSessionLocal() as db:
+        for i in range(20):
+            await db.execute(text("INSERT INTO tags (name, color, created_at) VALUES (:n, '#6366f1', :now)"),
+                             {"n": f"tag{i}", "now": now})
+        await db.execute(text("""
+            INSERT INTO tasks (title, description, status, priority, source, created_at, updated_at,
+                               archived, deleted, is_idea, backlog, time_spent)
+            VALUES (:title, :description, :status, 'NORMAL', 'web', :now, :now, 0, 0, 0, :backlog, 0)
+        """), [{"title": f"Task {i}", "description": "описание " * 20, "now": now,
+                "status": rnd.choice(["TODO", "DOING", "DONE"]), "backlog": rnd.random() < 0.1}
+               for i in range(n_tasks)])
+        await db.execute(text("INSERT INTO task_tags (task_id, tag_id) VALUES (:t, :g)"),
+                         [{"t": t, "g": rnd.randint(1, 20)} for t in range(1, n_tasks + 1, 3)])
+        await db.execute(text("INSERT INTO task_dependencies (task_id, depends_on_id, created_at) "
+                              "VALUES (:t, :d, :now)"),
+                         [{"t": t, "d": t - 1, "now": now} for t in range(2, n_tasks + 1, 10)])
+        await db.commit()
+
+    result = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        _, result["tasks_bytes"], result["tasks_ms"] = await _get(client, "/api/tasks", {})
+
+        cursor, full_bytes, full_ms, synced = 0, 0, 0.0, 0
+        while True:
+            page, size, ms = await _get(client, "/api/sync/tasks", {"since": cursor, "limit": 5000})
+            cursor, full_bytes, full_ms, synced = page["cursor"], full_bytes + size, full_ms + ms, synced + len(page["tasks"])
+            if not page["has_more"]:
+                break
+        result.update(full_bytes=full_bytes, full_ms=full_ms, synced=synced)
+
+        async with AsyncSessionLocal() as db:
+            for task_id in rnd.sample(range(1, n_tasks + 1), n_changes):
+                await db.execute(text("UPDATE tasks SET status = 'DOING' WHERE id = :id"), {"id": task_id})
+            await db.commit()
+        page, result["delta_bytes"], result["delta_ms"] = await _get(client, "/api/sync/tasks", {"since": cursor})
+        result["delta_tasks"] = len(page["tasks"])
+    await engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--changes", type=int, default=50)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(_worker(args.tasks[0], args.changes))))
+        return
+
+    for n in args.tasks:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/sync.db"}
+            out = subprocess.run(
+                [sys.executable, __file__, "--worker", "--tasks", str(n), "--changes", str(args.changes)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"  tasks={n:<7} /api/tasks={r['tasks_bytes'] // 1024}KB {r['tasks_ms']:.0f}ms  "
+                  f"sync full={r['full_bytes'] // 1024}KB {r['full_ms']:.0f}ms ({r['synced']} задач)  "
+                  f"delta={r['delta_bytes'] / 1024:.1f}KB {r['delta_ms']:.0f}ms ({r['delta_tasks']} задач)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Стресс-тест записи в SQLite: процессы «бот» и «API» на одном файле.
+
+Бот пишет heartbeat, доменные события и записи deadline_notifications,
+API меняет статусы задач через ASGI и пишет webhook_logs. Прогон делается
+с SQLITE_WRITE_QUEUE=true и false; печатаются p50/p99/max латентности
+записи и число ошибок ``database is locked``.
+
+    cd backend && python benchmarks/stress_sqlite_writes.py --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.lock_errors = 0
+        self.other_errors = 0
+
+    async def measure(self, coro):
+        started = time.perf_counter()
+        try:
+            await coro
+        except Exception as e:
+            if "locked" in str(e).lower():
+                self.lock_errors += 1
+            else:
+                self.other_errors += 1
+            return
+        self.latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def _setup(n_tasks: int):
+    from app.core.db import init_db, AsyncSessionLocal
+    from app.domain.models import Task, Webhook, AppSetting
+    from app.domain.enums import TaskSource
+
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Task(title=f"Stress task {i}", source=TaskSource.MANUAL_COMMAND.value)
+            for i in range(n_tasks)
+        ])
+        db.add(Webhook(url="http://127.0.0.1:9/hook", events="[]", is_active=False))
+        db.add(AppSetting(key="event_store_enabled", value="true"))
+        await db.commit()
+
+
+async def _bot_role(seconds: float, workers: int, rec: _Recorder):
+    from app.core.db import run_write
+    from app.domain.events import save_event
+    from app.domain.models import DeadlineNotification
+    from app.telegram.heartbeat import persist_heartbeat
+
+    stop_at = time.monotonic() + seconds
+
+    async def heartbeat_loop():
+        while time.monotonic() < stop_at:
+            await rec.measure(persist_heartbeat("stress_bot"))
+            await asyncio.sleep(0.05)
+
+    async def notify_loop(worker: int):
+        i = 0
+        while time.monotonic() < stop_at:
+            i += 1
+
+            async def _write(db, task_id=worker * 100000 + i):
+                db.add(DeadlineNotification(task_id=task_id, threshold_hours=3, user_telegram_id=1))
+
+            await rec.measure(run_write(_write))
+            await rec.measure(save_event("task.reminder", {"i": i}, task_id=i))
+
+    await asyncio.gather(heartbeat_loop(), *[notify_loop(w) for w in range(workers)])
+
+
+async def _api_role(seconds: float, workers: int, n_tasks: int, rec: _Recorder):
+    from httpx import AsyncClient, ASGITransport
+    from app.core.db import run_write
+    from app.domain.models import WebhookLog
+    from app.web.app import app
+
+    stop_at = time.monotonic() + seconds
+    statuses = ["TODO", "DOING"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://stress") as client:
+        async def change_status(task_id: int, status: str):
+            resp = await client.post(f"/api/tasks/{task_id}/status", json={"status": status})
+            if resp.status_code != 200:
+                raise RuntimeError(resp.text)
+
+        async def worker_loop(worker: int):
+            i = 0
+            while time.monotonic() < stop_at:
+                i += 1
+                await rec.measure(change_status((worker * 7 + i) % n_tasks + 1, statuses[i % 2]))
+
+                async def _write(db):
+                    db.add(WebhookLog(webhook_id=1, event="task.status_changed", status_code=200))
+
+                await rec.measure(run_write(_write))
+
+        await asyncio.gather(*[worker_loop(w) for w in range(workers)])
+
+
+def _worker_main(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import logging
+    logging.disable(logging.CRITICAL)
+    rec = _Recorder()
+
+    async def run():
+        from app.core.db import engine, write_queue
+        if args.role == "setup":
+            await _setup(args.tasks)
+        elif args.role == "bot":
+            await _bot_role(args.seconds, args.workers, rec)
+        else:
+            await _api_role(args.seconds, args.workers, args.tasks, rec)
+        await engine.dispose()
+        return write_queue.stats
+
+    queue_stats = asyncio.run(run())
+    print(json.dumps({
+        "ops": len(rec.latencies),
+        "p50_ms": round(_percentile(rec.latencies, 0.50), 1),
+        "p99_ms": round(_percentile(rec.latencies, 0.99), 1),
+        "max_ms": round(max(rec.latencies, default=0), 1),
+        "lock_errors": rec.lock_errors,
+        "other_errors": rec.other_errors,
+        "batches": queue_stats["batches"],
+    }))
+
+
+def _spawn(role: str, env: dict, args) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, __file__, "--role", role,
+         "--seconds", str(args.seconds), "--workers", str(args.workers),
+         "--tasks", str(args.tasks)],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+
+
+def _collect(proc: subprocess.Popen) -> dict:
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(err)
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--role", choices=["setup", "bot", "api"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.role:
+        _worker_main(args)
+        return
+
+    print(f"seconds={args.seconds} workers={args.workers} per process")
+    for queue_on in ("false", "true"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "SQLITE_WRITE_QUEUE": queue_on,
+                "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/stress.db",
+            }
+            _collect(_spawn("setup", env, args))
+            procs = {role: _spawn(role, env, args) for role in ("bot", "api")}
+            for role, proc in procs.items():
+                r = _collect(proc)
+                print(
+                    f"  queue={queue_on:<5} {role:<4} ops={r['ops']:<6} "
+                    f"p50={r['p50_ms']}ms p99={r['p99_ms']}ms max={r['max_ms']}ms "
+                    f"locked={r['lock_errors']} errors={r['other_errors']} "
+                    f"commits={r['batches']}"
+                )
+
+
+if __name__ == "__main__":
+    main()
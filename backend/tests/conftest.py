@@ -47,4 +47,15 @@ async def test_client() -> AsyncGenerator[AsyncClient, None]:
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
-        yield client
\ No newline at end of file
+        yield client
+
+
+@pytest.fixture
+async def fake_bot_api():
+    """Fake Bot API server; bots from ``fake_bot_api.bot()`` talk to it instead of Telegram."""
+    from fake_bot_api import FakeBotAPI
+
+    api = FakeBotAPI()
+    await api.start()
+    yield api
+    await api.close()
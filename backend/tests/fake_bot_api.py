@@ -0,0 +1,60 @@
+"""Fake Telegram Bot API server: records requests, can answer 429 with retry_after."""
+import itertools
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+class FakeBotAPI:
+    """aiohttp server standing in for api.telegram.org.
+
+    ``calls`` — (method, chat_id, text, time) in arrival order;
+    ``flood[chat_id] = n`` — the next n requests to the chat get 429 with ``retry_after``.
+    """
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        self.calls: list[tuple[str, str, str, float]] = []
+        self.flood: dict[int, int] = {}
+        self._message_ids = itertools.count(1)
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        self.server = TestServer(app)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form = await request.post()
+        chat_id = form.get("chat_id")
+        if chat_id is not None and self.flood.get(int(chat_id)):
+            self.flood[int(chat_id)] -= 1
+            self.calls.append((method, chat_id, "429", time.monotonic()))
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+        self.calls.append((method, chat_id, form.get("text", ""), time.monotonic()))
+        if method == "sendMessage":
+            return web.json_response({"ok": True, "result": {
+                "message_id": next(self._message_ids), "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private" if int(chat_id) > 0 else "group"},
+                "text": form.get("text", ""),
+            }})
+        return web.json_response({"ok": True, "result": True})
+
+    def sent(self, chat_id: int) -> list[str]:
+        return [text for method, chat, text, _ in self.calls if chat == str(chat_id) and text != "429"]
+
+    async def start(self) -> None:
+        await self.server.start_server()
+
+    async def close(self) -> None:
+        await self.server.close()
+
+    def bot(self) -> Bot:
+        base = str(self.server.make_url("")).rstrip("/")
+        return Bot("123456:TEST", session=AiohttpSession(api=TelegramAPIServer.from_base(base)))
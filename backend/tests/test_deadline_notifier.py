@@ -0,0 +1,84 @@
+"""Test deadline notification planning and sending."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from app.telegram.deadline_notifier import DeadlineScheduler, _plan_notifications, _send_planned
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+def _row(task_id, hours_left, tg="100", tz=None, project_id=None):
+    return SimpleNamespace(
+        id=task_id, title=f"Task {task_id}", project_id=project_id,
+        due_date=NOW + timedelta(hours=hours_left), provider_user_id=tg, timezone=tz,
+    )
+
+
+def test_plan_notifications():
+    """Most urgent passed threshold per task, once; duplicates and bad ids are skipped."""
+    rows = [
+        _row(1, 20),
+        _row(2, 2),
+        _row(2, 2, tg="200"),
+        _row(3, 2),
+        _row(4, 30),
+        _row(5, 1, tg="not-a-number"),
+        _row(6, 1),
+    ]
+    sent = {(2, 24), (3, 24), (3, 3)}
+    planned = _plan_notifications(rows, sent, [24, 3], NOW, "Europe/Moscow")
+    assert [(p["task_id"], p["threshold_hours"]) for p in planned] == [(1, 24), (2, 3), (6, 3)]
+    assert planned[1]["user_telegram_id"] == 100
+    assert "01.03 в 17:00" in planned[1]["text"]  # 14:00 UTC → Москва
+
+
+@pytest.mark.asyncio
+async def test_send_planned():
+    """Failed sends are not reported as delivered."""
+
+    class Bot:
+        async def send_message(self, chat_id, text, parse_mode):
+            if chat_id == 2:
+                raise RuntimeError("blocked")
+
+    planned = [{"task_id": i, "threshold_hours": 3, "user_telegram_id": i, "text": "", "line": ""}
+               for i in range(1, 4)]
+    delivered = await _send_planned(Bot(), planned)
+    assert [item["task_id"] for item in delivered] == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_send_planned_coalesces_per_chat():
+    """Several tasks for one chat go out as a single summary message."""
+    messages = []
+
+    class Bot:
+        async def send_message(self, chat_id, text, parse_mode):
+            messages.append((chat_id, text))
+
+    planned = _plan_notifications([_row(1, 2), _row(2, 20), _row(3, 2, tg="200")],
+                                  set(), [24, 3], NOW, "UTC")
+    delivered = await _send_planned(Bot(), planned)
+    assert sorted(item["task_id"] for item in delivered) == [1, 2, 3]
+    assert sorted(chat for chat, _ in messages) == [100, 200]
+    summary = dict(messages)[100]
+    assert summary.startswith("⏰ Дедлайны: 2 задач") and "Task 1" in summary and "Task 2" in summary
+
+
+def test_scheduler_heap():
+    """Thresholds fire at due - h; passed ones collapse to now; rescheduling drops stale entries."""
+    scheduler = DeadlineScheduler(bot=None)
+    scheduler.notify_hours = [24, 3]
+    scheduler.schedule(1, NOW + timedelta(hours=10), NOW)  # 24ч уже прошло → сейчас, 3ч → +7ч
+    scheduler.schedule(2, NOW + timedelta(hours=30), NOW)
+    scheduler.schedule(3, NOW + timedelta(hours=5), NOW)
+    scheduler.schedule(3, None, NOW)  # задачу закрыли
+
+    assert scheduler.pop_due(NOW) == [1]
+    assert scheduler.seconds_until_next(NOW) == 6 * 3600  # задача 2: due - 24ч
+
+    scheduler.schedule(2, NOW + timedelta(hours=50), NOW)  # дедлайн перенесли
+    assert scheduler.pop_due(NOW + timedelta(hours=7)) == [1]
+    assert scheduler.pop_due(NOW + timedelta(hours=26)) == [2]
+    assert scheduler.pop_due(NOW + timedelta(hours=100)) == [2]
+    assert scheduler.seconds_until_next(NOW) is None
@@ -0,0 +1,40 @@
+"""Test digest aggregation."""
+import pytest
+from httpx import AsyncClient
+from app.services.digest_service import DigestService
+
+
+def _bucket(status, n, backlog=False, top_n=None, overdue=0, done_secs=0.0, done_n=0):
+    return {
+        "project_id": None, "priority": "NORMAL", "status": status, "backlog": backlog,
+        "n": n, "overdue": overdue, "due_soon": 0, "done_secs": done_secs, "done_n": done_n,
+        "top_n": n if top_n is None else top_n, "top_overdue": overdue, "top_due_soon": 0,
+        "top_done_secs": done_secs, "top_done_n": done_n,
+    }
+
+
+def test_fold_buckets():
+    """Backlog is counted separately; overdue ignores terminal statuses."""
+    buckets = [
+        _bucket("TODO", 4, overdue=2),
+        _bucket("DONE", 2, overdue=1, done_secs=2 * 86400.0, done_n=2),
+        _bucket("DOING", 3, backlog=True),
+        _bucket("BLOCKED", 1, top_n=0),
+    ]
+    stats = DigestService._fold(buckets)
+    assert stats["total"] == 7
+    assert stats["active"] == 5
+    assert stats["backlog"] == 3
+    assert stats["overdue"] == 2
+    assert stats["avg_completion_days"] == 1.0
+    assert DigestService._fold(buckets, "top_")["total"] == 6
+
+
+@pytest.mark.asyncio
+async def test_get_digest(test_client: AsyncClient):
+    """Digest endpoint returns all sections."""
+    response = await test_client.get("/api/digest")
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        data = response.json()
+        assert {"stats", "projects", "top_performers", "sprint_progress"} <= data.keys()
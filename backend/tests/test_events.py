@@ -0,0 +1,68 @@
+"""Test domain event store writer."""
+import asyncio
+import pytest
+from sqlalchemy import select, delete
+from app.core.db import AsyncSessionLocal
+from app.domain import events
+from app.domain.events import event_store
+from app.domain.models import DomainEvent
+
+
+@pytest.fixture
+def store_enabled():
+    event_store._enabled, event_store._checked_at = True, float("inf")
+    yield
+    event_store.invalidate()
+
+
+async def _events(event_type: str) -> list:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(DomainEvent).where(DomainEvent.event_type == event_type))).scalars().all()
+
+
+async def _cleanup(event_type: str):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(DomainEvent).where(DomainEvent.event_type == event_type))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_buffered_events_flush_in_batch(store_enabled, monkeypatch):
+    """Events without a session are buffered and written together."""
+    monkeypatch.setattr(events, "FLUSH_INTERVAL_SECONDS", 0.05)
+    for i in range(20):
+        await events.save_event("test.buffered", {"n": i}, task_id=i)
+    assert len(event_store._buffer) == 20
+    await asyncio.sleep(0.3)
+    try:
+        assert len(await _events("test.buffered")) == 20
+    finally:
+        await _cleanup("test.buffered")
+
+
+@pytest.mark.asyncio
+async def test_event_in_caller_transaction(store_enabled):
+    """With db= the event commits or rolls back with the caller."""
+    async with AsyncSessionLocal() as db:
+        await events.save_event("test.in_tx", {"n": 1}, db=db)
+        await db.rollback()
+    assert await _events("test.in_tx") == []
+
+    async with AsyncSessionLocal() as db:
+        await events.save_event("test.in_tx", {"n": 2}, db=db)
+        await db.commit()
+    try:
+        assert len(await _events("test.in_tx")) == 1
+    finally:
+        await _cleanup("test.in_tx")
+
+
+@pytest.mark.asyncio
+async def test_disabled_store_writes_nothing():
+    """Cached disabled flag short-circuits without touching the buffer."""
+    event_store._enabled, event_store._checked_at = False, float("inf")
+    try:
+        await events.save_event("test.disabled", {})
+        assert event_store._buffer == []
+    finally:
+        event_store.invalidate()
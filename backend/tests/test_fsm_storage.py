@@ -0,0 +1,81 @@
+"""Test SQLite-backed FSM storage for the bot."""
+import time
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import text
+from app.core import db as db_module
+from app.core.db import AsyncSessionLocal
+from app.telegram import fsm_storage
+from app.telegram.fsm_storage import SQLiteStorage
+
+KEY = StorageKey(bot_id=990000000002, chat_id=42, user_id=42)
+
+
+class Dialog(StatesGroup):
+    title = State()
+
+
+async def _cleanup():
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM fsm_states WHERE key LIKE '990000000002:%'"))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_dialog_step_coalesced_and_survives_restart(monkeypatch):
+    """set_state + update_data of one step is one write; a new storage instance sees the dialog."""
+    writes = []
+
+    async def counting_run_write(fn):
+        writes.append(fn)
+        return await db_module.run_write(fn)
+
+    monkeypatch.setattr(fsm_storage, "run_write", counting_run_write)
+    storage = SQLiteStorage(flush_interval=60)
+    try:
+        assert await storage.get_state(KEY) is None
+        await storage.set_state(KEY, Dialog.title)
+        await storage.update_data(KEY, {"chat_id": 42})
+        await storage.update_data(KEY, {"title": "Задача"})
+        assert writes == []
+        await storage.close()
+        assert len(writes) == 1
+
+        restarted = SQLiteStorage()
+        assert await restarted.get_state(KEY) == Dialog.title.state
+        assert await restarted.get_data(KEY) == {"chat_id": 42, "title": "Задача"}
+
+        # Сброс диалога удаляет строку
+        await restarted.set_state(KEY, None)
+        await restarted.set_data(KEY, {})
+        await restarted.close()
+        async with AsyncSessionLocal() as db:
+            count = (await db.execute(text("SELECT COUNT(*) FROM fsm_states WHERE key = :k"),
+                                      {"k": SQLiteStorage._key(KEY)})).scalar()
+        assert count == 0
+    finally:
+        await _cleanup()
+
+
+@pytest.mark.asyncio
+async def test_abandoned_dialog_expires():
+    storage = SQLiteStorage(ttl=60)
+    try:
+        await storage.set_state(KEY, Dialog.title)
+        await storage.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("UPDATE fsm_states SET updated_at = :t WHERE key = :k"),
+                             {"t": time.time() - 120, "k": SQLiteStorage._key(KEY)})
+            await db.commit()
+
+        restarted = SQLiteStorage(ttl=60)
+        assert await restarted.get_state(KEY) is None
+        await restarted.close()
+        async with AsyncSessionLocal() as db:
+            count = (await db.execute(text("SELECT COUNT(*) FROM fsm_states WHERE key = :k"),
+                                      {"k": SQLiteStorage._key(KEY)})).scalar()
+        assert count == 0
+    finally:
+        await _cleanup()
@@ -0,0 +1,61 @@
+"""Test the bot heartbeat file and throttled persistence."""
+import os
+import time
+
+import pytest
+from app.config import settings
+from app.telegram import heartbeat
+from app.telegram.heartbeat import Heartbeat, HeartbeatFile, get_bot_status
+
+
+def test_file_roundtrip_and_replace(tmp_path):
+    path = str(tmp_path / "hb.mmap")
+    writer, reader = HeartbeatFile(path), HeartbeatFile(path)
+    assert reader.read() is None
+
+    writer.write(100.0, 50.0, "teamflow_bot", b'{"sent": 1}')
+    beat = reader.read()
+    assert beat["last_seen"] == 100.0 and beat["username"] == "teamflow_bot"
+    assert beat["payload"] == {"sent": 1} and beat["pid"] == os.getpid()
+
+    writer.write(200.0, 50.0, "teamflow_bot")
+    assert reader.read()["last_seen"] == 200.0 and reader.read()["payload"] is None
+
+    # Файл пересоздан (рестарт бота с чистым томом) — читатель переоткрывает его
+    writer.close()
+    os.remove(path)
+    assert reader.read() is None
+    HeartbeatFile(path).write(300.0, 300.0, "new_bot")
+    assert reader.read()["username"] == "new_bot"
+    reader.close()
+
+
+@pytest.mark.asyncio
+async def test_status_from_file_and_throttled_persist(tmp_path, monkeypatch):
+    persisted = []
+
+    async def fake_persist(username, send_queue=None):
+        persisted.append(username)
+
+    def no_db():
+        raise AssertionError("status must not touch the database")
+
+    monkeypatch.setattr(settings, "BOT_HEARTBEAT_FILE", str(tmp_path / "hb.mmap"))
+    monkeypatch.setattr(heartbeat, "persist_heartbeat", fake_persist)
+    monkeypatch.setattr(heartbeat, "AsyncSessionLocal", no_db)
+
+    beat = Heartbeat()
+    for _ in range(5):
+        await beat.beat("teamflow_bot")
+    assert persisted == ["teamflow_bot"]
+    await beat.beat("renamed_bot")
+    assert persisted == ["teamflow_bot", "renamed_bot"]
+
+    status = await get_bot_status()
+    assert status["ok"] and status["username"] == "renamed_bot"
+    assert status["send_queue"]["queued"] == {"interactive": 0, "bulk": 0}
+
+    beat.file.write(time.time() - 600, time.time() - 700, "renamed_bot")
+    status = await get_bot_status()
+    assert not status["ok"] and status["error"].startswith("No heartbeat")
+    beat.file.close()
@@ -0,0 +1,34 @@
+"""Test notification coalescing."""
+import asyncio
+import pytest
+from app.services.notification_service import Notification, NotificationAggregator, summarize
+
+
+def test_summarize():
+    """One item passes through, many become a counted summary."""
+    one = Notification(title="Задача обновлена: #1", body="Новый статус: DONE")
+    assert summarize([one]) is one
+    many = [Notification(title=f"#{i}", body="", summary=f"#{i} → DONE") for i in range(7)]
+    note = summarize(many)
+    assert note.title == "Обновлено задач: 7"
+    assert note.body.splitlines()[0] == "#0 → DONE" and note.body.endswith("и ещё 2")
+
+
+@pytest.mark.asyncio
+async def test_aggregator_window():
+    """Events within the window reach send() once, grouped per recipient."""
+    flushed = []
+
+    async def send(batches):
+        flushed.append({key: len(items) for key, items in batches.items()})
+
+    aggregator = NotificationAggregator(0.05, send)
+    for _ in range(20):
+        aggregator.add(1, Notification(title="t", body="b"))
+    aggregator.add(2, Notification(title="t", body="b"))
+    await asyncio.sleep(0.1)
+    assert flushed == [{1: 20, 2: 1}]
+
+    aggregator.add(1, Notification(title="t", body="b"))
+    await aggregator.flush()
+    assert flushed[-1] == {1: 1}
@@ -0,0 +1,75 @@
+"""Test push recipients, notification preferences and the push transport."""
+import base64
+import os
+from types import SimpleNamespace
+import http_ece
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from py_vapid import Vapid
+from sqlalchemy import delete
+from app.core.db import AsyncSessionLocal
+from app.domain.models import NotificationPref, PushSubscription
+from app.services import push_service
+from app.services.push_service import (
+    NotificationPrefsService, PushDispatcher, NOTIFICATION_DEFAULTS, _encrypt,
+)
+from app.services.vapid_service import generate_vapid_keys
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def test_encrypt_roundtrip():
+    """aes128gcm payload decrypts with the subscription's private key."""
+    receiver = ec.generate_private_key(ec.SECP256R1())
+    auth = os.urandom(16)
+    sub = SimpleNamespace(
+        endpoint="https://push.test/1",
+        p256dh=_b64(receiver.public_key().public_bytes(Encoding.X962, PublicFormat.UncompressedPoint)),
+        auth=_b64(auth),
+    )
+    body = _encrypt(sub, b'{"title": "t"}')
+    assert http_ece.decrypt(body, private_key=receiver, auth_secret=auth, version="aes128gcm") == b'{"title": "t"}'
+
+
+def test_vapid_jwt_cached_per_origin(monkeypatch):
+    """One signature per push service origin until close to expiry."""
+    key = Vapid.from_string(private_key=generate_vapid_keys()[0])
+    dispatcher = PushDispatcher(senders=1, encrypt_workers=1)
+    first = dispatcher._authorization("https://fcm.googleapis.com/fcm/send/a", key, "a@b.c")
+    assert dispatcher._authorization("https://fcm.googleapis.com/fcm/send/b", key, "a@b.c") is first
+    assert dispatcher._authorization("https://updates.push.services.mozilla.com/x", key, "a@b.c") is not first
+    assert first["Authorization"].startswith("vapid t=")
+
+    now = push_service.time.time()
+    monkeypatch.setattr(push_service.time, "time",
+                        lambda: now + push_service.VAPID_JWT_TTL_SECONDS - push_service.VAPID_JWT_REFRESH_SECONDS + 1)
+    assert dispatcher._authorization("https://fcm.googleapis.com/fcm/send/a", key, "a@b.c") is not first
+
+
+@pytest.mark.asyncio
+async def test_recipients_filtered_by_prefs():
+    """No prefs row means defaults; a disabled pref drops the account in SQL."""
+    accounts = (910001, 910002, 910003)
+    async with AsyncSessionLocal() as db:
+        for account_id in accounts:
+            db.add(PushSubscription(endpoint=f"https://push.test/{account_id}", p256dh="k",
+                                    auth="a", account_id=account_id))
+        await NotificationPrefsService.set(db, accounts[1], {"status_changed": False})
+        await NotificationPrefsService.set(db, accounts[2], {"comments": True})
+        await db.commit()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            assert await NotificationPrefsService.get(db, accounts[0]) == NOTIFICATION_DEFAULTS
+            status = {r.account_id for r in await PushDispatcher.recipients(db, "status_changed")}
+            comments = {r.account_id for r in await PushDispatcher.recipients(db, "comments")}
+        assert {accounts[0], accounts[2]} <= status and accounts[1] not in status
+        assert accounts[2] in comments and not {accounts[0], accounts[1]} & comments
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(PushSubscription).where(PushSubscription.account_id.in_(accounts)))
+            await db.execute(delete(NotificationPref).where(NotificationPref.account_id.in_(accounts)))
+            await db.commit()
@@ -0,0 +1,56 @@
+"""Test persistent /remind reminders."""
+from datetime import timedelta
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal
+from app.domain.models import Task
+from app.services.reminder_service import ReminderService, _fire_due
+
+
+@pytest.mark.asyncio
+async def test_get_reminders(test_client: AsyncClient):
+    """List endpoint returns pending reminders."""
+    response = await test_client.get("/api/reminders")
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        assert isinstance(response.json(), list)
+
+
+@pytest.mark.asyncio
+async def test_cancel_missing_reminder(test_client: AsyncClient):
+    """Cancelling an unknown reminder is a 404."""
+    response = await test_client.delete("/api/reminders/999999999")
+    assert response.status_code in [404, 401]
+
+
+@pytest.mark.asyncio
+async def test_overdue_reminder_fires():
+    """A reminder whose time has passed (e.g. during a restart) is sent once and removed."""
+    async with AsyncSessionLocal() as db:
+        task_id = (await db.execute(select(Task.id).where(Task.deleted == False).limit(1))).scalar()  # noqa: E712
+        if task_id is None:
+            pytest.skip("no tasks in database")
+        overdue = await ReminderService.create(db, task_id, chat_id=-1, remind_at=Clock.now() - timedelta(hours=1))
+        later = await ReminderService.create(db, task_id, chat_id=-1, remind_at=Clock.now() + timedelta(days=1))
+        await db.commit()
+
+    sent = []
+
+    class Bot:
+        async def send_message(self, chat_id, text, parse_mode=None):
+            sent.append(chat_id)
+
+    try:
+        next_at = await _fire_due(Bot())
+        async with AsyncSessionLocal() as db:
+            pending = {r["id"] for r in await ReminderService.list_pending(db, chat_id=-1)}
+        assert sent == [-1]
+        assert pending == {later.id}
+        assert next_at is not None and next_at <= later.remind_at
+    finally:
+        async with AsyncSessionLocal() as db:
+            for reminder_id in (overdue.id, later.id):
+                await ReminderService.cancel(db, reminder_id)
+            await db.commit()
@@ -0,0 +1,74 @@
+"""Test full-text search."""
+import pytest
+from httpx import AsyncClient
+from app.services.search_service import build_match_query
+
+
+def test_build_match_query():
+    """Words are ANDed, long words become prefixes, FTS syntax is quoted away."""
+    assert build_match_query("Деплой сервер") == '"Деплой"* "сервер"*'
+    assert build_match_query("ui kit") == '"ui" "kit"*'
+    assert build_match_query('a" OR b*') == '"a" "OR" "b"'
+    assert build_match_query("  !!  ") is None
+
+
+@pytest.mark.asyncio
+async def test_search(test_client: AsyncClient):
+    """Search endpoint returns a list of hits."""
+    response = await test_client.get("/api/search", params={"q": "тест"})
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        assert isinstance(response.json(), list)
+
+
+@pytest.mark.asyncio
+async def test_search_short_query(test_client: AsyncClient):
+    """Queries shorter than 2 chars return nothing."""
+    response = await test_client.get("/api/search", params={"q": "a"})
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_all(test_client: AsyncClient):
+    """Unified search returns typed, paginated hits."""
+    response = await test_client.get(
+        "/api/search/all", params={"q": "тест", "types": "task,page", "limit": 5}
+    )
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        data = response.json()
+        assert data["limit"] == 5
+        assert isinstance(data["items"], list)
+        assert all(item["type"] in ("task", "page") for item in data["items"])
+
+
+@pytest.mark.asyncio
+async def test_search_all_without_fts_falls_back_to_like():
+    """Without the search_fts table unified search degrades to LIKE over tasks instead of failing."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.domain.models import Base, Task
+    from app.services.search_service import SearchService
+
+    # Чистая БД без ensure_search_index — как SQLite, собранный без FTS5
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with AsyncSession(engine) as db:
+            db.add_all([
+                Task(title="Deploy server", source="MANUAL_COMMAND"),
+                Task(title="Other", source="MANUAL_COMMAND"),
+            ])
+            await db.commit()
+
+            data = await SearchService.search(db, "deploy")
+            assert data["total"] == 1
+            assert [(item["type"], item["title"]) for item in data["items"]] == [("task", "Deploy server")]
+            assert await SearchService.search(db, "deploy", kinds=["page"]) == {
+                "items": [], "total": 0, "limit": 20, "offset": 0,
+            }
+            assert [hit["title"] for hit in await SearchService.search_tasks(db, "deploy")] == ["Deploy server"]
+    finally:
+        await engine.dispose()
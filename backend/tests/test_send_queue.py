@@ -0,0 +1,63 @@
+"""Test the outbound Telegram send queue against a fake Bot API server."""
+import asyncio
+import time
+
+import pytest
+from app.telegram.send_queue import CHAT_BURST, SendRateLimiter, SendScheduler, bulk_sends
+
+
+def _bot(fake_bot_api, scheduler: SendScheduler):
+    bot = fake_bot_api.bot()
+    bot.session.middleware(SendRateLimiter(scheduler))
+    return bot
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate(fake_bot_api):
+    scheduler = SendScheduler(per_sec=1000, per_chat_per_sec=20)
+    bot = _bot(fake_bot_api, scheduler)
+    try:
+        started = time.monotonic()
+        await asyncio.gather(*(bot.send_message(7, f"m{i}") for i in range(CHAT_BURST + 3)))
+        elapsed = time.monotonic() - started
+    finally:
+        await bot.session.close()
+    assert sorted(fake_bot_api.sent(7)) == [f"m{i}" for i in range(CHAT_BURST + 3)]
+    assert elapsed >= 3 / 20 * 0.9  # сверх burst — не чаще 20 в секунду
+    assert scheduler.snapshot()["sent"] == CHAT_BURST + 3
+
+
+@pytest.mark.asyncio
+async def test_interactive_overtakes_bulk(fake_bot_api):
+    """A reply queued behind a bulk broadcast goes out before most of it."""
+    scheduler = SendScheduler(per_sec=20)
+    bot = _bot(fake_bot_api, scheduler)
+    try:
+        with bulk_sends():
+            broadcast = [asyncio.create_task(bot.send_message(1000 + i, "bulk")) for i in range(40)]
+        await asyncio.sleep(0.1)
+        queued = scheduler.snapshot()["queued"]
+        assert queued["bulk"] > 0 and queued["interactive"] == 0
+        await bot.send_message(1, "reply")
+        await asyncio.gather(*broadcast)
+    finally:
+        await bot.session.close()
+    order = [text for _, _, text, _ in fake_bot_api.calls]
+    assert order.index("reply") < 30
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_chat_and_retries(fake_bot_api):
+    fake_bot_api.flood[5] = 1
+    scheduler = SendScheduler(per_sec=1000)
+    bot = _bot(fake_bot_api, scheduler)
+    try:
+        started = time.monotonic()
+        message, other = await asyncio.gather(bot.send_message(5, "after flood"), bot.send_message(6, "other"))
+        elapsed = time.monotonic() - started
+    finally:
+        await bot.session.close()
+    assert message.text == "after flood" and other.text == "other"
+    assert fake_bot_api.sent(5) == ["after flood"] and elapsed >= 1
+    snapshot = scheduler.snapshot()
+    assert snapshot["retry_after"] == 1 and snapshot["failed"] == 0
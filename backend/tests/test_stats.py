@@ -0,0 +1,31 @@
+"""Test dashboard stats."""
+import pytest
+from httpx import AsyncClient
+from app.services.stats_service import StatsService
+
+
+def test_fold_counters():
+    """Archived/deleted/backlog rows go to their own buckets, not to total."""
+    rows = [
+        ("TODO", False, False, False, 3),
+        ("DONE", False, False, False, 2),
+        ("TODO", False, False, True, 4),
+        ("DOING", True, False, False, 1),
+        ("DONE", True, True, False, 5),
+    ]
+    stats = StatsService._fold(rows)
+    assert stats["total"] == 5
+    assert stats["todo"] == 3
+    assert stats["done"] == 2
+    assert stats["archived"] == 1
+    assert stats["deleted"] == 5
+
+
+@pytest.mark.asyncio
+async def test_get_stats(test_client: AsyncClient):
+    """Stats endpoint returns all counters."""
+    response = await test_client.get("/api/stats")
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        data = response.json()
+        assert data["total"] >= data["todo"] + data["doing"]
@@ -0,0 +1,109 @@
+"""Test change_feed triggers and the /api/stream fan-out."""
+import pytest
+from sqlalchemy import delete, text
+from app.core.db import AsyncSessionLocal
+from app.domain.models import Comment, Project, Task
+from app.services.change_stream import ChangeStream, change_stream
+
+
+async def _drain(sub) -> list:
+    changes = []
+    while not sub.queue.empty():
+        changes.append(sub.queue.get_nowait())
+    return changes
+
+
+@pytest.mark.asyncio
+async def test_stream_filters_by_project_and_resumes():
+    """Triggers feed change_feed; subscribers get only their projects; Last-Event-ID resumes."""
+    stream = ChangeStream()
+    async with AsyncSessionLocal() as db:
+        projects = [Project(name="stream-a"), Project(name="stream-b")]
+        db.add_all(projects)
+        await db.commit()
+        a, b = (p.id for p in projects)
+    mine, _, _ = await stream.subscribe({a})
+    everyone, _, _ = await stream.subscribe()
+    try:
+        async with AsyncSessionLocal() as db:
+            task_a = Task(title="stream task a", project_id=a, source="MANUAL_COMMAND")
+            task_b = Task(title="stream task b", project_id=b, source="MANUAL_COMMAND")
+            db.add_all([task_a, task_b])
+            await db.commit()
+            db.add(Comment(task_id=task_a.id, text="hi"))
+            task_b.status = "DOING"
+            await db.commit()
+        async with stream._lock:
+            await stream._poll()
+
+        got = [(c.entity, c.op, c.project_id) for c in await _drain(mine)]
+        assert got == [("task", "insert", a), ("comment", "insert", a)]
+        all_changes = await _drain(everyone)
+        assert sorted((c.entity, c.op) for c in all_changes) == [
+            ("comment", "insert"), ("task", "insert"), ("task", "insert"), ("task", "update"),
+        ]
+
+        # Переподключение: всё после первого события, с фильтром клиента
+        reconnect = ChangeStream()
+        _, backlog, reset = await reconnect.subscribe({b}, all_changes[0].id)
+        await reconnect.stop()
+        assert not reset
+        assert [(c.entity_id, c.op) for c in backlog] == [(task_b.id, "insert"), (task_b.id, "update")]
+        assert "event: task" in backlog[0].to_sse()
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Comment).where(Comment.task_id.in_([task_a.id, task_b.id])))
+            await db.execute(delete(Task).where(Task.project_id.in_([a, b])))
+            await db.execute(delete(Project).where(Project.id.in_([a, b])))
+            await db.execute(text("DELETE FROM change_feed WHERE project_id IN (:a, :b)"), {"a": a, "b": b})
+            await db.commit()
+        await stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_stale_last_event_id_requests_reset():
+    stream = ChangeStream()
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(
+            "INSERT INTO change_feed (entity, entity_id, op) VALUES ('meeting', 0, 'update')"
+        ))
+        await db.commit()
+        head = (await db.execute(text("SELECT max(id) FROM change_feed"))).scalar()
+    try:
+        _, backlog, reset = await stream.subscribe(None, -100)
+        assert reset and backlog == []
+        _, backlog, reset = await stream.subscribe(None, head)
+        assert not reset and backlog == []
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("DELETE FROM change_feed WHERE id = :id"), {"id": head})
+            await db.commit()
+        await stream.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("headers", [[], [(b"last-event-id", b"0")]])
+async def test_disconnect_before_first_chunk_leaves_no_subscriber(headers):
+    """A client gone before the stream starts must not stay in the subscriber set."""
+    from app.web.app import app
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/stream", "raw_path": b"/api/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"test"), *headers],
+        "client": ("127.0.0.1", 1), "server": ("test", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    try:
+        await app(scope, receive, send)
+        assert not any(m.get("body") for m in sent if m["type"] == "http.response.body")
+        assert change_stream._subscribers == set()
+    finally:
+        await change_stream.stop()
@@ -0,0 +1,72 @@
+"""Test incremental task sync (task_versions + /api/sync/tasks)."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete, insert, text
+from app.core.db import AsyncSessionLocal
+from app.domain.models import Tag, Task, TaskDependency, task_tags
+from app.services.sync_service import SYNC_MAX_LIMIT, SyncService
+
+
+async def _head() -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(text("SELECT value FROM sync_seq WHERE id = 1"))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_changes_since_cursor():
+    """Only tasks changed after the cursor come back, with tag and dependency links; deletes are tombstones."""
+    cursor = await _head()
+    async with AsyncSessionLocal() as db:
+        tag = Tag(name="sync-test-tag")
+        first = Task(title="sync first", source="MANUAL_COMMAND")
+        second = Task(title="sync second", source="MANUAL_COMMAND", assignee_id=None)
+        db.add_all([tag, first, second])
+        await db.commit()
+        await db.execute(insert(task_tags).values(task_id=first.id, tag_id=tag.id))
+        db.add(TaskDependency(task_id=first.id, depends_on_id=second.id))
+        await db.commit()
+        ids = [first.id, second.id]
+    try:
+        async with AsyncSessionLocal() as db:
+            page = await SyncService.changes(db, since=cursor)
+            assert page["has_more"] is False
+            synced = {t["id"]: t for t in page["tasks"]}
+            assert set(synced) == set(ids)
+            assert synced[first.id]["tag_ids"] == [tag.id]
+            assert synced[first.id]["depends_on"] == [second.id]
+            assert (await SyncService.changes(db, since=page["cursor"]))["tasks"] == []
+
+            # Фильтр по исполнителю: чужие задачи приходят в removed
+            filtered = await SyncService.changes(db, since=cursor, assignee_id=-1)
+            assert filtered["tasks"] == [] and set(filtered["removed"]) == set(ids)
+            # ...кроме первой синхронизации: у клиента их не было, чужие id не раскрываем
+            first_sync = await SyncService.changes(db, since=0, limit=SYNC_MAX_LIMIT, assignee_id=-1)
+            assert first_sync["tasks"] == [] and first_sync["removed"] == []
+
+            # Пагинация: страница по одной задаче, курсор монотонный
+            one = await SyncService.changes(db, since=cursor, limit=1)
+            assert one["has_more"] and one["cursor"] > cursor
+
+            cursor = page["cursor"]
+            await db.execute(delete(TaskDependency).where(TaskDependency.task_id == first.id))
+            await db.execute(delete(task_tags).where(task_tags.c.task_id == first.id))
+            await db.execute(delete(Task).where(Task.id == first.id))
+            await db.commit()
+            page = await SyncService.changes(db, since=cursor)
+            assert page["removed"] == [first.id] and page["tasks"] == []
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(TaskDependency).where(TaskDependency.task_id.in_(ids)))
+            await db.execute(delete(task_tags).where(task_tags.c.task_id.in_(ids)))
+            await db.execute(delete(Task).where(Task.id.in_(ids)))
+            await db.execute(delete(Tag).where(Tag.name == "sync-test-tag"))
+            await db.execute(text("DELETE FROM task_versions WHERE task_id IN (:a, :b)"),
+                             {"a": ids[0], "b": ids[1]})
+            await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_sync_endpoint(test_client: AsyncClient):
+    response = await test_client.get("/api/sync/tasks", params={"since": await _head()})
+    assert response.status_code == 200
+    assert response.json()["tasks"] == []
@@ -0,0 +1,128 @@
+"""Test Telegram webhook ingestion by POSTing recorded update fixtures."""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import CallbackQuery, Message
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestClient, TestServer, unused_port
+from app.config import settings
+from app.telegram.webhook import SECRET_HEADER, UpdatePipeline, create_webhook_app, run_webhook, update_chat_key
+
+FIXTURES = Path(__file__).parent / "fixtures" / "telegram_updates"
+SECRET = "test-secret"
+PATH = "/telegram/webhook"
+
+
+def _fixture(name: str) -> dict:
+    return json.loads((FIXTURES / f"{name}.json").read_text(encoding="utf-8"))
+
+
+def _message(update_id: int, chat_id: int, text: str) -> dict:
+    update = _fixture("message_private")
+    update["update_id"] = update_id
+    update["message"]["chat"]["id"] = chat_id
+    update["message"]["text"] = text
+    update["message"].pop("entities")
+    return update
+
+
+def _dispatcher(handled: list) -> Dispatcher:
+    router = Router()
+
+    @router.message()
+    async def on_message(message: Message):
+        # Первый апдейт чата — самый медленный: без порядка по чату он финишировал бы последним
+        await asyncio.sleep(0.05 if message.text == "slow" else 0)
+        handled.append((message.chat.id, message.text))
+
+    @router.callback_query()
+    async def on_callback(callback: CallbackQuery):
+        handled.append((callback.message.chat.id, callback.data))
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_webhook_fixtures_ordered_per_chat():
+    handled: list = []
+    bot = Bot("123456:TEST")
+    pipeline = UpdatePipeline(_dispatcher(handled), bot, workers=4, max_pending=100)
+    pipeline.start()
+    client = TestClient(TestServer(create_webhook_app(pipeline, SECRET, PATH)))
+    await client.start_server()
+    try:
+        for name in ("message_private", "message_group", "callback_query"):
+            response = await client.post(PATH, json=_fixture(name), headers={SECRET_HEADER: SECRET})
+            assert response.status == 200
+
+        update_id = 800000000
+        for i in range(5):
+            for chat_id in (1, 2):
+                update_id += 1
+                response = await client.post(PATH, json=_message(update_id, chat_id, "slow" if i == 0 else f"m{i}"),
+                                             headers={SECRET_HEADER: SECRET})
+                assert response.status == 200
+        # Повторная доставка того же update_id не обрабатывается второй раз
+        await client.post(PATH, json=_message(update_id, 2, "dup"), headers={SECRET_HEADER: SECRET})
+
+        assert (await client.post(PATH, json=_fixture("message_private"))).status == 401
+        assert (await client.post(PATH, data="{", headers={SECRET_HEADER: SECRET})).status == 400
+        await pipeline.stop()
+    finally:
+        await client.close()
+        await bot.session.close()
+
+    assert (5550001, "/help") in handled and (5550001, "menu:tasks") in handled
+    assert (-1001234567890, "Починить экспорт в CSV до пятницы") in handled
+    for chat_id in (1, 2):
+        assert [text for chat, text in handled if chat == chat_id] == ["slow", "m1", "m2", "m3", "m4"]
+
+
+def test_update_chat_key():
+    from aiogram.types import Update
+
+    assert update_chat_key(Update.model_validate(_fixture("callback_query"))) == 5550001
+    assert update_chat_key(Update.model_validate(_fixture("message_group"))) == -1001234567890
+    assert update_chat_key(Update(update_id=5)) == -5
+
+
+@pytest.mark.asyncio
+async def test_default_secret_stable_across_restarts(monkeypatch):
+    """Without TELEGRAM_WEBHOOK_SECRET a restart keeps the secret Telegram already holds."""
+    port = unused_port()
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_SECRET", None)
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_URL", f"http://127.0.0.1:{port}")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "TELEGRAM_WEBHOOK_PORT", port)
+    handled: list = []
+    registered: list[str] = []
+    statuses: list[int] = []
+    bot = Bot("123456:TEST")
+
+    async def set_webhook(url, secret_token=None, **kwargs):
+        registered.append(secret_token)
+        # Telegram шлёт апдейты с секретом первой регистрации — на рестарте тоже
+        async with ClientSession() as session:
+            async with session.post(url, json=_fixture("message_private"),
+                                    headers={SECRET_HEADER: registered[0]}) as response:
+                statuses.append(response.status)
+        if len(registered) > 1:
+            raise RuntimeError("Telegram is unreachable")
+        return True
+
+    monkeypatch.setattr(bot, "set_webhook", set_webhook)
+    try:
+        for _ in range(2):
+            stop = asyncio.Event()
+            stop.set()
+            await run_webhook(_dispatcher(handled), bot, stop)
+    finally:
+        await bot.session.close()
+
+    assert len(registered) == 2 and registered[0] == registered[1]
+    assert statuses == [200, 200]
@@ -0,0 +1,21 @@
+"""Test trend endpoints backed by task_snapshots."""
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["burndown", "throughput", "cycle-time"])
+async def test_get_trend(test_client: AsyncClient, kind: str):
+    """Trend endpoints return a day-ordered series."""
+    response = await test_client.get(f"/api/trends/{kind}", params={"days": 14})
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        days = [row["day"] for row in response.json()]
+        assert days == sorted(days)
+
+
+@pytest.mark.asyncio
+async def test_trend_days_limit(test_client: AsyncClient):
+    """days is capped to a year."""
+    response = await test_client.get("/api/trends/burndown", params={"days": 1000})
+    assert response.status_code in [422, 401]
@@ -0,0 +1,64 @@
+"""Test write-behind Telegram user tracking in the bot middleware."""
+import pytest
+from aiogram.types import User
+from sqlalchemy import delete, select
+from app.core import db as db_module
+from app.core.db import AsyncSessionLocal
+from app.domain.models import LocalAccount, UserIdentity
+from app.telegram import middleware
+from app.telegram.middleware import UserTracker
+
+TG_ID = 990000000001
+
+
+@pytest.mark.asyncio
+async def test_profile_written_once_and_touches_batched(monkeypatch):
+    """Repeated events cost no writes; a profile change writes once; touches flush together."""
+    writes = []
+
+    async def counting_run_write(fn):
+        writes.append(fn)
+        return await db_module.run_write(fn)
+
+    monkeypatch.setattr(middleware, "run_write", counting_run_write)
+    tracker = UserTracker(capacity=10)
+    user = User(id=TG_ID, is_bot=False, first_name="Track", username="track_old")
+    try:
+        for _ in range(5):
+            await tracker.track(user)
+        assert len(writes) == 1
+
+        await tracker.track(User(id=TG_ID, is_bot=False, first_name="Track", username="track_new"))
+        assert len(writes) == 2
+        assert len(tracker._touched) == 1
+
+        await tracker.flush()
+        assert len(writes) == 3 and tracker._touched == {}
+        async with AsyncSessionLocal() as db:
+            account = (await db.execute(
+                select(LocalAccount).join(UserIdentity, UserIdentity.local_account_id == LocalAccount.id)
+                .where(UserIdentity.provider == "telegram", UserIdentity.provider_user_id == str(TG_ID))
+            )).scalar_one()
+            assert account.username == "track_new"
+            assert account.last_seen_at is not None
+    finally:
+        async with AsyncSessionLocal() as db:
+            ids = select(UserIdentity.local_account_id).where(
+                UserIdentity.provider == "telegram", UserIdentity.provider_user_id == str(TG_ID))
+            account_ids = list((await db.execute(ids)).scalars())
+            await db.execute(delete(UserIdentity).where(UserIdentity.local_account_id.in_(account_ids)))
+            await db.execute(delete(LocalAccount).where(LocalAccount.id.in_(account_ids)))
+            await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest(monkeypatch):
+    async def fake_run_write(fn):
+        return 1
+
+    monkeypatch.setattr(middleware, "run_write", fake_run_write)
+    tracker = UserTracker(capacity=2)
+    for uid in (1, 2, 1, 3):
+        await tracker.track(User(id=uid, is_bot=False, first_name=f"u{uid}"))
+    assert list(tracker._known) == [1, 3]
+    tracker._take()
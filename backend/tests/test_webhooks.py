@@ -0,0 +1,120 @@
+"""Test webhook outbox."""
+import json
+from datetime import timedelta
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update, delete
+from app.core.clock import Clock
+from app.core.db import AsyncSessionLocal
+from app.domain.models import Webhook, WebhookOutbox
+from app.services import webhook_service
+from app.services.webhook_service import (
+    _backoff, _ready_batches, enqueue_webhook_event, webhook_registry, WebhookDispatcher,
+)
+
+
+def test_backoff_grows_with_cap():
+    """Exponential delay with ±50% jitter, capped."""
+    for attempts in range(1, 20):
+        base = min(webhook_service.BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+                   webhook_service.BACKOFF_MAX_SECONDS)
+        assert base * 0.5 <= _backoff(attempts) <= base * 1.5
+
+
+def test_ready_batches():
+    """A batch goes out when its oldest event's window ends or the count cap is hit."""
+    now = Clock.now()
+    batching = {1: (60, 3), 2: (60, 3), 3: (60, 3)}
+    stats = [
+        (1, 1, now - timedelta(seconds=1)),   # окно истекло
+        (2, 3, now + timedelta(seconds=30)),  # набрался максимум
+        (3, 2, now + timedelta(seconds=30)),  # ждёт
+    ]
+    assert _ready_batches(stats, batching, now) == [1, 2]
+
+
+@pytest.fixture
+async def status_webhook():
+    async with AsyncSessionLocal() as db:
+        webhook = Webhook(url="http://127.0.0.1:9/hook", events=json.dumps(["task.status_changed"]))
+        db.add(webhook)
+        await db.commit()
+    webhook_registry.invalidate()
+    yield webhook
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Webhook).where(Webhook.id == webhook.id))
+        await db.commit()
+    webhook_registry.invalidate()
+
+
+@pytest.mark.asyncio
+async def test_outbox_follows_transaction(status_webhook):
+    """Outbox rows are written in the caller's transaction and vanish on rollback."""
+    async with AsyncSessionLocal() as db:
+        assert await enqueue_webhook_event(db, "task.status_changed", {"id": 1}) >= 1
+        await db.flush()
+        rows = (await db.execute(
+            select(WebhookOutbox).where(WebhookOutbox.webhook_id == status_webhook.id)
+        )).scalars().all()
+        assert json.loads(rows[0].payload)["task"] == {"id": 1}
+        await db.rollback()
+
+    async with AsyncSessionLocal() as db:
+        left = (await db.execute(
+            select(WebhookOutbox).where(WebhookOutbox.webhook_id == status_webhook.id)
+        )).scalars().all()
+    assert left == []
+
+
+@pytest.mark.asyncio
+async def test_registry_sees_other_process_changes(status_webhook):
+    """A change made elsewhere (no local invalidate) is picked up via cache_versions."""
+    assert status_webhook.id in await webhook_registry.subscribers("task.status_changed")
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Webhook).where(Webhook.id == status_webhook.id).values(is_active=False))
+        await db.commit()
+    # Пока не истёк интервал проверки — ответ из памяти
+    assert status_webhook.id in await webhook_registry.subscribers("task.status_changed")
+    webhook_registry._checked_at = float("-inf")
+    assert status_webhook.id not in await webhook_registry.subscribers("task.status_changed")
+
+
+@pytest.mark.asyncio
+async def test_outbox_stats(test_client: AsyncClient):
+    """Stats endpoint reports queue depth and delivery lag."""
+    response = await test_client.get("/api/webhooks/outbox/stats")
+    assert response.status_code in [200, 401]
+    if response.status_code == 200:
+        assert {"pending", "dead", "lag_p50_ms"} <= response.json().keys()
+
+
+@pytest.mark.asyncio
+async def test_batch_claim_joins_events(status_webhook):
+    """Events of a batching webhook are delivered as one signed JSON array."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Webhook).where(Webhook.id == status_webhook.id)
+                         .values(batch_window_sec=60, batch_max_events=3))
+        await db.commit()
+    webhook_registry.invalidate()
+
+    async with AsyncSessionLocal() as db:
+        for task_id in range(3):
+            await enqueue_webhook_event(db, "task.status_changed", {"id": task_id})
+        await db.commit()
+        rows = (await db.execute(
+            select(WebhookOutbox).where(WebhookOutbox.webhook_id == status_webhook.id)
+        )).scalars().all()
+    # Строки отложены на окно — одиночный путь их не заберёт
+    assert all(row.next_attempt_at > Clock.now() for row in rows)
+
+    dispatcher = WebhookDispatcher(workers=1, per_endpoint=1, max_attempts=1)
+    async with AsyncSessionLocal() as db:
+        batches = await dispatcher._claim_batches(db, await webhook_registry.batching(), Clock.now())
+    batch = next(b for b in batches if b.webhook_id == status_webhook.id)
+    assert batch.batch and len(batch.ids) == 3
+    assert [event["task"]["id"] for event in json.loads(batch.payload)] == [0, 1, 2]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(WebhookOutbox).where(WebhookOutbox.webhook_id == status_webhook.id))
+        await db.commit()
@@ -9,11 +9,25 @@ interface SearchPanelProps {
   onOpenTask: (t: Task) => void;
 }
 
+type SearchHit = Task & { snippet?: string | null };
+
+// Сниппет с бэкенда размечен <mark>…</mark>; рендерим без innerHTML
+export function Highlighted({ text }: { text: string }) {
+  const parts = text.split(/<\/?mark>/);
+  return (
+    <>
+      {parts.map((part, i) =>
+        i % 2 === 1 ? <mark key={i} className="bg-yellow-100 text-gray-700 rounded px-0.5">{part}</mark> : part
+      )}
+    </>
+  );
+}
+
 export function SearchPanel({ onOpenTask }: SearchPanelProps) {
   const [query, setQuery] = useState('');
   const debouncedQuery = useDebounce(query, 300);
 
-  const { data: results = [], isFetching } = useQuery<Task[]>({
+  const { data: results = [], isFetching } = useQuery<SearchHit[]>({
     queryKey: ['search', debouncedQuery],
     queryFn: async () => {
       if (debouncedQuery.length < 2) return [];
@@ -41,7 +55,7 @@ export function SearchPanel({ onOpenTask }: SearchPanelProps) {
             {results.length === 0 && !isFetching && (
               <p className="text-sm text-gray-400 text-center py-4">Ничего не найдено</p>
             )}
-            {results.map((t: Task) => (
+            {results.map((t: SearchHit) => (
               <button
                 key={t.id}
                 onClick={() => onOpenTask(t)}
@@ -57,7 +71,9 @@ export function SearchPanel({ onOpenTask }: SearchPanelProps) {
                     'bg-gray-100 text-gray-600'
                   }`}>{t.status}</span>
                 </div>
-                {t.description && (
+                {t.snippet ? (
+                  <p className="text-xs text-gray-400 mt-0.5 truncate pl-7"><Highlighted text={t.snippet} /></p>
+                ) : t.description && (
                   <p className="text-xs text-gray-400 mt-0.5 truncate pl-7">{t.description}</p>
                 )}
               </button>
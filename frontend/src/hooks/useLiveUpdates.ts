@@ -0,0 +1,114 @@
+import { useEffect, useState } from 'react';
+import axios from 'axios';
+import { QueryClient, useQueryClient } from '@tanstack/react-query';
+import { API_URL } from '../constants/taskDisplay';
+import { Task } from '../types/dashboard';
+
+// Пачка событий по задачам собирается за это окно; больше MAX_PATCH задач — проще перечитать список
+const BATCH_MS = 300;
+const MAX_PATCH = 20;
+
+type ListRule = { key: unknown[]; belongs: (t: Task) => boolean };
+
+const LISTS: ListRule[] = [
+  { key: ['tasks'], belongs: t => !t.deleted && !t.archived && !t.backlog },
+  { key: ['backlog'], belongs: t => !t.deleted && !t.archived && !!t.backlog },
+];
+
+/** Заменить/убрать задачу в закэшированных списках; false — задачу надо добавить, а места мы не знаем. */
+function patchTask(qc: QueryClient, id: number, fresh: Task | null): boolean {
+  let patched = true;
+  for (const { key, belongs } of LISTS) {
+    for (const [queryKey, data] of qc.getQueriesData<Task[]>({ queryKey: key })) {
+      if (!Array.isArray(data)) continue;
+      const present = data.some(t => t.id === id);
+      const keep = fresh !== null && belongs(fresh);
+      if (present) {
+        qc.setQueryData<Task[]>(queryKey, keep
+          ? data.map(t => (t.id === id ? { ...t, ...fresh } : t))
+          : data.filter(t => t.id !== id));
+      } else if (keep) {
+        patched = false;
+      }
+    }
+  }
+  return patched;
+}
+
+/**
+ * Живые обновления через SSE /api/stream: изменения из Telegram и от коллег
+ * патчат кэш TanStack Query точечно, без перечитывания списков.
+ * Возвращает true, пока поток подключён — опрос можно сделать редким.
+ */
+export function useLiveUpdates(projectIds: number[] = []): boolean {
+  const qc = useQueryClient();
+  const [connected, setConnected] = useState(false);
+  const projectsKey = projectIds.join(',');
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return;
+    const params = new URLSearchParams();
+    projectsKey.split(',').filter(Boolean).forEach(id => params.append('project_id', id));
+    const source = new EventSource(`${API_URL}/api/stream${params.toString() ? `?${params}` : ''}`);
+
+    const pending = new Set<number>();
+    let timer: ReturnType<typeof setTimeout> | null = null;
+
+    const refetchAll = () => {
+      qc.invalidateQueries({ queryKey: ['tasks'] });
+      qc.invalidateQueries({ queryKey: ['backlog'] });
+      qc.invalidateQueries({ queryKey: ['stats'] });
+      qc.invalidateQueries({ queryKey: ['sprints'] });
+      qc.invalidateQueries({ queryKey: ['meetings'] });
+    };
+
+    const flushTasks = async () => {
+      timer = null;
+      const ids = [...pending];
+      pending.clear();
+      qc.invalidateQueries({ queryKey: ['stats'] });
+      if (ids.length > MAX_PATCH) {
+        qc.invalidateQueries({ queryKey: ['tasks'] });
+        qc.invalidateQueries({ queryKey: ['backlog'] });
+        return;
+      }
+      let missing = false;
+      await Promise.all(ids.map(async id => {
+        let fresh: Task | null = null;
+        try {
+          fresh = (await axios.get<Task>(`${API_URL}/api/tasks/${id}`)).data;
+        } catch (e: any) {
+          if (e?.response?.status !== 404) { missing = true; return; }
+        }
+        if (!patchTask(qc, id, fresh)) missing = true;
+      }));
+      if (missing) {
+        qc.invalidateQueries({ queryKey: ['tasks'] });
+        qc.invalidateQueries({ queryKey: ['backlog'] });
+      }
+    };
+
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false);  // EventSource переподключится сам, с Last-Event-ID
+
+    source.addEventListener('task', (e) => {
+      pending.add(JSON.parse((e as MessageEvent).data).id);
+      if (!timer) timer = setTimeout(flushTasks, BATCH_MS);
+    });
+    source.addEventListener('comment', (e) => {
+      const { task_id } = JSON.parse((e as MessageEvent).data);
+      qc.invalidateQueries({ queryKey: ['comments', task_id] });
+    });
+    source.addEventListener('sprint', () => qc.invalidateQueries({ queryKey: ['sprints'] }));
+    source.addEventListener('meeting', () => qc.invalidateQueries({ queryKey: ['meetings'] }));
+    source.addEventListener('reset', refetchAll);
+
+    return () => {
+      if (timer) clearTimeout(timer);
+      source.close();
+      setConnected(false);
+    };
+  }, [qc, projectsKey]);
+
+  return connected;
+}
@@ -8,6 +8,7 @@ import { timeAgo, getDueStatus, formatDueDate, formatDuration, formatDatetime, p
 import { getAncestorBlockedIds } from '../utils/taskUtils';
 import { showToast } from '../utils/toast';
 import { useTaskChangeDetector } from '../hooks/useTaskChangeDetector';
+import { useLiveUpdates } from '../hooks/useLiveUpdates';
 import { usePushNotifications } from '../hooks/usePushNotifications';
 import { useTheme } from '../hooks/useTheme';
 import { ToastContainer } from '../components/Toast';
@@ -237,10 +238,14 @@ export default function Dashboard() {
   const [taskPage, setTaskPage] = useState(0);
   const PAGE_SIZE = 100;
 
+  // Пока открыт SSE-поток, изменения приходят событиями — опрос остаётся страховкой
+  const live = useLiveUpdates();
+  const pollInterval = live ? 60_000 : 5000;
+
   const { data: newTasks, isFetching: isLoadingTasks } = useQuery<Task[]>({
     queryKey: ['tasks', taskPage],
     queryFn: async () => (await axios.get(`${API_URL}/api/tasks?offset=${taskPage * PAGE_SIZE}&limit=${PAGE_SIZE}`)).data,
-    refetchInterval: 5000,
+    refetchInterval: pollInterval,
   });
 
   const tasks = React.useMemo(() => {
@@ -258,13 +263,13 @@ export default function Dashboard() {
   const { data: backlogTasks = [] } = useQuery<Task[]>({
     queryKey: ['backlog'],
     queryFn: async () => (await axios.get(`${API_URL}/api/backlog`)).data,
-    refetchInterval: 5000,
+    refetchInterval: pollInterval,
   });
 
   const { data: stats } = useQuery<Stats>({
     queryKey: ['stats'],
     queryFn: async () => (await axios.get(`${API_URL}/api/stats`)).data,
-    refetchInterval: 5000,
+    refetchInterval: pollInterval,
   });
 
   const { data: users = [] } = useQuery<TelegramUser[]>({
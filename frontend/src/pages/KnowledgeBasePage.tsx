@@ -6,6 +6,8 @@ import { API_URL } from '../constants/taskDisplay';
 import { timeAgo } from '../utils/dateUtils';
 import { showToast } from '../utils/toast';
 import Modal from '../components/Modal';
+import { Highlighted } from '../components/SearchPanel';
+import { useDebounce } from '../hooks/useDebounce';
 
 interface KnowledgeFolder {
   id: number;
@@ -26,6 +28,15 @@ interface KnowledgePage {
   updated_at: string | null;
 }
 
+interface PageSearchHit {
+  type: 'page';
+  id: number;
+  title: string;
+  folder_id: number | null;
+  snippet: string | null;
+  updated_at: string | null;
+}
+
 export default function KnowledgeBasePage() {
   const queryClient = useQueryClient();
   const invalidate = () => {
@@ -41,6 +52,8 @@ export default function KnowledgeBasePage() {
   const [confirmDeletePage, setConfirmDeletePage] = useState<number | null>(null);
   const [editingContent, setEditingContent] = useState(false);
   const [pageContent, setPageContent] = useState('');
+  const [searchQuery, setSearchQuery] = useState('');
+  const debouncedSearch = useDebounce(searchQuery.trim(), 300);
 
   const { data: folders = [] } = useQuery<KnowledgeFolder[]>({
     queryKey: ['knowledge-folders'],
@@ -52,6 +65,16 @@ export default function KnowledgeBasePage() {
     queryFn: async () => (await axios.get(`${API_URL}/api/knowledge-base/pages`)).data,
   });
 
+  // Поиск по содержимому — на сервере (FTS), а не фильтром по загруженным страницам
+  const { data: searchResult, isFetching: isSearching } = useQuery<{ items: PageSearchHit[]; total: number }>({
+    queryKey: ['knowledge-search', debouncedSearch],
+    queryFn: async () => (await axios.get(`${API_URL}/api/search/all`, {
+      params: { q: debouncedSearch, types: 'page', limit: 50 },
+    })).data,
+    enabled: debouncedSearch.length >= 2,
+  });
+  const searchActive = debouncedSearch.length >= 2;
+
   const createFolderMutation = useMutation({
     mutationFn: async (data: { name: string; parent_id?: number }) => {
       await axios.post(`${API_URL}/api/knowledge-base/folders`, data);
@@ -182,6 +205,16 @@ export default function KnowledgeBasePage() {
             + Страница
           </button>
         </div>
+        <div className="px-3 py-2 border-b relative">
+          <input
+            type="text"
+            value={searchQuery}
+            onChange={(e) => { setSearchQuery(e.target.value); setSelectedPage(null); }}
+            placeholder="Поиск по базе знаний..."
+            className="w-full border rounded-lg px-3 py-1.5 text-sm focus:outline-none focus:ring-2 focus:ring-blue-300"
+          />
+          {isSearching && <span className="absolute right-5 top-3.5 text-gray-400 text-xs">...</span>}
+        </div>
 
         {/* Pages List */}
         {selectedPage ? (
@@ -241,6 +274,34 @@ export default function KnowledgeBasePage() {
               )}
             </div>
           </div>
+        ) : searchActive ? (
+          <div className="flex-1 overflow-y-auto p-3">
+            {(searchResult?.items ?? []).length === 0 ? (
+              <p className="text-gray-400 text-center py-8">{isSearching ? 'Поиск...' : 'Ничего не найдено'}</p>
+            ) : (
+              <div className="space-y-2">
+                {searchResult!.items.map(hit => (
+                  <div
+                    key={hit.id}
+                    className="p-3 border rounded-lg cursor-pointer hover:border-blue-300 hover:bg-blue-50"
+                    onClick={() => {
+                      const page = pages.find(p => p.id === hit.id);
+                      if (page) setSelectedPage(page);
+                    }}
+                  >
+                    <h4 className="font-medium">{hit.title}</h4>
+                    {hit.snippet && (
+                      <p className="text-sm text-gray-500 mt-1 line-clamp-2"><Highlighted text={hit.snippet} /></p>
+                    )}
+                    <p className="text-xs text-gray-400 mt-2">
+                      {hit.folder_id ? `📁 ${folders.find(f => f.id === hit.folder_id)?.name ?? ''} · ` : ''}
+                      Обновлено {timeAgo(hit.updated_at || '')}
+                    </p>
+                  </div>
+                ))}
+              </div>
+            )}
+          </div>
         ) : (
           <div className="flex-1 overflow-y-auto p-3">
             {(selectedFolderId !== null ? selectedFolderPages : rootPages).length === 0 ? (
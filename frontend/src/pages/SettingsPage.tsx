@@ -561,9 +561,7 @@ function SystemSettingsSection() {
               const newVal = !eventStoreEnabled;
               setEventStoreEnabled(newVal);
               try {
-                await axios.put(`${API_URL}/api/settings/system`, {
-                  event_store_enabled: newVal ? 'true' : 'false',
-                });
+                await axios.put(`${API_URL}/api/events/enabled`, { enabled: newVal });
               } catch { setEventStoreEnabled(!newVal); }
             }}
             className={`w-12 h-6 rounded-full transition ${eventStoreEnabled ? 'bg-green-500' : 'bg-gray-300'}`}
@@ -1642,12 +1640,13 @@ export default function SettingsPage(props: SettingsPageProps) {
   const handleCheckProxy = async () => { setProxyCheck({ checking: true }); try { const r = await axios.get(`${API_URL}/api/settings/proxy/check`, { timeout: 20000 }); setProxyCheck({ checking: false, ...r.data }); } catch (e: any) { setProxyCheck({ checking: false, reachable: false, error: e?.message || 'Ошибка' }); } };
 
   // Webhooks
-  const [webhooks, setWebhooks] = React.useState<{id: number, url: string, events: string, secret: string|null, is_active: boolean, created_at: string, last_triggered_at: string|null}[]>([]);
+  const [webhooks, setWebhooks] = React.useState<{id: number, url: string, events: string, secret: string|null, is_active: boolean, batch_window_sec: number|null, batch_max_events: number|null, created_at: string, last_triggered_at: string|null}[]>([]);
   const [newWebhookUrl, setNewWebhookUrl] = React.useState('');
   const [newWebhookEvents, setNewWebhookEvents] = React.useState<string[]>([]);
   const [newWebhookSecret, setNewWebhookSecret] = React.useState('');
+  const [newWebhookBatch, setNewWebhookBatch] = React.useState('');
   React.useEffect(() => { axios.get(`${API_URL}/api/webhooks`).then(r => setWebhooks(r.data)).catch(() => {}); }, []);
-  const handleCreateWebhook = async () => { try { const r = await axios.post(`${API_URL}/api/webhooks`, { url: newWebhookUrl, events: newWebhookEvents, secret: newWebhookSecret || undefined, is_active: true }); setWebhooks([r.data, ...webhooks]); setNewWebhookUrl(''); setNewWebhookEvents([]); setNewWebhookSecret(''); } catch { showToast('Ошибка создания вебхука', 'error'); } };
+  const handleCreateWebhook = async () => { try { const r = await axios.post(`${API_URL}/api/webhooks`, { url: newWebhookUrl, events: newWebhookEvents, secret: newWebhookSecret || undefined, is_active: true, batch_window_sec: newWebhookBatch ? Number(newWebhookBatch) : undefined }); setWebhooks([r.data, ...webhooks]); setNewWebhookUrl(''); setNewWebhookEvents([]); setNewWebhookSecret(''); setNewWebhookBatch(''); } catch { showToast('Ошибка создания вебхука', 'error'); } };
   const deleteWebhook = async (id: number) => { try { await axios.delete(`${API_URL}/api/webhooks/${id}`); setWebhooks(webhooks.filter(w => w.id !== id)); } catch { showToast('Ошибка удаления вебхука', 'error'); } };
   const toggleWebhook = async (id: number, isActive: boolean) => { try { const r = await axios.patch(`${API_URL}/api/webhooks/${id}`, { is_active: isActive }); setWebhooks(webhooks.map(w => w.id === id ? r.data : w)); } catch { showToast('Ошибка обновления вебхука', 'error'); } };
   const testWebhook = async (id: number) => { try { await axios.post(`${API_URL}/api/webhooks/${id}/test`, { event: 'test' }); showToast('Тестовый запрос отправлен', 'success'); } catch { showToast('Ошибка тестового запроса', 'error'); } };
@@ -1820,7 +1819,7 @@ export default function SettingsPage(props: SettingsPageProps) {
               <div>
                 <label className="text-xs text-gray-500 block mb-1">События</label>
                 <div className="flex flex-wrap gap-2">
-                  {['task.created', 'task.status_changed', 'task.deleted'].map(ev => (
+                  {['task.created', 'task.status_changed', 'task.updated', 'task.deleted'].map(ev => (
                     <label key={ev} className="flex items-center gap-1.5 text-sm cursor-pointer">
                       <input type="checkbox" checked={newWebhookEvents.includes(ev)} onChange={(e) => setNewWebhookEvents(e.target.checked ? [...newWebhookEvents, ev] : newWebhookEvents.filter(x => x !== ev))} className="w-4 h-4 rounded" />{ev}
                     </label>
@@ -1828,6 +1827,7 @@ export default function SettingsPage(props: SettingsPageProps) {
                 </div>
               </div>
               <input type="text" value={newWebhookSecret} onChange={(e) => setNewWebhookSecret(e.target.value)} placeholder="Secret для HMAC (необязательно)" className="w-full px-3 py-2 border rounded-lg text-sm" />
+              <input type="number" min={0} max={3600} value={newWebhookBatch} onChange={(e) => setNewWebhookBatch(e.target.value)} placeholder="Окно пакета, сек (пусто — по одному событию)" className="w-full px-3 py-2 border rounded-lg text-sm" />
               <button onClick={handleCreateWebhook} disabled={!newWebhookUrl || newWebhookEvents.length === 0} className="w-full py-2 bg-indigo-600 text-white rounded-lg text-sm hover:bg-indigo-700 disabled:opacity-50">Добавить вебхук</button>
             </div>
             {webhooks.length === 0 ? (
@@ -1840,6 +1840,7 @@ export default function SettingsPage(props: SettingsPageProps) {
                       <p className="text-sm font-medium text-gray-800 truncate">{wh.url}</p>
                       <div className="flex items-center gap-2 mt-1">
                         <span className={`text-xs px-2 py-0.5 rounded ${wh.is_active ? 'bg-green-100 text-green-700' : 'bg-gray-200 text-gray-500'}`}>{wh.is_active ? 'active' : 'inactive'}</span>
+                        {wh.batch_window_sec ? <span className="text-xs px-2 py-0.5 rounded bg-indigo-100 text-indigo-700">batch {wh.batch_window_sec}s</span> : null}
                         <span className="text-xs text-gray-400">{JSON.parse(wh.events).join(', ')}</span>
                       </div>
                     </div>